@@ -2,8 +2,10 @@ import streamlit as st
 import threading
 import time
 import os
+import uuid
 from datetime import datetime
 from model_llama4 import Llama4RAGChatbot
+from voice_latency import VOICE_LATENCY, VoiceTurn
 try:
     from audio_processor import AudioProcessor
     AUDIO_AVAILABLE = True
@@ -11,6 +13,37 @@ except ImportError:
     from audio_processor_simple import SimpleAudioProcessor as AudioProcessor
     AUDIO_AVAILABLE = False
 
+KNOWLEDGE_FILE = "knowledge.txt"
+MAX_DISPLAY_MESSAGES = 100
+
+@st.cache_resource(show_spinner=False)
+def _created_models():
+    """Models built so far; cached itself so it survives reruns, unlike module globals"""
+    return {}
+
+@st.cache_resource(show_spinner=False)
+def get_shared_chatbot():
+    """Chatbot, embedding model and index shared by every session and rerun"""
+    # RAG_SHARED_INDEX attaches to an index published by another process instead of building one
+    chatbot = Llama4RAGChatbot(knowledge_file=KNOWLEDGE_FILE, watch_knowledge=True,
+                               attach_shared=os.environ.get("RAG_SHARED_INDEX"))
+    _created_models()["chatbot"] = chatbot
+    return chatbot
+
+@st.cache_resource(show_spinner=False)
+def get_shared_audio_processor():
+    """Audio processor shared by every session and rerun"""
+    return AudioProcessor()
+
+def invalidate_shared_models():
+    """Drop the cached models so the next rerun rebuilds them"""
+    # Only stop a chatbot that exists; calling get_shared_chatbot() here could build one
+    chatbot = _created_models().pop("chatbot", None)
+    if chatbot is not None:
+        chatbot.stop_watching()
+    get_shared_chatbot.clear()
+    get_shared_audio_processor.clear()
+
 class ChatbotGUI:
     def __init__(self):
         """Initialize the chatbot GUI"""
@@ -27,6 +60,8 @@ class ChatbotGUI:
             st.session_state.is_audio_mode = False
         if 'is_listening' not in st.session_state:
             st.session_state.is_listening = False
+        if 'session_id' not in st.session_state:
+            st.session_state.session_id = uuid.uuid4().hex
         
     def setup_page(self):
         """Setup the Streamlit page configuration"""
@@ -104,13 +139,12 @@ class ChatbotGUI:
         """, unsafe_allow_html=True)
     
     def initialize_models(self):
-        """Initialize the chatbot and audio processor"""
+        """Attach to the process-wide chatbot and audio processor, loading them once"""
         try:
             with st.spinner("🔄 Initializing models (Llama-4-Maverick)..."):
-                self.chatbot = Llama4RAGChatbot()
-                self.audio_processor = AudioProcessor()
-                st.success("✅ Models initialized successfully!")
-                return True
+                self.chatbot = get_shared_chatbot()
+                self.audio_processor = get_shared_audio_processor()
+            return True
         except Exception as e:
             st.error(f"❌ Failed to initialize models: {e}")
             return False
@@ -165,11 +199,32 @@ class ChatbotGUI:
             
             if st.button("🗑️ Clear Chat History"):
                 st.session_state.chat_history = []
+                if self.chatbot:
+                    self.chatbot.clear_chat_history(st.session_state.session_id)
                 st.rerun()
             
             if st.button("📚 Update Knowledge Base"):
                 self.show_knowledge_update()
             
+            if st.button("🔄 Reload Models"):
+                invalidate_shared_models()
+                st.rerun()
+            
+            # Voice latency, from the end of a spoken question to the answer being heard
+            if st.session_state.is_audio_mode:
+                st.markdown("### ⏱️ Voice Latency")
+                summary = VOICE_LATENCY.summary()
+                if summary:
+                    st.table({
+                        "segment": list(summary),
+                        "count": [s["count"] for s in summary.values()],
+                        "p50 (ms)": [round(s["p50"] * 1000) for s in summary.values()],
+                        "p95 (ms)": [round(s["p95"] * 1000) for s in summary.values()],
+                        "p99 (ms)": [round(s["p99"] * 1000) for s in summary.values()],
+                    })
+                else:
+                    st.caption("No voice turns recorded yet")
+            
             # Model info
             st.markdown("### ℹ️ Model Information")
             st.info("""
@@ -237,8 +292,14 @@ class ChatbotGUI:
                         st.session_state.is_audio_mode = False
                         st.rerun()
     
-    def process_text_input(self, user_input: str):
-        """Process text input and generate response"""
+    def process_text_input(self, user_input: str, turn: VoiceTurn = None):
+        """
+        Process text input and generate response
+        
+        Args:
+            user_input: Question typed or transcribed
+            turn: Voice latency turn when the question was spoken
+        """
         if not self.chatbot:
             st.error("❌ Chatbot not initialized!")
             return
@@ -253,7 +314,14 @@ class ChatbotGUI:
         # Generate response
         with st.spinner("🤖 Thinking..."):
             try:
-                response = self.chatbot.generate_response(user_input)
+                result = self.chatbot.generate_response(user_input, session_id=st.session_state.session_id,
+                                                        return_metadata=True)
+                response = result["response"]
+                if turn:
+                    if result["retrieved_at"]:
+                        turn.mark("retrieval", result["retrieved_at"])
+                    # Not streamed: the first token arrives with the whole response
+                    turn.mark("first_token")
                 
                 # Add bot response to history
                 st.session_state.chat_history.append({
@@ -262,9 +330,19 @@ class ChatbotGUI:
                     "timestamp": datetime.now()
                 })
                 
+                # The model keeps its own bounded memory; only recent messages are displayed
+                del st.session_state.chat_history[:-MAX_DISPLAY_MESSAGES]
+                
                 # Speak response if in audio mode
+                done = None
                 if st.session_state.is_audio_mode and self.audio_processor:
-                    self.audio_processor.text_to_speech(response, block=False)
+                    done = self.audio_processor.text_to_speech(response, block=False, turn=turn)
+                if turn:
+                    # Recorded once playback has finished
+                    if done:
+                        done.add_done_callback(lambda _: turn.finish())
+                    else:
+                        turn.finish()
                 
                 st.rerun()
                 
@@ -278,11 +356,12 @@ class ChatbotGUI:
             return
         
         with st.spinner("🎤 Listening..."):
-            text = self.audio_processor.speech_to_text(timeout=10)
+            turn = VOICE_LATENCY.start_turn()
+            text = self.audio_processor.speech_to_text(timeout=10, turn=turn)
             
             if text:
                 st.session_state.user_input = text
-                self.process_text_input(text)
+                self.process_text_input(text, turn)
             else:
                 st.warning("⚠️ No speech detected or could not understand audio")
     
@@ -0,0 +1,307 @@
+import time
+import queue
+import threading
+import numpy as np
+from collections import namedtuple
+from typing import Iterator, List, Optional
+
+SAMPLE_RATE = 16000
+
+# kind is "start" (pcm holds the pre-roll), "audio" or "end"
+VADEvent = namedtuple("VADEvent", ["kind", "pcm", "timestamp"])
+
+
+class RingBuffer:
+    def __init__(self, capacity: int):
+        """
+        Fixed-size circular buffer of int16 samples
+
+        Args:
+            capacity: Samples kept; older audio is overwritten
+        """
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.int16)
+        self._lock = threading.Lock()
+        self.total_written = 0
+
+    def write(self, samples: np.ndarray):
+        samples = samples[-self.capacity:]
+        with self._lock:
+            start = self.total_written % self.capacity
+            first = min(len(samples), self.capacity - start)
+            self._data[start:start + first] = samples[:first]
+            self._data[:len(samples) - first] = samples[first:]
+            self.total_written += len(samples)
+
+    def latest(self, count: int) -> np.ndarray:
+        """Return the most recent count samples (fewer if not yet written)"""
+        with self._lock:
+            count = min(count, self.capacity, self.total_written)
+            end = self.total_written % self.capacity
+            if count <= end:
+                return self._data[end - count:end].copy()
+            return np.concatenate((self._data[self.capacity - (count - end):], self._data[:end]))
+
+
+class VoiceActivityDetector:
+    def __init__(self, sample_rate: int = SAMPLE_RATE, frame_ms: int = 30,
+                 threshold_ratio: float = 3.0, min_rms: float = 200.0,
+                 start_ms: int = 90, end_silence_ms: int = 600,
+                 preroll_ms: int = 300, max_utterance_seconds: float = 15.0,
+                 buffer_seconds: float = 30.0):
+        """
+        Energy-based voice activity detector with an adaptive noise floor
+
+        Frames louder than threshold_ratio times the running noise floor
+        count as speech. The floor tracks background level continuously
+        (quickly downwards, slowly upwards), so no calibration pause is
+        needed before each utterance. Utterances start after start_ms of
+        speech, include preroll_ms of audio before that from the ring
+        buffer, and end after end_silence_ms of silence.
+
+        Args:
+            sample_rate: Samples per second of the audio fed in
+            frame_ms: Analysis frame length
+            threshold_ratio: Speech/noise energy ratio that counts as speech
+            min_rms: Absolute RMS below which a frame is never speech
+            start_ms: Speech needed to open an utterance
+            end_silence_ms: Silence needed to close an utterance
+            preroll_ms: Audio before the detected start included in the utterance
+            max_utterance_seconds: Utterances are cut at this length
+            buffer_seconds: Length of the ring buffer
+        """
+        self.sample_rate = sample_rate
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.threshold_ratio = threshold_ratio
+        self.min_rms = min_rms
+        self.start_frames = max(1, start_ms // frame_ms)
+        self.end_frames = max(1, end_silence_ms // frame_ms)
+        self.preroll_samples = sample_rate * preroll_ms // 1000
+        self.max_utterance_samples = int(sample_rate * max_utterance_seconds)
+        self.ring = RingBuffer(int(sample_rate * buffer_seconds))
+        self.noise_floor = None
+        self.in_speech = False
+        self._pending = np.zeros(0, dtype=np.int16)
+        self._speech_run = 0
+        self._silence_run = 0
+        self._utterance_samples = 0
+
+    def _update_noise_floor(self, rms: float, is_speech: bool):
+        if self.noise_floor is None:
+            self.noise_floor = rms
+        elif rms < self.noise_floor:
+            self.noise_floor += 0.5 * (rms - self.noise_floor)
+        else:
+            # Creep up slowly, even during speech, so a louder room is eventually learned
+            self.noise_floor += (0.001 if is_speech else 0.05) * (rms - self.noise_floor)
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        rms = float(np.sqrt(np.mean(frame.astype(np.float32) ** 2)))
+        speech = self.noise_floor is not None and rms > max(self.noise_floor * self.threshold_ratio, self.min_rms)
+        self._update_noise_floor(rms, speech)
+        return speech
+
+    def process(self, samples: np.ndarray) -> List[VADEvent]:
+        """Feed int16 samples of any length and return the events they produced"""
+        events = []
+        pending = np.concatenate((self._pending, samples)) if len(self._pending) else samples
+        now = time.time()
+        usable = len(pending) - len(pending) % self.frame_samples
+
+        for offset in range(0, usable, self.frame_samples):
+            frame = pending[offset:offset + self.frame_samples]
+            self.ring.write(frame)
+            speech = self.is_speech(frame)
+
+            if not self.in_speech:
+                self._speech_run = self._speech_run + 1 if speech else 0
+                if self._speech_run >= self.start_frames:
+                    preroll = self.ring.latest(self.preroll_samples + self._speech_run * self.frame_samples)
+                    events.append(VADEvent("start", preroll.tobytes(), now))
+                    self.in_speech = True
+                    self._silence_run = 0
+                    self._utterance_samples = len(preroll)
+                continue
+
+            events.append(VADEvent("audio", frame.tobytes(), now))
+            self._utterance_samples += len(frame)
+            self._silence_run = 0 if speech else self._silence_run + 1
+            if self._silence_run >= self.end_frames or self._utterance_samples >= self.max_utterance_samples:
+                events.append(VADEvent("end", b"", now))
+                self.in_speech = False
+                self._speech_run = 0
+
+        self._pending = pending[usable:]
+        return events
+
+
+class MicrophoneStream:
+    def __init__(self, sample_rate: int = SAMPLE_RATE, block_ms: int = 30,
+                 device=None, max_pending_blocks: int = 500, **vad_options):
+        """
+        Long-lived microphone capture segmented into utterances
+
+        One sounddevice input stream stays open for the life of the object.
+        Its callback only copies audio into a queue; a separate thread runs
+        the VAD and publishes events to every subscriber, so audio keeps
+        being captured while subscribers are busy transcribing.
+
+        Args:
+            sample_rate: Capture rate (recognizers expect 16 kHz)
+            block_ms: Audio delivered per callback
+            device: sounddevice input device (default device if None)
+            max_pending_blocks: Captured blocks buffered for the VAD thread before dropping
+            vad_options: Passed to VoiceActivityDetector
+        """
+        self.sample_rate = sample_rate
+        self.block_samples = sample_rate * block_ms // 1000
+        self.device = device
+        self.vad = VoiceActivityDetector(sample_rate=sample_rate, **vad_options)
+        self.overflows = 0
+        self._blocks = queue.Queue(maxsize=max_pending_blocks)
+        self._subscribers = []
+        self._subscribers_lock = threading.Lock()
+        self._stream = None
+        self._thread = None
+        self._running = False
+
+    @property
+    def noise_floor(self) -> Optional[float]:
+        return self.vad.noise_floor
+
+    def start(self):
+        """Open the input stream and start segmenting"""
+        if self._running:
+            return
+        import sounddevice as sd
+
+        self._running = True
+        self._thread = threading.Thread(target=self._segment_loop, name="vad", daemon=True)
+        self._thread.start()
+        self._stream = sd.InputStream(samplerate=self.sample_rate, channels=1, dtype='int16',
+                                      blocksize=self.block_samples, device=self.device,
+                                      callback=self._on_audio)
+        self._stream.start()
+        print("🎙️ Microphone stream started")
+
+    def stop(self):
+        """Close the input stream"""
+        if not self._running:
+            return
+        self._running = False
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+        self._blocks.put(None)
+        self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def _on_audio(self, indata, frames, time_info, status):
+        # Runs on the audio thread: copy and hand off, nothing else
+        try:
+            self._blocks.put_nowait(indata[:, 0].copy())
+        except queue.Full:
+            self.overflows += 1
+
+    def feed(self, samples: np.ndarray):
+        """Push int16 samples as if they had been captured (for tests and file input)"""
+        self._blocks.put(samples)
+
+    def _segment_loop(self):
+        while True:
+            samples = self._blocks.get()
+            if samples is None:
+                return
+            for event in self.vad.process(samples):
+                with self._subscribers_lock:
+                    subscribers = list(self._subscribers)
+                for subscriber in subscribers:
+                    subscriber.put(event)
+
+    def subscribe(self) -> queue.Queue:
+        """Receive every VAD event from now on in the returned queue"""
+        subscriber = queue.Queue()
+        with self._subscribers_lock:
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue):
+        with self._subscribers_lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def listen(self, timeout: float = None, max_seconds: float = None) -> Iterator[bytes]:
+        """
+        Yield the PCM of the next utterance as it is captured
+
+        The first chunk is the pre-roll; the generator ends when the VAD
+        closes the utterance or after max_seconds.
+
+        Raises:
+            TimeoutError: If no speech starts within timeout seconds
+        """
+        subscriber = self.subscribe()
+        try:
+            deadline = time.monotonic() + timeout if timeout else None
+            while True:
+                remaining = deadline - time.monotonic() if deadline else None
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("No speech detected")
+                try:
+                    event = subscriber.get(timeout=remaining)
+                except queue.Empty:
+                    raise TimeoutError("No speech detected")
+                if event.kind == "start":
+                    break
+
+            yield event.pcm
+            yield from self.follow(subscriber, max_seconds)
+        finally:
+            self.unsubscribe(subscriber)
+
+    def follow(self, subscriber: queue.Queue, max_seconds: float = None) -> Iterator[bytes]:
+        """
+        Yield the rest of an utterance that has already started on subscriber
+
+        Ends when the VAD closes the utterance or after max_seconds, and
+        unsubscribes when done.
+        """
+        started = time.monotonic()
+        try:
+            while True:
+                event = subscriber.get()
+                if event.kind != "audio":
+                    return
+                yield event.pcm
+                if max_seconds and time.monotonic() - started >= max_seconds:
+                    return
+        finally:
+            self.unsubscribe(subscriber)
+
+    def utterances(self, stop_event: threading.Event = None) -> Iterator[bytes]:
+        """Yield each complete utterance, without gaps between them, until stop_event is set"""
+        subscriber = self.subscribe()
+        chunks = None
+        try:
+            while not (stop_event and stop_event.is_set()):
+                try:
+                    event = subscriber.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if event.kind == "start":
+                    chunks = [event.pcm]
+                elif event.kind == "audio" and chunks is not None:
+                    chunks.append(event.pcm)
+                elif event.kind == "end" and chunks is not None:
+                    yield b"".join(chunks)
+                    chunks = None
+        finally:
+            self.unsubscribe(subscriber)
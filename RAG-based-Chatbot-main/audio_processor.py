@@ -1,21 +1,34 @@
 import speech_recognition as sr
-import pyttsx3
 import sounddevice as sd
 import numpy as np
 import threading
-import queue
 import time
-from typing import Optional, Callable
+from typing import Optional, Callable, Iterator
 import os
+from metrics import METRICS
+from tts_engine import TTSEngine
+from stt_backends import load_stt_backend, SAMPLE_RATE
+from audio_capture import MicrophoneStream
+from listening_pipeline import ListeningPipeline
+from voice_latency import VoiceTurn
 
 class AudioProcessor:
-    def __init__(self):
-        """Initialize audio processor with speech recognition and text-to-speech"""
-        self.recognizer = sr.Recognizer()
-        self.engine = pyttsx3.init()
-        self.audio_queue = queue.Queue()
+    def __init__(self, stt_backend: str = None, stt_options: dict = None):
+        """
+        Initialize audio processor with speech recognition and text-to-speech
+        
+        Args:
+            stt_backend: Speech-to-text backend, "google" (online) or "vosk" (offline);
+                defaults to the RAG_STT_BACKEND environment variable, then "google"
+            stt_options: Extra backend arguments, e.g. {"model_path": ...} for vosk
+        """
+        self.stt = load_stt_backend(stt_backend or os.environ.get("RAG_STT_BACKEND", "google"),
+                                    **(stt_options or {}))
+        self.tts = TTSEngine()
+        self.capture = None
+        self._capture_lock = threading.Lock()
+        self.listening = None
         self.is_listening = False
-        self.is_speaking = False
         
         # Configure text-to-speech engine
         self._configure_tts()
@@ -24,57 +37,63 @@ class AudioProcessor:
         """Configure text-to-speech settings"""
         try:
             # Get available voices
-            voices = self.engine.getProperty('voices')
+            voices = self.tts.get_property('voices')
             
             # Set voice (use first available voice)
             if voices:
-                self.engine.setProperty('voice', voices[0].id)
+                self.tts.set_property('voice', voices[0].id)
             
             # Set speech rate (words per minute)
-            self.engine.setProperty('rate', 150)
+            self.tts.set_property('rate', 150)
             
             # Set volume (0.0 to 1.0)
-            self.engine.setProperty('volume', 0.9)
+            self.tts.set_property('volume', 0.9)
             
             print("✅ Audio processor configured successfully")
             
         except Exception as e:
             print(f"❌ Failed to configure audio processor: {e}")
     
-    def speech_to_text(self, timeout: int = 5, phrase_time_limit: int = 10) -> Optional[str]:
+    def speech_to_text(self, timeout: int = 5, phrase_time_limit: int = 10,
+                       on_partial: Callable[[str], None] = None,
+                       utterance: Iterator[bytes] = None, turn: VoiceTurn = None) -> Optional[str]:
         """
         Convert speech to text using microphone input
         
         Args:
             timeout: Timeout for listening (seconds)
             phrase_time_limit: Maximum time for a single phrase (seconds)
+            on_partial: Called with the transcript so far while the user is
+                still speaking (streaming backends only)
+            utterance: Audio of an utterance already under way, e.g.
+                BargeInMonitor.utterance(); otherwise waits for the next one
+            turn: Voice latency turn that gets the end-of-speech and transcript times
             
         Returns:
             Transcribed text or None if failed
         """
         try:
-            with sr.Microphone() as source:
+            if utterance is None:
                 print("🎤 Listening... (speak now)")
+                utterance = self.get_capture().listen(timeout, phrase_time_limit)
+            if turn:
+                utterance = self._mark_speech_end(utterance, turn)
+            if self.stt.streaming:
+                text = self._stream_speech_to_text(utterance, on_partial)
+            else:
+                text = self._listen_and_transcribe(utterance)
+            if turn:
+                turn.mark("transcript")
+            
+            if not text:
+                print("❓ Could not understand the audio")
+                return None
+            print(f"✅ Transcribed: {text}")
+            return text
                 
-                # Adjust for ambient noise
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                
-                # Listen for audio input
-                audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
-                
-                print("🔄 Processing speech...")
-                
-                # Convert speech to text
-                text = self.recognizer.recognize_google(audio)
-                print(f"✅ Transcribed: {text}")
-                return text
-                
-        except sr.WaitTimeoutError:
+        except TimeoutError:
             print("⏰ No speech detected within timeout")
             return None
-        except sr.UnknownValueError:
-            print("❓ Could not understand the audio")
-            return None
         except sr.RequestError as e:
             print(f"❌ Speech recognition service error: {e}")
             return None
@@ -82,75 +101,110 @@ class AudioProcessor:
             print(f"❌ Speech recognition error: {e}")
             return None
     
-    def text_to_speech(self, text: str, block: bool = True):
+    def get_capture(self) -> MicrophoneStream:
+        """Open the shared microphone stream on first use; it stays open afterwards"""
+        with self._capture_lock:
+            if self.capture is None:
+                capture = MicrophoneStream(sample_rate=SAMPLE_RATE)
+                capture.start()
+                self.capture = capture
+            return self.capture
+    
+    def stop_capture(self):
+        """Close the microphone stream"""
+        with self._capture_lock:
+            if self.capture is not None:
+                self.capture.stop()
+                self.capture = None
+    
+    @staticmethod
+    def _mark_speech_end(utterance: Iterator[bytes], turn: VoiceTurn) -> Iterator[bytes]:
+        """Pass audio through and mark the turn when the VAD (or the time limit) ends the utterance"""
+        yield from utterance
+        turn.mark("speech_end")
+    
+    def _listen_and_transcribe(self, utterance: Iterator[bytes]) -> str:
+        """Collect the whole utterance, then transcribe it"""
+        pcm = b"".join(utterance)
+        
+        print("🔄 Processing speech...")
+        with METRICS.timer("stt"):
+            return self.stt.transcribe(pcm, SAMPLE_RATE)
+    
+    def _stream_speech_to_text(self, utterance: Iterator[bytes],
+                               on_partial: Callable[[str], None] = None) -> str:
+        """Feed the utterance to the recognizer while it is being spoken"""
+        session = self.stt.start_session(SAMPLE_RATE)
+        for pcm in utterance:
+            result = session.accept(pcm)
+            if result and on_partial:
+                on_partial(result.text)
+        with METRICS.timer("stt"):
+            return session.finish()
+    
+    def text_to_speech(self, text: str, block: bool = True, announce: bool = True, turn: VoiceTurn = None):
         """
         Convert text to speech and play it
         
         Args:
             text: Text to convert to speech
             block: Whether to block until speech is complete
+            announce: Whether to print the text being spoken
+            turn: Voice latency turn that gets the first-audio and playback-done times
+            
+        Returns:
+            Future that completes when playback ends, or None if nothing was queued
         """
         try:
             if not text.strip():
-                return
+                return None
             
-            print(f"🔊 Speaking: {text[:50]}...")
+            if announce:
+                print(f"🔊 Speaking: {text[:50]}...")
             
+            # Queued on the engine thread; overlapping calls are spoken in order
+            done = self.tts.speak(text, turn)
             if block:
-                self.engine.say(text)
-                self.engine.runAndWait()
-            else:
-                # Run in separate thread to avoid blocking
-                def speak():
-                    self.is_speaking = True
-                    self.engine.say(text)
-                    self.engine.runAndWait()
-                    self.is_speaking = False
-                
-                thread = threading.Thread(target=speak)
-                thread.daemon = True
-                thread.start()
+                done.result()
+            return done
                 
         except Exception as e:
             print(f"❌ Text-to-speech error: {e}")
+            return None
     
     def start_continuous_listening(self, callback: Callable[[str], None], 
-                                 stop_event: threading.Event = None):
+                                 stop_event: threading.Event = None,
+                                 workers: int = 2, max_pending: int = 4):
         """
         Start continuous listening for speech input
         
         Args:
             callback: Function to call with transcribed text
             stop_event: Event to signal stopping
+            workers: Utterances transcribed in parallel
+            max_pending: Utterances queued for recognition before capture waits
         """
-        if stop_event is None:
-            stop_event = threading.Event()
-        
+        self.stop_continuous_listening()
+        self.listening = ListeningPipeline(self.get_capture(), self.stt, callback, workers=workers,
+                                           max_pending=max_pending, stop_event=stop_event)
         self.is_listening = True
-        
-        def listen_loop():
-            while not stop_event.is_set() and self.is_listening:
-                try:
-                    text = self.speech_to_text(timeout=3, phrase_time_limit=5)
-                    if text:
-                        callback(text)
-                except Exception as e:
-                    print(f"❌ Continuous listening error: {e}")
-                    time.sleep(0.1)
-        
-        thread = threading.Thread(target=listen_loop)
-        thread.daemon = True
-        thread.start()
-        
-        return stop_event
+        return self.listening.start()
     
     def stop_continuous_listening(self):
         """Stop continuous listening"""
         self.is_listening = False
+        if self.listening is not None:
+            self.listening.stop(timeout=1.0)
+            self.listening = None
+    
+    def stop_speaking(self):
+        """Cut off the current speech and drop anything queued to be spoken"""
+        if not self.tts.interrupt():
+            print("⚠️ Still finishing the current sentence; queued speech was dropped")
     
     def is_speaking_now(self) -> bool:
         """Check if currently speaking"""
-        return self.is_speaking
+        return self.tts.is_speaking
     
     def is_listening_now(self) -> bool:
         """Check if currently listening"""
@@ -159,10 +213,10 @@ class AudioProcessor:
     def change_voice(self, voice_id: str):
         """Change the voice for text-to-speech"""
         try:
-            voices = self.engine.getProperty('voices')
+            voices = self.tts.get_property('voices')
             for voice in voices:
                 if voice_id in voice.id:
-                    self.engine.setProperty('voice', voice.id)
+                    self.tts.set_property('voice', voice.id)
                     print(f"✅ Voice changed to: {voice.name}")
                     return
             print(f"❌ Voice {voice_id} not found")
@@ -172,7 +226,7 @@ class AudioProcessor:
     def change_speech_rate(self, rate: int):
         """Change speech rate (words per minute)"""
         try:
-            self.engine.setProperty('rate', rate)
+            self.tts.set_property('rate', rate)
             print(f"✅ Speech rate changed to: {rate} WPM")
         except Exception as e:
             print(f"❌ Failed to change speech rate: {e}")
@@ -181,7 +235,7 @@ class AudioProcessor:
         """Change volume (0.0 to 1.0)"""
         try:
             volume = max(0.0, min(1.0, volume))
-            self.engine.setProperty('volume', volume)
+            self.tts.set_property('volume', volume)
             print(f"✅ Volume changed to: {volume}")
         except Exception as e:
             print(f"❌ Failed to change volume: {e}")
@@ -1,14 +1,14 @@
-import pyttsx3
 import threading
 import time
 from typing import Optional, Callable
 import os
+from tts_engine import TTSEngine
+from voice_latency import VoiceTurn
 
 class SimpleAudioProcessor:
     def __init__(self):
         """Initialize simplified audio processor with text-to-speech only"""
-        self.engine = pyttsx3.init()
-        self.is_speaking = False
+        self.tts = TTSEngine()
         
         # Configure text-to-speech engine
         self._configure_tts()
@@ -17,24 +17,25 @@ class SimpleAudioProcessor:
         """Configure text-to-speech settings"""
         try:
             # Get available voices
-            voices = self.engine.getProperty('voices')
+            voices = self.tts.get_property('voices')
             
             # Set voice (use first available voice)
             if voices:
-                self.engine.setProperty('voice', voices[0].id)
+                self.tts.set_property('voice', voices[0].id)
             
             # Set speech rate (words per minute)
-            self.engine.setProperty('rate', 150)
+            self.tts.set_property('rate', 150)
             
             # Set volume (0.0 to 1.0)
-            self.engine.setProperty('volume', 0.9)
+            self.tts.set_property('volume', 0.9)
             
             print("✅ Simple audio processor configured successfully")
             
         except Exception as e:
             print(f"❌ Failed to configure audio processor: {e}")
     
-    def speech_to_text(self, timeout: int = 5, phrase_time_limit: int = 10) -> Optional[str]:
+    def speech_to_text(self, timeout: int = 5, phrase_time_limit: int = 10,
+                       turn: VoiceTurn = None) -> Optional[str]:
         """
         Placeholder for speech-to-text (requires PyAudio)
         Returns None to indicate speech recognition is not available
@@ -43,37 +44,35 @@ class SimpleAudioProcessor:
         print("💡 You can still use text input and get audio responses.")
         return None
     
-    def text_to_speech(self, text: str, block: bool = True):
+    def text_to_speech(self, text: str, block: bool = True, announce: bool = True, turn: VoiceTurn = None):
         """
         Convert text to speech and play it
         
         Args:
             text: Text to convert to speech
             block: Whether to block until speech is complete
+            announce: Whether to print the text being spoken
+            turn: Voice latency turn that gets the first-audio and playback-done times
+            
+        Returns:
+            Future that completes when playback ends, or None if nothing was queued
         """
         try:
             if not text.strip():
-                return
+                return None
             
-            print(f"🔊 Speaking: {text[:50]}...")
+            if announce:
+                print(f"🔊 Speaking: {text[:50]}...")
             
+            # Queued on the engine thread; overlapping calls are spoken in order
+            done = self.tts.speak(text, turn)
             if block:
-                self.engine.say(text)
-                self.engine.runAndWait()
-            else:
-                # Run in separate thread to avoid blocking
-                def speak():
-                    self.is_speaking = True
-                    self.engine.say(text)
-                    self.engine.runAndWait()
-                    self.is_speaking = False
-                
-                thread = threading.Thread(target=speak)
-                thread.daemon = True
-                thread.start()
+                done.result()
+            return done
                 
         except Exception as e:
             print(f"❌ Text-to-speech error: {e}")
+            return None
     
     def start_continuous_listening(self, callback: Callable[[str], None], 
                                  stop_event: threading.Event = None):
@@ -87,9 +86,14 @@ class SimpleAudioProcessor:
         """Stop continuous listening"""
         pass
     
+    def stop_speaking(self):
+        """Cut off the current speech and drop anything queued to be spoken"""
+        if not self.tts.interrupt():
+            print("⚠️ Still finishing the current sentence; queued speech was dropped")
+    
     def is_speaking_now(self) -> bool:
         """Check if currently speaking"""
-        return self.is_speaking
+        return self.tts.is_speaking
     
     def is_listening_now(self) -> bool:
         """Check if currently listening (always False for simple version)"""
@@ -98,10 +102,10 @@ class SimpleAudioProcessor:
     def change_voice(self, voice_id: str):
         """Change the voice for text-to-speech"""
         try:
-            voices = self.engine.getProperty('voices')
+            voices = self.tts.get_property('voices')
             for voice in voices:
                 if voice_id in voice.id:
-                    self.engine.setProperty('voice', voice.id)
+                    self.tts.set_property('voice', voice.id)
                     print(f"✅ Voice changed to: {voice.name}")
                     return
             print(f"❌ Voice {voice_id} not found")
@@ -111,7 +115,7 @@ class SimpleAudioProcessor:
     def change_speech_rate(self, rate: int):
         """Change speech rate (words per minute)"""
         try:
-            self.engine.setProperty('rate', rate)
+            self.tts.set_property('rate', rate)
             print(f"✅ Speech rate changed to: {rate} WPM")
         except Exception as e:
             print(f"❌ Failed to change speech rate: {e}")
@@ -120,7 +124,7 @@ class SimpleAudioProcessor:
         """Change volume (0.0 to 1.0)"""
         try:
             volume = max(0.0, min(1.0, volume))
-            self.engine.setProperty('volume', volume)
+            self.tts.set_property('volume', volume)
             print(f"✅ Volume changed to: {volume}")
         except Exception as e:
             print(f"❌ Failed to change volume: {e}")
@@ -0,0 +1,189 @@
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List
+from stt_backends import STT_BACKENDS, load_stt_backend, load_wav, SAMPLE_RATE
+
+# Speech-to-text backend of each pool process, loaded once by _init_worker
+_worker_backend = None
+
+
+def _init_worker(backend: str, options: Dict[str, Any]):
+    global _worker_backend
+    _worker_backend = load_stt_backend(backend, **options)
+
+
+def _transcribe_file(path: str) -> Dict[str, Any]:
+    """Decode and transcribe one file in a pool process"""
+    record = {"file": path, "audio_seconds": None, "transcript": None, "response": None,
+              "error": None, "timings": {}}
+    try:
+        start = time.perf_counter()
+        pcm, record["audio_seconds"] = load_wav(path)
+        decoded = time.perf_counter()
+        # Recorded first, so a failed transcription still shows the decode time
+        record["timings"]["decode"] = decoded - start
+        record["transcript"] = _worker_backend.transcribe(pcm, SAMPLE_RATE)
+        record["timings"]["stt"] = time.perf_counter() - decoded
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    return record
+
+
+def find_audio_files(directory: str) -> List[str]:
+    """WAV files under directory, recursively, in a stable order"""
+    paths = []
+    for root, _, names in os.walk(directory):
+        paths.extend(os.path.join(root, name) for name in names if name.lower().endswith('.wav'))
+    return sorted(paths)
+
+
+class BatchAudioProcessor:
+    def __init__(self, chatbot=None, stt_backend: str = "google", stt_options: Dict[str, Any] = None,
+                 workers: int = None, batch_size: int = 16, max_concurrency: int = 4):
+        """
+        Transcribe and answer a directory of recorded questions
+
+        Files are decoded and transcribed in a pool of processes, so speech
+        recognition scales with cores. Finished transcripts are collected
+        into batches and answered with Llama4RAGChatbot.generate_responses
+        (one encoder and index call per batch) while the pool keeps
+        transcribing. Results are appended to a JSONL file as they complete.
+
+        Args:
+            chatbot: Llama4RAGChatbot used for answers (None only transcribes)
+            stt_backend: One of STT_BACKENDS, loaded once in every worker process
+            stt_options: Extra backend arguments, e.g. {"model_path": ...} for vosk
+            workers: Transcription processes (defaults to the number of cores)
+            batch_size: Transcripts answered per retrieval batch
+            max_concurrency: Generation requests in flight at once
+        """
+        self.chatbot = chatbot
+        self.stt_backend = stt_backend
+        self.stt_options = stt_options or {}
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+
+    def _answer(self, records: List[Dict[str, Any]]):
+        """Fill in responses for transcribed records, in place"""
+        answerable = [r for r in records if r["transcript"]]
+        if self.chatbot is None or not answerable:
+            return
+        results = self.chatbot.generate_responses([r["transcript"] for r in answerable], self.max_concurrency)
+        for record, result in zip(answerable, results):
+            record["response"] = result["response"]
+            record["snapshot_version"] = result["snapshot_version"]
+            record["timings"]["retrieve"] = result["retrieve_seconds"]
+            record["timings"]["generate"] = result["generate_seconds"]
+
+    def run(self, directory: str, output_path: str) -> Dict[str, Any]:
+        """
+        Process every WAV file under directory and write one JSON line per file
+
+        Returns:
+            Summary with file counts, audio duration, wall time and throughput
+        """
+        paths = find_audio_files(directory)
+        print(f"🎧 Found {len(paths)} audio files in {directory}")
+        if not paths:
+            return {"files": 0}
+
+        summary = {"files": len(paths), "errors": 0, "audio_seconds": 0.0, "stt_seconds": 0.0}
+        start = time.perf_counter()
+        pending = []
+
+        def flush(out):
+            self._answer(pending)
+            for record in pending:
+                record["file"] = os.path.relpath(record["file"], directory)
+                record["timings"]["total"] = sum(record["timings"].values())
+                record["finished_at"] = time.perf_counter() - start
+                out.write(json.dumps(record) + "\n")
+            out.flush()
+            pending.clear()
+
+        # spawn keeps workers from inheriting the parent's loaded models and threads
+        context = multiprocessing.get_context("spawn")
+        with open(output_path, 'w', encoding='utf-8') as out, \
+                ProcessPoolExecutor(self.workers, mp_context=context, initializer=_init_worker,
+                                    initargs=(self.stt_backend, self.stt_options)) as pool:
+            futures = [pool.submit(_transcribe_file, path) for path in paths]
+            for done, future in enumerate(as_completed(futures), 1):
+                record = future.result()
+                if record["error"]:
+                    summary["errors"] += 1
+                    print(f"❌ {os.path.relpath(record['file'], directory)}: {record['error']}")
+                else:
+                    summary["audio_seconds"] += record["audio_seconds"]
+                    summary["stt_seconds"] += record["timings"]["stt"]
+                pending.append(record)
+                if len(pending) >= self.batch_size:
+                    flush(out)
+                    print(f"📝 {done}/{len(paths)} files done")
+            flush(out)
+
+        summary["wall_seconds"] = time.perf_counter() - start
+        summary["files_per_second"] = len(paths) / summary["wall_seconds"]
+        summary["audio_seconds_per_second"] = summary["audio_seconds"] / summary["wall_seconds"]
+        return summary
+
+
+def run_batch(directory: str, output_path: str = "batch_results.jsonl", stt_backend: str = None,
+              stt_options: Dict[str, Any] = None, workers: int = None, batch_size: int = 16,
+              max_concurrency: int = 4, transcribe_only: bool = False):
+    """Transcribe (and answer) every recording in directory"""
+    chatbot = None
+    if not transcribe_only:
+        from model_llama4 import Llama4RAGChatbot
+        chatbot = Llama4RAGChatbot()
+
+    processor = BatchAudioProcessor(chatbot, stt_backend or os.environ.get("RAG_STT_BACKEND", "google"),
+                                    stt_options, workers, batch_size, max_concurrency)
+    print(f"🚀 Batch processing with {processor.workers} transcription workers")
+    try:
+        summary = processor.run(directory, output_path)
+    except BrokenProcessPool as e:
+        # Raised when the speech-to-text backend cannot be loaded in the workers
+        print(f"❌ Transcription workers failed to start: {e}")
+        return None
+    if not summary["files"]:
+        return summary
+
+    print(f"\n✅ {summary['files'] - summary['errors']}/{summary['files']} files processed "
+          f"in {summary['wall_seconds']:.1f}s ({summary['files_per_second']:.2f} files/s, "
+          f"{summary['audio_seconds_per_second']:.1f}x real time)")
+    if summary["stt_seconds"]:
+        print(f"🗣️ Speech-to-text: {summary['stt_seconds']:.1f}s across workers "
+              f"({summary['audio_seconds'] / summary['stt_seconds']:.1f}x real time per worker)")
+    print(f"💾 Results written to {output_path}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Transcribe and answer a directory of recorded questions')
+    parser.add_argument('directory', help='Directory of WAV files (searched recursively)')
+    parser.add_argument('--output', default='batch_results.jsonl', help='JSONL file to write')
+    parser.add_argument('--backend', choices=STT_BACKENDS, help='Speech-to-text backend (default: RAG_STT_BACKEND or google)')
+    parser.add_argument('--model-path', help='Model directory for the vosk backend')
+    parser.add_argument('--workers', type=int, help='Transcription processes (default: number of cores)')
+    parser.add_argument('--batch-size', type=int, default=16, help='Transcripts answered per retrieval batch')
+    parser.add_argument('--concurrency', type=int, default=4, help='Generation requests in flight at once')
+    parser.add_argument('--transcribe-only', action='store_true', help='Skip retrieval and generation')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.directory):
+        print(f"❌ Directory not found: {args.directory}")
+        sys.exit(1)
+    run_batch(args.directory, args.output, args.backend,
+              {'model_path': args.model_path} if args.model_path else None,
+              args.workers, args.batch_size, args.concurrency, args.transcribe_only)
+
+
+if __name__ == "__main__":
+    main()
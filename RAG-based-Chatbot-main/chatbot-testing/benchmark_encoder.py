@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Encoder Backend Benchmark
+Compares the PyTorch, ONNX and int8 ONNX sentence encoders on
+single-query throughput, bulk ingest throughput and embedding parity.
+"""
+
+import os
+import sys
+import time
+import argparse
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from encoder_backends import ENCODER_BACKENDS, load_encoder, check_parity
+from parallel_encoding import EncoderPool
+
+def load_chunks(knowledge_file):
+    """Load knowledge base paragraphs as ingest chunks"""
+    with open(knowledge_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+    return [p.strip() for p in content.split('\n\n') if p.strip()]
+
+def benchmark_queries(encoder, queries, rounds):
+    """Encode queries one at a time, as the chatbot does per request"""
+    encoder.encode([queries[0]])  # warm-up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for query in queries:
+            encoder.encode([query])
+    return rounds * len(queries) / (time.perf_counter() - start)
+
+def benchmark_ingest(encoder, chunks, batch_size):
+    """Encode the whole corpus in batches, as ingestion does"""
+    encoder.encode(chunks[:batch_size], batch_size=batch_size)  # warm-up
+    start = time.perf_counter()
+    encoder.encode(chunks, batch_size=batch_size)
+    return len(chunks) / (time.perf_counter() - start)
+
+def benchmark_ingest_scaling(chunks, backend, worker_counts, threads_per_worker, batch_size):
+    """Measure multi-process ingest throughput for each worker count"""
+    print(f"\n📈 Multi-process ingest scaling ({backend}, {threads_per_worker} thread(s)/worker)")
+    baseline = None
+    for workers in worker_counts:
+        with EncoderPool(backend=backend, num_workers=workers,
+                         threads_per_worker=threads_per_worker, batch_size=batch_size) as pool:
+            # Spawning workers and loading their encoders is timed apart from the encode
+            start = time.perf_counter()
+            pool.warm_up()
+            startup = time.perf_counter() - start
+            start = time.perf_counter()
+            pool.encode(chunks)
+            rate = len(chunks) / (time.perf_counter() - start)
+        baseline = baseline or rate / workers
+        print(f"   {workers:>3} workers: {rate:>10.1f} chunks/s ({rate / (baseline * workers):.0%} of linear), "
+              f"{startup:.1f}s startup")
+
+def main():
+    """Run the encoder benchmark"""
+    parser = argparse.ArgumentParser(description='Encoder backend benchmark')
+    parser.add_argument('--backends', nargs='+', default=list(ENCODER_BACKENDS), choices=ENCODER_BACKENDS)
+    parser.add_argument('--knowledge-file', default=os.path.join(PROJECT_ROOT, 'knowledge.txt'))
+    parser.add_argument('--repeat-corpus', type=int, default=10, help='Repeat the corpus to enlarge it')
+    parser.add_argument('--query-rounds', type=int, default=20)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--ingest-workers', type=int, nargs='+', help='Worker counts for the multi-process scaling run')
+    parser.add_argument('--threads-per-worker', type=int, default=1)
+    args = parser.parse_args()
+
+    chunks = load_chunks(args.knowledge_file) * args.repeat_corpus
+    queries = [
+        "What is artificial intelligence?",
+        "Explain machine learning",
+        "What are neural networks?",
+        "How does natural language processing work?",
+    ]
+
+    print("🚀 Encoder Backend Benchmark")
+    print("=" * 60)
+    print(f"📚 Corpus: {len(chunks)} chunks | 🔍 Queries: {len(queries) * args.query_rounds}")
+
+    reference = load_encoder(backend="torch")
+    results = {}
+
+    for backend in args.backends:
+        print(f"\n⏱️  Benchmarking {backend}...")
+        encoder = reference if backend == "torch" else load_encoder(backend=backend)
+        parity = check_parity(reference, encoder, queries + chunks[:16])
+        results[backend] = {
+            'queries_per_sec': benchmark_queries(encoder, queries, args.query_rounds),
+            'chunks_per_sec': benchmark_ingest(encoder, chunks, args.batch_size),
+            'min_cosine': parity['min_cosine'],
+        }
+
+    baseline = results.get('torch')
+    print("\n📊 Results")
+    print("=" * 60)
+    print(f"{'backend':<12}{'queries/s':>12}{'chunks/s':>12}{'min cos':>10}{'speedup':>10}")
+    for backend, r in results.items():
+        speedup = r['queries_per_sec'] / baseline['queries_per_sec'] if baseline else float('nan')
+        print(f"{backend:<12}{r['queries_per_sec']:>12.1f}{r['chunks_per_sec']:>12.1f}"
+              f"{r['min_cosine']:>10.4f}{speedup:>9.2f}x")
+
+    if args.ingest_workers:
+        benchmark_ingest_scaling(chunks, args.backends[0], args.ingest_workers,
+                                 args.threads_per_worker, args.batch_size)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Startup Time Benchmark
+Measures how long the launcher's dependency check and the chatbot
+modules take to load in a fresh interpreter, and fails if a scenario
+exceeds its time budget or pulls in a heavy library that should only be
+imported on first use. Exits non-zero on a regression so it can gate CI.
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries that must not be loaded just by starting up
+HEAVY_MODULES = ["torch", "sentence_transformers", "transformers", "faiss",
+                 "onnxruntime", "huggingface_hub.inference._client"]
+
+# name: (code run in a fresh interpreter, time budget in seconds)
+SCENARIOS = {
+    "check_dependencies": ("import main; main.check_dependencies()", 0.5),
+    "import model_llama4": ("import model_llama4", 1.0),
+    "import server": ("import server", 1.0),
+    "import cli": ("import cli", 2.0),
+}
+
+CHILD_TEMPLATE = """
+import io, sys, json, time, contextlib
+start = time.perf_counter()
+error = None
+with contextlib.redirect_stdout(io.StringIO()):
+    try:
+{code}
+    except ImportError as e:
+        error = str(e)
+seconds = time.perf_counter() - start
+try:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+except ImportError:
+    peak = None
+print("@@RESULT " + json.dumps({{
+    "seconds": seconds,
+    "peak_rss_mb": peak,
+    "heavy_loaded": [m for m in {heavy!r} if m in sys.modules],
+    "error": error,
+}}))
+"""
+
+def run_scenario(code, extra_args=()):
+    """Run code in a fresh interpreter from the project root and return its measurements"""
+    child = CHILD_TEMPLATE.format(code="        " + code, heavy=HEAVY_MODULES)
+    completed = subprocess.run([sys.executable, *extra_args, "-c", child], cwd=PROJECT_ROOT,
+                               capture_output=True, text=True)
+    for line in completed.stdout.splitlines():
+        if line.startswith("@@RESULT "):
+            return json.loads(line[len("@@RESULT "):]), completed.stderr
+    raise RuntimeError(f"Scenario failed:\n{completed.stderr}")
+
+def slowest_imports(code, limit):
+    """Top cumulative import times reported by python -X importtime"""
+    _, stderr = run_scenario(code, ["-X", "importtime"])
+    rows = []
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            if cumulative.strip().isdigit():
+                rows.append((int(cumulative), name.rstrip()))
+    return sorted(rows, reverse=True)[:limit]
+
+def main():
+    """Run the startup benchmark"""
+    parser = argparse.ArgumentParser(description='Startup time benchmark')
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per scenario (median is reported)')
+    parser.add_argument('--budget-scale', type=float, default=1.0, help='Multiply every time budget, e.g. for slow CI machines')
+    parser.add_argument('--importtime', type=int, default=0, metavar='N', help='Show the N slowest imports of each scenario')
+    parser.add_argument('--output', help='Write the results as JSON')
+    args = parser.parse_args()
+
+    print("🚀 Startup Time Benchmark")
+    print("=" * 60)
+
+    results = {}
+    failures = []
+    for name in args.scenarios:
+        code, budget = SCENARIOS[name]
+        budget *= args.budget_scale
+        runs = [run_scenario(code)[0] for _ in range(args.repeat)]
+        result = {
+            "seconds": statistics.median(r["seconds"] for r in runs),
+            "peak_rss_mb": runs[-1]["peak_rss_mb"],
+            "heavy_loaded": runs[-1]["heavy_loaded"],
+            "error": runs[-1]["error"],
+            "budget_seconds": budget,
+        }
+        results[name] = result
+
+        if result["error"]:
+            print(f"⚠️  {name:<22} skipped: {result['error']}")
+            continue
+
+        problems = []
+        if result["seconds"] > budget:
+            problems.append(f"over budget ({budget:.2f}s)")
+        if result["heavy_loaded"]:
+            problems.append(f"loads {', '.join(result['heavy_loaded'])}")
+        status = "❌" if problems else "✅"
+        rss = f"{result['peak_rss_mb']:.0f} MB" if result['peak_rss_mb'] else "n/a"
+        print(f"{status} {name:<22}{result['seconds'] * 1000:>8.0f} ms {rss:>8}  {'; '.join(problems)}")
+        if problems:
+            failures.append(name)
+
+        for cumulative, module in slowest_imports(code, args.importtime) if args.importtime else []:
+            print(f"      {cumulative / 1000:>8.1f} ms {module}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+    if failures:
+        print(f"\n❌ Startup regression in: {', '.join(failures)}")
+        sys.exit(1)
+    print("\n✅ All startup scenarios within budget")
+
+if __name__ == "__main__":
+    main()
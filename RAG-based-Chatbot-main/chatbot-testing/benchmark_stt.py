@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Speech-to-Text Benchmark
+Runs a speech-to-text backend over WAV files without a microphone and
+reports real-time factor, time to first partial transcript and word
+error rate against reference transcripts.
+
+Each foo.wav in --wav-dir needs its reference transcript in foo.txt,
+or list files in a JSONL --manifest of {"audio": path, "text": reference}.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import stt_backends
+from stt_backends import STT_BACKENDS, SAMPLE_RATE, SAMPLE_WIDTH, load_wav
+
+def normalize_words(text):
+    """Lowercase words without punctuation, for WER scoring"""
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+def word_errors(reference, hypothesis):
+    """Word-level edit distance (substitutions + deletions + insertions)"""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1]
+
+def load_dataset(args):
+    """List of (wav path, reference transcript)"""
+    items = []
+    if args.manifest:
+        base = os.path.dirname(os.path.abspath(args.manifest))
+        with open(args.manifest, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    items.append((os.path.join(base, entry['audio']), entry['text']))
+    else:
+        for name in sorted(os.listdir(args.wav_dir)):
+            if name.lower().endswith('.wav'):
+                transcript = os.path.join(args.wav_dir, os.path.splitext(name)[0] + '.txt')
+                if not os.path.exists(transcript):
+                    print(f"⚠️ Skipping {name}: no reference transcript")
+                    continue
+                with open(transcript, 'r', encoding='utf-8') as f:
+                    items.append((os.path.join(args.wav_dir, name), f.read().strip()))
+    return items
+
+def run_file(backend, path, reference, chunk_ms, realtime):
+    """Stream one file through a recognition session as if it were being captured"""
+    pcm, duration = load_wav(path)
+    block = int(SAMPLE_RATE * chunk_ms / 1000) * SAMPLE_WIDTH
+    session = backend.start_session(SAMPLE_RATE)
+    processing = 0.0
+    first_partial = None
+    wall_start = time.perf_counter()
+
+    for offset in range(0, len(pcm), block):
+        if realtime:
+            # Pace the audio like a live microphone
+            due = wall_start + offset / SAMPLE_WIDTH / SAMPLE_RATE
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        start = time.perf_counter()
+        result = session.accept(pcm[offset:offset + block])
+        processing += time.perf_counter() - start
+        if result and first_partial is None:
+            # Audio position at which the first words came back
+            first_partial = (offset + block) / SAMPLE_WIDTH / SAMPLE_RATE
+
+    start = time.perf_counter()
+    hypothesis = session.finish()
+    finish_seconds = time.perf_counter() - start
+    processing += finish_seconds
+
+    ref_words, hyp_words = normalize_words(reference), normalize_words(hypothesis)
+    return {
+        'file': os.path.basename(path),
+        'duration_seconds': duration,
+        'processing_seconds': processing,
+        'rtf': processing / duration if duration else None,
+        'first_partial_audio_seconds': first_partial,
+        'final_latency_seconds': finish_seconds,
+        'reference_words': len(ref_words),
+        'word_errors': word_errors(ref_words, hyp_words),
+        'hypothesis': hypothesis,
+    }
+
+def main():
+    """Run the speech-to-text benchmark"""
+    parser = argparse.ArgumentParser(description='Speech-to-text benchmark on WAV files')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--wav-dir', help='Directory of foo.wav files with foo.txt reference transcripts')
+    source.add_argument('--manifest', help='JSONL file of {"audio": path, "text": reference}')
+    parser.add_argument('--backend', default='vosk', choices=STT_BACKENDS)
+    parser.add_argument('--model-path', help='Model directory for the vosk backend')
+    parser.add_argument('--chunk-ms', type=int, default=100, help='Audio fed per recognizer call')
+    parser.add_argument('--realtime', action='store_true', help='Feed audio at capture speed')
+    parser.add_argument('--output', help='Write per-file results as JSON')
+    args = parser.parse_args()
+
+    options = {'model_path': args.model_path} if args.model_path else {}
+    backend = stt_backends.load_stt_backend(args.backend, **options)
+    dataset = load_dataset(args)
+
+    print("🚀 Speech-to-Text Benchmark")
+    print("=" * 60)
+    print(f"🎙️ Backend: {args.backend} | Files: {len(dataset)} | Chunk: {args.chunk_ms}ms")
+
+    results = []
+    for path, reference in dataset:
+        result = run_file(backend, path, reference, args.chunk_ms, args.realtime)
+        results.append(result)
+        wer = result['word_errors'] / max(result['reference_words'], 1)
+        first = result['first_partial_audio_seconds']
+        print(f"   {result['file']:<30} RTF {result['rtf']:.3f} | WER {wer:.1%} | "
+              f"first partial {f'{first:.2f}s' if first is not None else 'n/a'}")
+
+    if not results:
+        print("❌ No WAV files with reference transcripts found")
+        return
+
+    total_audio = sum(r['duration_seconds'] for r in results)
+    partials = [r['first_partial_audio_seconds'] for r in results if r['first_partial_audio_seconds'] is not None]
+    summary = {
+        'backend': args.backend,
+        'files': len(results),
+        'audio_seconds': total_audio,
+        'rtf': sum(r['processing_seconds'] for r in results) / total_audio,
+        'wer': sum(r['word_errors'] for r in results) / max(sum(r['reference_words'] for r in results), 1),
+        'mean_first_partial_audio_seconds': sum(partials) / len(partials) if partials else None,
+        'mean_final_latency_seconds': sum(r['final_latency_seconds'] for r in results) / len(results),
+    }
+
+    print("\n📊 Summary")
+    print("=" * 60)
+    print(f"   Audio: {summary['audio_seconds']:.1f}s | RTF: {summary['rtf']:.3f} "
+          f"({'faster' if summary['rtf'] < 1 else 'slower'} than real time) | WER: {summary['wer']:.1%}")
+    if summary['mean_first_partial_audio_seconds'] is not None:
+        print(f"   Mean first partial after {summary['mean_first_partial_audio_seconds']:.2f}s of audio")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'summary': summary, 'files': results}, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
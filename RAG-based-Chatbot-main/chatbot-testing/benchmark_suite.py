@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+RAG Pipeline Benchmark Suite
+Generates reproducible synthetic corpora and measures chunking and
+embedding throughput, index build time, memory footprint, query latency
+percentiles and recall@k, with the LLM replaced by a local stub.
+Results are written as JSON so runs can be compared across versions.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from model_llama4 import Llama4RAGChatbot
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "ze", "pra",
+             "dum", "ele", "for", "gan", "hil", "jor", "kes", "lun", "mor", "nix"]
+COMMON_WORDS = ["the", "a", "of", "and", "to", "in", "is", "for", "with", "that",
+                "by", "on", "as", "are", "from", "which", "can", "its", "into", "used"]
+
+class StubInferenceClient:
+    """Stands in for InferenceClient so no request leaves the machine"""
+    def __init__(self, latency: float = 0.0, answer: str = "This is a stubbed benchmark answer."):
+        self.latency = latency
+        self.answer = answer
+
+    def text_generation(self, model=None, prompt=None, max_new_tokens=200, temperature=0.7, stream=False):
+        if self.latency:
+            time.sleep(self.latency)
+        if stream:
+            return iter(word + " " for word in self.answer.split())
+        return self.answer
+
+class BenchmarkChatbot(Llama4RAGChatbot):
+    """Llama4RAGChatbot with HuggingFace login skipped and a stubbed LLM"""
+    def __init__(self, *args, llm_latency: float = 0.0, **kwargs):
+        self.llm_latency = llm_latency
+        self.encode_log = []
+        super().__init__(*args, **kwargs)
+
+    def _login_hf(self):
+        pass
+
+    def _load_inference_client(self):
+        super()._load_inference_client()
+        self.client = StubInferenceClient(self.llm_latency)
+
+    def _encode_corpus(self, texts, show_progress_bar=False):
+        start = time.perf_counter()
+        embeddings = super()._encode_corpus(texts, show_progress_bar=False)
+        self.encode_log.append((len(texts), time.perf_counter() - start))
+        return embeddings
+
+def make_vocabulary(rng, size):
+    """Deterministic pseudo-words built from syllables"""
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+def generate_corpus(path, num_chunks, seed, vocabulary_size=20000, topic_words=40):
+    """
+    Write a synthetic knowledge file with num_chunks paragraphs
+
+    Each paragraph draws most of its content words from its own small topic
+    vocabulary, so paragraphs are distinguishable by retrieval, and stays
+    below the default chunk size so it becomes exactly one chunk.
+    """
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng, vocabulary_size)
+    with open(path, 'w', encoding='utf-8') as f:
+        for _ in range(num_chunks):
+            topic = rng.sample(vocabulary, topic_words)
+            sentences = []
+            for _ in range(rng.randint(3, 4)):
+                words = [rng.choice(topic) if rng.random() < 0.6 else rng.choice(COMMON_WORDS)
+                         for _ in range(rng.randint(8, 14))]
+                sentences.append(" ".join(words).capitalize() + ".")
+            f.write(" ".join(sentences) + "\n\n")
+
+def make_queries(chunks, num_queries, seed, drop_ratio=0.3):
+    """Build (query, source chunk id) pairs from perturbed sentences of random chunks"""
+    rng = random.Random(seed)
+    queries = []
+    for chunk_id in rng.sample(range(len(chunks)), min(num_queries, len(chunks))):
+        sentence = rng.choice(Llama4RAGChatbot._split_sentences(chunks[chunk_id]))
+        words = [w for w in sentence.rstrip('.').split() if rng.random() >= drop_ratio]
+        queries.append((" ".join(words) or sentence, chunk_id))
+    return queries
+
+def percentiles(samples):
+    """p50/p95/p99 and mean of a list of seconds, in milliseconds"""
+    values = np.asarray(samples) * 1000
+    return {
+        'mean_ms': float(values.mean()),
+        'p50_ms': float(np.percentile(values, 50)),
+        'p95_ms': float(np.percentile(values, 95)),
+        'p99_ms': float(np.percentile(values, 99)),
+    }
+
+def peak_rss_mb():
+    """Peak resident set size of this process, if the platform reports it"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+def benchmark_size(bot, corpus_path, num_chunks, args):
+    """Ingest one synthetic corpus and measure every stage"""
+    print(f"\n📚 Generating {num_chunks:,} chunk corpus (seed {args.seed})...")
+    generate_corpus(corpus_path, num_chunks, args.seed)
+    bot.knowledge_file = corpus_path
+
+    start = time.perf_counter()
+    chunks, dedup_stats, signature = bot._chunk_knowledge_base()
+    chunk_seconds = time.perf_counter() - start
+
+    bot.encode_log.clear()
+    start = time.perf_counter()
+    snapshot = bot._build_snapshot(chunks, dedup_stats, signature, version=bot.snapshot_version + 1)
+    build_seconds = time.perf_counter() - start
+    bot.snapshot = snapshot
+
+    encoded_texts = sum(n for n, _ in bot.encode_log)
+    encode_seconds = sum(s for _, s in bot.encode_log)
+    # Chunks and sentences are encoded in one call; attribute the time by text count
+    chunk_encode_seconds = encode_seconds * len(chunks) / encoded_texts
+
+    print(f"⏱️  Running {args.queries} queries...")
+    queries = make_queries(snapshot.chunks, args.queries, args.seed)
+    max_k = max(args.recall_k)
+    hits = {k: 0 for k in args.recall_k}
+    retrieve_latencies = []
+    for query, chunk_id in queries:
+        start = time.perf_counter()
+        results = bot.retrieve(query, top_k=max_k)
+        retrieve_latencies.append(time.perf_counter() - start)
+        ranked = [r['chunk_id'] for r in results]
+        for k in args.recall_k:
+            hits[k] += chunk_id in ranked[:k]
+
+    e2e_latencies = []
+    for query, _ in queries[:args.e2e_queries]:
+        start = time.perf_counter()
+        bot.generate_response(query)
+        e2e_latencies.append(time.perf_counter() - start)
+
+    return {
+        'num_chunks_requested': num_chunks,
+        'num_chunks': len(snapshot),
+        'num_sentences': len(snapshot.sentences),
+        'chunking': {
+            'seconds': chunk_seconds,
+            'chunks_per_sec': len(chunks) / chunk_seconds,
+            'removed_duplicates': dedup_stats['removed_chunks'] if dedup_stats else 0,
+        },
+        'embedding': {
+            'texts': encoded_texts,
+            'seconds': encode_seconds,
+            'texts_per_sec': encoded_texts / encode_seconds,
+            'chunks_per_sec': len(chunks) / chunk_encode_seconds,
+        },
+        'index_build': {
+            'seconds': build_seconds,
+            'seconds_excluding_encoding': build_seconds - encode_seconds,
+        },
+        'memory': {
+            'index_bytes': snapshot.index.ntotal * snapshot.index.d * 4,
+            'sentence_embedding_bytes': int(snapshot.sentence_embeddings.nbytes),
+            'chunk_text_bytes': sum(len(c.encode('utf-8')) for c in snapshot.chunks),
+            'peak_rss_mb': peak_rss_mb(),
+        },
+        'retrieve_latency': percentiles(retrieve_latencies),
+        'end_to_end_latency': percentiles(e2e_latencies) if e2e_latencies else None,
+        'recall': {f'recall@{k}': hits[k] / len(queries) for k in args.recall_k},
+    }
+
+def git_revision():
+    """Current commit of the checkout, if it is a git repository"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+def compare_with_baseline(results, baseline_path):
+    """Print relative change of the headline metrics against an earlier result file"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {r['num_chunks_requested']: r for r in json.load(f)['results']}
+
+    metrics = [
+        ('chunking', 'chunks_per_sec', True),
+        ('embedding', 'texts_per_sec', True),
+        ('index_build', 'seconds', False),
+        ('retrieve_latency', 'p95_ms', False),
+        ('retrieve_latency', 'p99_ms', False),
+    ]
+    print(f"\n📉 Change vs {baseline_path}")
+    for result in results:
+        previous = baseline.get(result['num_chunks_requested'])
+        if previous is None:
+            continue
+        print(f"   {result['num_chunks_requested']:,} chunks:")
+        for section, key, higher_is_better in metrics:
+            old, new = previous[section][key], result[section][key]
+            change = (new - old) / old if old else 0.0
+            regressed = change < -0.1 if higher_is_better else change > 0.1
+            print(f"     {'❌' if regressed else '✅'} {section}.{key}: {old:.2f} -> {new:.2f} ({change:+.1%})")
+        for name, value in result['recall'].items():
+            old = previous['recall'].get(name)
+            if old is not None:
+                print(f"     {'❌' if value < old - 0.01 else '✅'} {name}: {old:.3f} -> {value:.3f}")
+
+def main():
+    """Run the benchmark suite"""
+    parser = argparse.ArgumentParser(description='RAG pipeline benchmark suite')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000],
+                        help='Synthetic corpus sizes in chunks, e.g. 10000 100000 1000000')
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--queries', type=int, default=200, help='Retrieval queries per corpus')
+    parser.add_argument('--e2e-queries', type=int, default=50, help='End-to-end generate_response calls per corpus')
+    parser.add_argument('--recall-k', type=int, nargs='+', default=[1, 3, 10])
+    parser.add_argument('--llm-latency-ms', type=float, default=0.0, help='Simulated latency of the stubbed LLM')
+    parser.add_argument('--encoder-backend', default='torch')
+    parser.add_argument('--encoder-tuning', default='off', choices=['auto', 'saved', 'off'])
+    parser.add_argument('--ingest-workers', type=int, default=1)
+    parser.add_argument('--dedup-threshold', type=float, default=0.9)
+    parser.add_argument('--output', help='JSON result file (default: benchmark_results/bench-<timestamp>.json)')
+    parser.add_argument('--baseline', help='Earlier result file to compare against')
+    args = parser.parse_args()
+
+    print("🚀 RAG Pipeline Benchmark Suite")
+    print("=" * 60)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='rag-bench-') as workdir:
+        bootstrap = os.path.join(workdir, 'bootstrap.txt')
+        generate_corpus(bootstrap, 8, args.seed)
+        bot = BenchmarkChatbot(knowledge_file=bootstrap,
+                               encoder_backend=args.encoder_backend,
+                               encoder_tuning=args.encoder_tuning,
+                               ingest_workers=args.ingest_workers,
+                               dedup_threshold=args.dedup_threshold,
+                               llm_latency=args.llm_latency_ms / 1000)
+
+        for size in args.sizes:
+            result = benchmark_size(bot, os.path.join(workdir, f'corpus-{size}.txt'), size, args)
+            results.append(result)
+            print(f"✅ {size:,} chunks: embed {result['embedding']['texts_per_sec']:.1f} texts/s | "
+                  f"build {result['index_build']['seconds']:.1f}s | "
+                  f"retrieve p95 {result['retrieve_latency']['p95_ms']:.2f}ms | "
+                  + " ".join(f"{k} {v:.3f}" for k, v in result['recall'].items()))
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_revision': git_revision(),
+        'machine': {
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+        },
+        'config': vars(args),
+        'results': results,
+    }
+
+    output = args.output or os.path.join('benchmark_results', f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results written to {output}")
+
+    if args.baseline:
+        compare_with_baseline(results, args.baseline)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Fake Inference Server
+Local stand-in for a text-generation-inference (TGI) endpoint, so the
+chatbot's real InferenceClient code path can be load tested without
+network access or API quota. Point the chatbot at it by using its URL as
+the model name, e.g. Llama4RAGChatbot(model_name="http://127.0.0.1:8081").
+
+Generation is simulated with a configurable time to first token, token
+rate and number of concurrent generation slots; requests beyond the slot
+count wait, like a saturated GPU server.
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+WORDS = ("the model answers using the retrieved context and cites the relevant "
+         "facts from the knowledge base in a short and helpful reply").split()
+
+class FakeInferenceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, server_address, time_to_first_token=0.3, tokens_per_sec=30.0,
+                 answer_tokens=60, slots=4, error_rate=0.0, seed=None):
+        """
+        Args:
+            server_address: (host, port) to bind; port 0 picks a free port
+            time_to_first_token: Seconds before the first token (prefill)
+            tokens_per_sec: Decode speed of each generation
+            answer_tokens: Tokens generated per request (capped by max_new_tokens)
+            slots: Generations served concurrently; further requests queue
+            error_rate: Fraction of requests answered with HTTP 503
+            seed: Seed for the error injection
+        """
+        super().__init__(server_address, FakeInferenceHandler)
+        self.time_to_first_token = time_to_first_token
+        self.tokens_per_sec = tokens_per_sec
+        self.answer_tokens = answer_tokens
+        self.slots = threading.Semaphore(slots)
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.requests_served = 0
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def should_fail(self):
+        with self.rng_lock:
+            return self.rng.random() < self.error_rate
+
+class FakeInferenceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        server = self.server
+        if server.should_fail():
+            self._send_json({"error": "Model is overloaded"}, 503)
+            return
+
+        max_new_tokens = request.get("parameters", {}).get("max_new_tokens") or server.answer_tokens
+        tokens = [(" " if i else "") + WORDS[i % len(WORDS)]
+                  for i in range(min(server.answer_tokens, max_new_tokens))]
+
+        with server.slots:
+            server.requests_served += 1
+            time.sleep(server.time_to_first_token)
+            if request.get("stream"):
+                self._stream(tokens)
+            else:
+                time.sleep(len(tokens) / server.tokens_per_sec)
+                self._send_json([{"generated_text": "".join(tokens)}])
+
+    def _stream(self, tokens):
+        """Send tokens as TGI server-sent events over a chunked response"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, text in enumerate(tokens):
+            last = i == len(tokens) - 1
+            event = {
+                "index": i,
+                "token": {"id": i, "text": text, "logprob": 0.0, "special": False},
+                "generated_text": "".join(tokens) if last else None,
+                "details": None,
+            }
+            data = f"data:{json.dumps(event)}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+            if not last:
+                time.sleep(1 / self.server.tokens_per_sec)
+        self.wfile.write(b"0\r\n\r\n")
+
+def start_fake_inference_server(host="127.0.0.1", port=0, **options):
+    """Start a FakeInferenceServer in a daemon thread and return it"""
+    server = FakeInferenceServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, name="fake-inference", daemon=True).start()
+    return server
+
+def main():
+    """Run the fake inference server in the foreground"""
+    parser = argparse.ArgumentParser(description='Fake TGI-compatible inference server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--ttft-ms', type=float, default=300, help='Time to first token')
+    parser.add_argument('--tokens-per-sec', type=float, default=30)
+    parser.add_argument('--answer-tokens', type=int, default=60)
+    parser.add_argument('--slots', type=int, default=4, help='Concurrent generations')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeInferenceServer((args.host, args.port), time_to_first_token=args.ttft_ms / 1000,
+                                 tokens_per_sec=args.tokens_per_sec, answer_tokens=args.answer_tokens,
+                                 slots=args.slots, error_rate=args.error_rate)
+    print(f"🤖 Fake inference server on {server.url} "
+          f"({args.slots} slots, {args.tokens_per_sec:g} tok/s, TTFT {args.ttft_ms:g}ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Fake inference server stopped")
+
+if __name__ == "__main__":
+    main()
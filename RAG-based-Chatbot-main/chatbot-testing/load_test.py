@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Concurrent Load Test
+Simulates many chat users against one chatbot, either in-process or over
+HTTP (server.py), with generation served by the local fake inference
+server. Steps through a list of arrival rates and reports throughput,
+latency percentiles, error and fallback rates and the saturation point.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import urllib.request
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from fake_inference_server import start_fake_inference_server
+
+# weight: relative frequency; session: continue a user's conversation; stream: use streaming
+DEFAULT_MIX = [
+    {"question": "What is artificial intelligence?", "weight": 4},
+    {"question": "Explain machine learning", "weight": 3},
+    {"question": "What are neural networks?", "weight": 2, "stream": True},
+    {"question": "How does natural language processing work?", "weight": 2, "stream": True},
+    {"question": "Can you tell me more about that?", "weight": 2, "session": True},
+    {"question": "What is the capital of France?", "weight": 1},
+]
+
+class InProcessTarget:
+    """Sends queries straight to a Llama4RAGChatbot in this process"""
+    def __init__(self, chatbot):
+        from metrics import METRICS
+        self.chatbot = chatbot
+        self.metrics = METRICS
+
+    def query(self, question, session_id, stream):
+        if stream:
+            first_token = None
+            start = time.perf_counter()
+            for _ in self.chatbot.generate_response_stream(question, session_id):
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+            return first_token
+        self.chatbot.generate_response(question, session_id)
+        return None
+
+    def counters(self):
+        return self.metrics.summary()["counters"]
+
+class HttpTarget:
+    """Sends queries to a running server.py over HTTP"""
+    def __init__(self, base_url, timeout=120):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def query(self, question, session_id, stream):
+        body = json.dumps({"query": question, "session_id": session_id, "stream": stream}).encode("utf-8")
+        request = urllib.request.Request(f"{self.base_url}/query", data=body,
+                                         headers={"Content-Type": "application/json"})
+        start = time.perf_counter()
+        first_token = None
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            if not stream:
+                response.read()
+                return None
+            for line in response:
+                if first_token is None and b'"token"' in line:
+                    first_token = time.perf_counter() - start
+        return first_token
+
+    def counters(self):
+        """Scrape the server's counters from its Prometheus endpoint"""
+        with urllib.request.urlopen(f"{self.base_url}/metrics", timeout=self.timeout) as response:
+            text = response.read().decode("utf-8")
+        counters = {}
+        for match in re.finditer(r'^rag_(\w+_total)(\{[^}]*\})? ([0-9.e+-]+)$', text, re.MULTILINE):
+            counters[match.group(1)] = counters.get(match.group(1), 0) + float(match.group(3))
+        return counters
+
+def percentiles(samples):
+    """p50/p95/p99 of a list of seconds, in milliseconds"""
+    if not samples:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None}
+    values = np.asarray(samples) * 1000
+    return {f'p{q}_ms': float(np.percentile(values, q)) for q in (50, 95, 99)}
+
+class LoadStep:
+    def __init__(self, target, mix, rate, duration, concurrency, users, seed):
+        """
+        One load level, open-loop at `rate` requests/s (closed-loop if rate is 0)
+
+        Open-loop latency is measured from each request's scheduled arrival,
+        so time spent waiting for a free client thread counts against the
+        system instead of silently lowering the offered load.
+
+        Args:
+            target: InProcessTarget or HttpTarget
+            mix: Question mix entries
+            rate: Mean Poisson arrival rate, or 0 for closed-loop users
+            duration: Seconds to generate load for
+            concurrency: Client threads (maximum requests in flight)
+            users: Distinct session ids used by follow-up questions
+            seed: Seed for arrivals and question choice
+        """
+        self.target = target
+        self.mix = mix
+        self.rate = rate
+        self.duration = duration
+        self.concurrency = concurrency
+        self.users = users
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.completed_at = []
+        self.first_tokens = []
+        self.arrivals = 0
+        self.errors = 0
+
+    def _pick(self):
+        with self.lock:
+            item = self.rng.choices(self.mix, weights=[m.get("weight", 1) for m in self.mix])[0]
+            session_id = f"user-{self.rng.randrange(self.users)}" if item.get("session") else None
+        return item, session_id
+
+    def _send(self, scheduled):
+        item, session_id = self._pick()
+        try:
+            first_token = self.target.query(item["question"], session_id, bool(item.get("stream")))
+        except Exception:
+            with self.lock:
+                self.errors += 1
+            return
+        finished = time.perf_counter()
+        with self.lock:
+            self.latencies.append(finished - scheduled)
+            self.completed_at.append(finished)
+            if first_token is not None:
+                self.first_tokens.append(first_token)
+
+    def _closed_loop_user(self, deadline):
+        while time.perf_counter() < deadline:
+            with self.lock:
+                self.arrivals += 1
+            self._send(time.perf_counter())
+
+    def run(self):
+        counters_before = self.target.counters()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="load") as pool:
+            if self.rate:
+                offset = 0.0
+                while offset < self.duration:
+                    scheduled = start + offset
+                    delay = scheduled - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    self.arrivals += 1
+                    pool.submit(self._send, scheduled)
+                    offset += self.rng.expovariate(self.rate)
+            else:
+                for _ in range(self.concurrency):
+                    pool.submit(self._closed_loop_user, start + self.duration)
+        elapsed = time.perf_counter() - start
+        counters_after = self.target.counters()
+
+        def delta(name):
+            return counters_after.get(name, 0) - counters_before.get(name, 0)
+
+        # Rates are taken over the arrival window; requests still draining afterwards
+        # only count towards latency
+        window_end = start + self.duration
+        completed = len(self.latencies)
+        attempted = self.arrivals
+        server_requests = delta("requests_total") or attempted
+        return {
+            'offered_rate': self.rate or None,
+            'arrival_rate': attempted / self.duration,
+            'concurrency': self.concurrency,
+            'completed': completed,
+            'drain_seconds': max(elapsed - self.duration, 0.0),
+            'throughput': sum(t <= window_end for t in self.completed_at) / self.duration,
+            'latency': percentiles(self.latencies),
+            'first_token': percentiles(self.first_tokens),
+            'error_rate': (self.errors + delta("errors_total")) / attempted if attempted else 0.0,
+            'fallback_rate': delta("fallbacks_total") / server_requests if server_requests else 0.0,
+        }
+
+def is_saturated(result, slo_ms):
+    """Throughput falling behind the arrival rate, or p95 over the SLO"""
+    if result['offered_rate'] and result['throughput'] < 0.9 * result['arrival_rate']:
+        return True
+    p95 = result['latency']['p95_ms']
+    return bool(slo_ms and p95 and p95 > slo_ms)
+
+def build_in_process_chatbot(args, inference_url):
+    """Chatbot whose generation goes to the given text-generation endpoint"""
+    from model_llama4 import Llama4RAGChatbot
+
+    class LoadTestChatbot(Llama4RAGChatbot):
+        def _login_hf(self):
+            pass  # the fake inference server needs no HuggingFace account
+
+    return LoadTestChatbot(model_name=inference_url, knowledge_file=args.knowledge_file,
+                           encoder_backend=args.encoder_backend, encoder_tuning='saved')
+
+def main():
+    """Run the load test"""
+    parser = argparse.ArgumentParser(description='Concurrent chatbot load test')
+    parser.add_argument('--target', default='inproc',
+                        help='"inproc", or the base URL of a running server.py (start it with --model <fake server URL>)')
+    parser.add_argument('--rates', type=float, nargs='+', default=[1, 2, 4, 8, 16],
+                        help='Arrival rates (requests/s) to step through; 0 runs closed-loop users')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds per load step')
+    parser.add_argument('--concurrency', type=int, default=32, help='Maximum requests in flight')
+    parser.add_argument('--users', type=int, default=50, help='Distinct conversation sessions')
+    parser.add_argument('--mix', help='JSON file with a question mix (list of {"question", "weight", "session", "stream"})')
+    parser.add_argument('--slo-ms', type=float, help='p95 latency objective used to detect saturation')
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--inference-url', help='Use an already running (fake) inference server')
+    parser.add_argument('--ttft-ms', type=float, default=300)
+    parser.add_argument('--tokens-per-sec', type=float, default=30)
+    parser.add_argument('--answer-tokens', type=int, default=60)
+    parser.add_argument('--slots', type=int, default=4, help='Concurrent generations of the fake server')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of fake server requests that fail')
+    parser.add_argument('--knowledge-file', default=os.path.join(PROJECT_ROOT, 'knowledge.txt'))
+    parser.add_argument('--encoder-backend', default='torch')
+    parser.add_argument('--keep-going', action='store_true', help='Run every rate even after saturation')
+    parser.add_argument('--output', help='Write the results as JSON')
+    args = parser.parse_args()
+
+    mix = DEFAULT_MIX
+    if args.mix:
+        with open(args.mix, 'r', encoding='utf-8') as f:
+            mix = json.load(f)
+
+    print("🚀 Chatbot Load Test")
+    print("=" * 60)
+
+    if args.target == 'inproc':
+        inference_url = args.inference_url
+        if not inference_url:
+            fake = start_fake_inference_server(time_to_first_token=args.ttft_ms / 1000,
+                                               tokens_per_sec=args.tokens_per_sec,
+                                               answer_tokens=args.answer_tokens,
+                                               slots=args.slots, error_rate=args.error_rate,
+                                               seed=args.seed)
+            inference_url = fake.url
+            print(f"🤖 Fake inference server on {inference_url} ({args.slots} slots, "
+                  f"{args.tokens_per_sec:g} tok/s, TTFT {args.ttft_ms:g}ms)")
+        target = InProcessTarget(build_in_process_chatbot(args, inference_url))
+    else:
+        target = HttpTarget(args.target)
+        print(f"🌐 Target: {args.target}")
+
+    results = []
+    saturation_rate = None
+    print(f"\n{'rate':>8}{'done':>7}{'req/s':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'ttft95':>9}{'err':>7}{'fallbk':>8}")
+    for i, rate in enumerate(args.rates):
+        step = LoadStep(target, mix, rate, args.duration, args.concurrency, args.users, args.seed + i)
+        result = step.run()
+        results.append(result)
+
+        fmt = lambda v: f"{v:>9.0f}" if v is not None else f"{'-':>9}"
+        print(f"{rate or 'closed':>8}{result['completed']:>7}{result['throughput']:>8.2f}"
+              f"{fmt(result['latency']['p50_ms'])}{fmt(result['latency']['p95_ms'])}"
+              f"{fmt(result['latency']['p99_ms'])}{fmt(result['first_token']['p95_ms'])}"
+              f"{result['error_rate']:>7.1%}{result['fallback_rate']:>8.1%}")
+
+        if is_saturated(result, args.slo_ms):
+            saturation_rate = saturation_rate or rate
+            if not args.keep_going:
+                break
+
+    print()
+    if saturation_rate is None:
+        print("✅ No saturation reached at the tested rates")
+    else:
+        sustained = [r['throughput'] for r in results if not is_saturated(r, args.slo_ms)]
+        print(f"⚠️ Saturated at {saturation_rate:g} req/s offered; "
+              f"highest sustained throughput {max(sustained, default=0):.2f} req/s")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'config': vars(args), 'saturation_rate': saturation_rate, 'steps': results}, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,33 @@
 import argparse
 import sys
 import os
-from model import RAGChatbot
 from audio_processor import AudioProcessor
+from metrics import METRICS
+from tracing import TRACER, PROFILER
+from speech_pipeline import SpeechPipeline
+from voice_latency import VOICE_LATENCY, VoiceTurn, format_voice_latency
 
 class ChatbotCLI:
     def __init__(self):
         """Initialize the CLI chatbot"""
         self.chatbot = None
         self.audio_processor = None
+        self.speech_pipeline = None
         self.is_audio_mode = False
+        # Talking over a spoken answer interrupts it. Opt-in: without echo cancellation
+        # (e.g. a headset) the assistant's own voice from the speakers would trigger it
+        self.barge_in = os.environ.get("RAG_BARGE_IN", "0") == "1"
         
     def initialize(self):
         """Initialize the chatbot and audio processor"""
         try:
             print("🔄 Initializing RAG Chatbot (Llama-4-Maverick)...")
             from model_llama4 import Llama4RAGChatbot
-            self.chatbot = Llama4RAGChatbot()
+            # RAG_SHARED_INDEX attaches to an index published by another process instead of building one
+            shared_index = os.environ.get("RAG_SHARED_INDEX")
+            self.chatbot = Llama4RAGChatbot(attach_shared=shared_index, watch_knowledge=bool(shared_index))
             self.audio_processor = AudioProcessor()
+            self.speech_pipeline = SpeechPipeline(self.audio_processor)
             print("✅ Initialization complete!")
             return True
         except Exception as e:
@@ -37,6 +47,8 @@ Commands:
   /quit          - Exit the chatbot
   /update        - Update knowledge base
   /status        - Show current status
+  /metrics       - Show per-stage latency metrics
+  /profile on|off - Profile each request and dump a .prof file per request
 
 Usage:
   - Type your questions directly for text input
@@ -51,29 +63,96 @@ Usage:
   Audio Mode: {'🎤 Enabled' if self.is_audio_mode else '📝 Disabled'}
   Chatbot: {'✅ Ready' if self.chatbot else '❌ Not Ready'}
   Audio Processor: {'✅ Ready' if self.audio_processor else '❌ Not Ready'}
+  Index: {f"v{self.chatbot.snapshot_version} ({len(self.chatbot.chunks)} chunks)" if self.chatbot else 'n/a'}{f" from shared memory '{self.chatbot.attach_shared}'" if self.chatbot and self.chatbot.attach_shared else ''}
+  Tracing: {f'✅ {TRACER.path}' if TRACER.enabled else '❌ Disabled (set RAG_TRACE=1)'}
+  Profiling: {f'✅ {PROFILER.output_dir}/' if PROFILER.enabled else '❌ Disabled'}
+  Barge-in: {'✅ Enabled' if self.barge_in else '❌ Disabled (set RAG_BARGE_IN=1, needs a headset or echo cancellation)'}
+
+⏱️ Voice Latency (ms, last {VOICE_LATENCY.window} spoken turns):
+{format_voice_latency()}
         """)
     
+    def display_metrics(self):
+        """Display per-stage latency and event counters"""
+        if not METRICS.enabled:
+            print("⚠️ Metrics are disabled (RAG_METRICS=0)")
+            return
+        
+        summary = METRICS.summary()
+        print("\n📈 Pipeline Metrics (ms, percentiles are bucket upper bounds):")
+        print(f"  {'stage':<12}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+        for stage, s in sorted(summary["stages"].items()):
+            print(f"  {stage:<12}{s['count']:>8}{s['mean'] * 1000:>10.1f}{s['p50'] * 1000:>10.1f}"
+                  f"{s['p95'] * 1000:>10.1f}{s['p99'] * 1000:>10.1f}")
+        for name, value in sorted({**summary["counters"], **summary["gauges"]}.items()):
+            print(f"  {name}: {value:g}")
+    
+    def set_profiling(self, arg: str):
+        """Turn per-request profiling on or off"""
+        if arg not in ('on', 'off'):
+            print(f"🔬 Profiling is {'on' if PROFILER.enabled else 'off'}. Usage: /profile on|off")
+            return
+        PROFILER.enabled = arg == 'on'
+        if PROFILER.enabled:
+            print(f"🔬 Profiling enabled, profiles are written to {PROFILER.output_dir}/")
+        else:
+            print("🔬 Profiling disabled")
+    
     def toggle_audio_mode(self):
         """Toggle audio mode"""
         self.is_audio_mode = not self.is_audio_mode
         mode = "🎤 Audio Mode" if self.is_audio_mode else "📝 Text Mode"
         print(f"✅ Switched to {mode}")
     
-    def process_text_input(self, user_input: str):
-        """Process text input and generate response"""
+    def process_text_input(self, user_input: str, turn: VoiceTurn = None):
+        """
+        Process text input and generate response
+        
+        Args:
+            user_input: Question typed or transcribed
+            turn: Voice latency turn when the question was spoken
+        """
         if not self.chatbot:
             print("❌ Chatbot not initialized!")
             return
         
         try:
             print("🤖 Thinking...")
-            response = self.chatbot.generate_response(user_input)
             
-            print(f"\n🤖 Assistant: {response}\n")
+            # In audio mode, speak each sentence as soon as it has been generated
+            if self.is_audio_mode and self.speech_pipeline:
+                print("\n🤖 Assistant: ", end="", flush=True)
+                metadata = {}
+                tokens = self.chatbot.generate_response_stream(user_input, session_id="default", metadata=metadata)
+                self.speech_pipeline.speak_stream(tokens, on_text=lambda t: print(t, end="", flush=True),
+                                                  barge_in=self.barge_in, turn=turn)
+                print("\n")
+                if turn:
+                    if metadata.get("retrieved_at"):
+                        turn.mark("retrieval", metadata["retrieved_at"])
+                    turn.finish()
+                
+                barge_in = self.speech_pipeline.last_barge_in
+                if barge_in:
+                    # The user spoke over the answer: handle what they are saying right away
+                    latency = barge_in.interrupt_latency
+                    print(f"✋ Interrupted ({latency * 1000:.0f} ms)" if latency is not None else "✋ Interrupted")
+                    next_turn = VOICE_LATENCY.start_turn()
+                    text = self.audio_processor.speech_to_text(utterance=barge_in.utterance(max_seconds=10),
+                                                               turn=next_turn)
+                    if text:
+                        print(f"👤 You said: {text}")
+                        self.process_text_input(text, next_turn)
+                return
+            
+            result = self.chatbot.generate_response(user_input, session_id="default", return_metadata=True)
+            if turn:
+                if result["retrieved_at"]:
+                    turn.mark("retrieval", result["retrieved_at"])
+                turn.mark("first_token")
+                turn.finish()
             
-            # Speak response if in audio mode
-            if self.is_audio_mode and self.audio_processor:
-                self.audio_processor.text_to_speech(response)
+            print(f"\n🤖 Assistant: {result['response']}\n")
             
         except Exception as e:
             print(f"❌ Error generating response: {e}")
@@ -85,11 +164,14 @@ Usage:
             return
         
         print("🎤 Listening... (speak now)")
-        text = self.audio_processor.speech_to_text(timeout=10)
+        # Partial transcripts overwrite each other on one line until the final one is printed
+        turn = VOICE_LATENCY.start_turn()
+        text = self.audio_processor.speech_to_text(
+            timeout=10, on_partial=lambda partial: print(f"📝 {partial}", end="\r", flush=True), turn=turn)
         
         if text:
             print(f"👤 You said: {text}")
-            self.process_text_input(text)
+            self.process_text_input(text, turn)
         else:
             print("⚠️ No speech detected or could not understand audio")
     
@@ -175,6 +257,8 @@ Type /quit to exit.
             self.is_audio_mode = False
             print("✅ Switched to Text Mode")
         elif cmd == '/clear':
+            if self.chatbot:
+                self.chatbot.clear_chat_history("default")
             print("🗑️ Chat history cleared")
         elif cmd == '/quit':
             print("👋 Goodbye!")
@@ -183,6 +267,10 @@ Type /quit to exit.
             self.update_knowledge_base()
         elif cmd == '/status':
             self.display_status()
+        elif cmd == '/metrics':
+            self.display_metrics()
+        elif cmd.split()[0] == '/profile':
+            self.set_profiling(cmd[len('/profile'):].strip())
         else:
             print(f"❓ Unknown command: {command}")
             print("Type /help for available commands")
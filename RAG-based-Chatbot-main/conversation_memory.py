@@ -0,0 +1,155 @@
+import re
+import threading
+from collections import deque, OrderedDict
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken, or estimate from word count if it is unavailable"""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text))
+    return int(len(text.split()) * 1.3) + 1
+
+
+def _first_sentence(text: str) -> str:
+    return re.split(r'(?<=[.!?])\s+', text.strip(), maxsplit=1)[0]
+
+
+class ConversationMemory:
+    def __init__(self, capacity: int = 20, token_budget: int = 512,
+                 summary_budget: int = 128, retrieval_budget: int = 64):
+        """
+        Fixed-capacity conversation memory for one session
+
+        Recent turns live in a ring buffer. Turns that fall out of the
+        buffer or out of the prompt token budget are folded into a rolling
+        extractive summary, so prompt size stays flat over long chats.
+
+        Args:
+            capacity: Maximum number of turns kept verbatim
+            token_budget: Tokens of recent turns included in the prompt
+            summary_budget: Maximum tokens kept in the rolling summary
+            retrieval_budget: Tokens of earlier user turns added to the retrieval query
+        """
+        self.capacity = capacity
+        self.token_budget = token_budget
+        self.summary_budget = summary_budget
+        self.retrieval_budget = retrieval_budget
+        self.turns = deque(maxlen=capacity)
+        self.summary = ""
+        self._summarized = 0  # turns at the head of the buffer already in the summary
+        self._lock = threading.Lock()
+
+    def add(self, role: str, content: str):
+        """Append a turn, summarizing the oldest one if the buffer is full"""
+        with self._lock:
+            if len(self.turns) == self.capacity:
+                oldest = self.turns[0]
+                if self._summarized:
+                    self._summarized -= 1
+                else:
+                    self._fold_into_summary([oldest])
+            self.turns.append({
+                "role": role,
+                "content": content,
+                "tokens": count_tokens(content),
+                "timestamp": datetime.now().isoformat(),
+            })
+            self._enforce_budget()
+
+    def _enforce_budget(self):
+        """Summarize the oldest unsummarized turns until the rest fit the token budget"""
+        total = sum(t["tokens"] for t in list(self.turns)[self._summarized:])
+        while total > self.token_budget and self._summarized < len(self.turns) - 1:
+            turn = self.turns[self._summarized]
+            self._fold_into_summary([turn])
+            self._summarized += 1
+            total -= turn["tokens"]
+
+    def _fold_into_summary(self, turns: List[Dict[str, Any]]):
+        """Compress turns into the rolling summary, keeping only its newest tokens"""
+        for turn in turns:
+            speaker = "User" if turn["role"] == "user" else "Assistant"
+            self.summary = f"{self.summary} {speaker}: {_first_sentence(turn['content'])}".strip()
+        words = self.summary.split()
+        while words and count_tokens(" ".join(words)) > self.summary_budget:
+            words = words[max(1, len(words) // 10):]
+        self.summary = " ".join(words)
+
+    def prompt_context(self) -> str:
+        """Summary plus the recent turns that fit the token budget, formatted for the prompt"""
+        with self._lock:
+            lines = []
+            if self.summary:
+                lines.append(f"Summary of earlier conversation: {self.summary}")
+            for turn in list(self.turns)[self._summarized:]:
+                speaker = "User" if turn["role"] == "user" else "Assistant"
+                lines.append(f"{speaker}: {turn['content']}")
+            return "\n".join(lines)
+
+    def retrieval_query(self, query: str) -> str:
+        """Expand a follow-up question with the most recent user turns"""
+        with self._lock:
+            budget = self.retrieval_budget
+            previous = []
+            for turn in reversed(self.turns):
+                if turn["role"] != "user":
+                    continue
+                if turn["tokens"] > budget:
+                    break
+                previous.insert(0, turn["content"])
+                budget -= turn["tokens"]
+            return " ".join(previous + [query])
+
+    def history(self) -> List[Dict[str, str]]:
+        """Turns currently held in the ring buffer"""
+        with self._lock:
+            return [{"role": t["role"], "content": t["content"], "timestamp": t["timestamp"]}
+                    for t in self.turns]
+
+    def clear(self):
+        with self._lock:
+            self.turns.clear()
+            self.summary = ""
+            self._summarized = 0
+
+
+class SessionStore:
+    def __init__(self, max_sessions: int = 1000, **memory_kwargs):
+        """
+        LRU-bounded map of session id to ConversationMemory
+
+        Args:
+            max_sessions: Sessions kept before the least recently used is dropped
+            memory_kwargs: Arguments for each ConversationMemory
+        """
+        self.max_sessions = max_sessions
+        self.memory_kwargs = memory_kwargs
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str, create: bool = True) -> Optional[ConversationMemory]:
+        with self._lock:
+            memory = self._sessions.get(session_id)
+            if memory is None and create:
+                memory = ConversationMemory(**self.memory_kwargs)
+                self._sessions[session_id] = memory
+                if len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            if memory is not None:
+                self._sessions.move_to_end(session_id)
+            return memory
+
+    def clear(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
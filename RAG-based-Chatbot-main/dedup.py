@@ -0,0 +1,123 @@
+import re
+import zlib
+import numpy as np
+from typing import List, Dict, Any, Tuple
+
+# Mersenne prime used for the universal hash family
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+class MinHashDeduplicator:
+    def __init__(self, threshold: float = 0.9,
+                 num_perm: int = 128,
+                 shingle_size: int = 3,
+                 seed: int = 1):
+        """
+        Near-duplicate detection for text chunks using MinHash LSH
+
+        Each chunk is reduced to a MinHash signature over its word shingles.
+        Signatures are split into bands and hashed into buckets, so only
+        chunks sharing a bucket are compared, which keeps the pass roughly
+        linear in the number of chunks.
+
+        Args:
+            threshold: Estimated Jaccard similarity above which chunks are duplicates
+            num_perm: Number of hash permutations in each signature
+            shingle_size: Number of words per shingle
+            seed: Seed for the permutation coefficients
+        """
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = self._choose_bands(threshold, num_perm)
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=num_perm, dtype=np.int64).astype(np.uint64)
+
+    @staticmethod
+    def _choose_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+        """Pick the band/row split whose S-curve midpoint is closest to the threshold"""
+        best = (num_perm, 1)
+        best_error = float('inf')
+        for rows in range(1, num_perm + 1):
+            if num_perm % rows:
+                continue
+            bands = num_perm // rows
+            error = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+            if error < best_error:
+                best, best_error = (bands, rows), error
+        return best
+
+    def _shingles(self, text: str) -> np.ndarray:
+        """Hash the word shingles of a text to 32-bit integers"""
+        words = re.findall(r'\w+', text.lower())
+        if len(words) < self.shingle_size:
+            grams = [' '.join(words)]
+        else:
+            grams = [' '.join(words[i:i + self.shingle_size])
+                     for i in range(len(words) - self.shingle_size + 1)]
+        return np.fromiter((zlib.crc32(g.encode('utf-8')) for g in set(grams)),
+                           dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """Compute the MinHash signature of a text"""
+        shingles = self._shingles(text)
+        hashes = (np.outer(shingles, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return hashes.min(axis=0)
+
+    def find_duplicates(self, chunks: List[str]) -> Dict[int, int]:
+        """
+        Find near-duplicate chunks
+
+        Args:
+            chunks: Text chunks in ingest order
+
+        Returns:
+            Mapping from duplicate chunk index to the index of the earlier
+            chunk it duplicates
+        """
+        signatures = [self.signature(chunk) for chunk in chunks]
+        duplicates = {}
+
+        for band in range(self.bands):
+            buckets = {}
+            start, end = band * self.rows, (band + 1) * self.rows
+            for i, sig in enumerate(signatures):
+                if i in duplicates:
+                    continue
+                key = sig[start:end].tobytes()
+                kept = buckets.get(key)
+                if kept is None:
+                    buckets[key] = i
+                elif np.mean(signatures[kept] == sig) >= self.threshold:
+                    duplicates[i] = kept
+                # Candidates below the threshold fall through to later bands
+
+        return duplicates
+
+
+def deduplicate_chunks(chunks: List[str], threshold: float = 0.9,
+                       num_perm: int = 128) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    Drop near-duplicate chunks, keeping the first occurrence
+
+    Args:
+        chunks: Text chunks in ingest order
+        threshold: Estimated Jaccard similarity above which chunks are duplicates
+        num_perm: Number of hash permutations in each signature
+
+    Returns:
+        Tuple of the kept chunks and a stats dictionary
+    """
+    duplicates = MinHashDeduplicator(threshold, num_perm).find_duplicates(chunks) if chunks else {}
+    kept = [chunk for i, chunk in enumerate(chunks) if i not in duplicates]
+
+    stats = {
+        'input_chunks': len(chunks),
+        'kept_chunks': len(kept),
+        'removed_chunks': len(duplicates),
+        'removed_ratio': len(duplicates) / len(chunks) if chunks else 0.0,
+    }
+    return kept, stats
@@ -0,0 +1,195 @@
+import os
+import numpy as np
+from typing import List, Dict, Any
+
+ENCODER_BACKENDS = ("torch", "onnx", "onnx-int8")
+ONNX_CACHE_DIR = "onnx_models"
+
+# Sentences used to check that an exported encoder matches the PyTorch one
+PARITY_PROBES = [
+    "What is artificial intelligence?",
+    "Machine learning builds models from sample data to make predictions.",
+    "Neural networks consist of interconnected nodes that learn to recognize patterns.",
+    "The quick brown fox jumps over the lazy dog.",
+]
+
+# Minimum cosine similarity against the PyTorch embeddings per backend
+PARITY_TOLERANCE = {"onnx": 1e-4, "onnx-int8": 2e-2}
+
+
+def _hub_id(model_name: str) -> str:
+    """Expand short sentence-transformers names to their Hub id"""
+    return model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+
+class OnnxEncoder:
+    def __init__(self, model_dir: str, intra_op_threads: int = 0, max_seq_length: int = 256):
+        """
+        Sentence encoder running an exported transformer with ONNX Runtime
+
+        Mirrors the ``SentenceTransformer.encode`` interface used by the
+        chatbot: mean pooling over the last hidden state followed by L2
+        normalization.
+
+        Args:
+            model_dir: Directory holding model.onnx and the tokenizer files
+            intra_op_threads: ONNX Runtime intra-op threads (0 lets the runtime decide)
+            max_seq_length: Maximum tokens per input
+        """
+        from transformers import AutoTokenizer
+
+        self.model_dir = model_dir
+        self.max_seq_length = max_seq_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.intra_op_threads = None
+        self.set_num_threads(intra_op_threads)
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def set_num_threads(self, threads: int):
+        """(Re)create the inference session with the given intra-op thread count"""
+        import onnxruntime as ort
+
+        if threads == self.intra_op_threads:
+            return
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(os.path.join(self.model_dir, "model.onnx"), options,
+                                            providers=["CPUExecutionProvider"])
+        self.intra_op_threads = threads
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.session.get_outputs()[0].shape[-1]
+
+    def encode(self, sentences: List[str], batch_size: int = 32,
+               show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        """Encode sentences into normalized float32 embeddings"""
+        if isinstance(sentences, str):
+            sentences = [sentences]
+
+        # Sort by length so each batch pads to a similar size
+        order = np.argsort([-len(s) for s in sentences], kind="stable")
+        embeddings = [None] * len(sentences)
+
+        for start in range(0, len(sentences), batch_size):
+            batch_ids = order[start:start + batch_size]
+            tokens = self.tokenizer([sentences[i] for i in batch_ids], padding=True, truncation=True,
+                                    max_length=self.max_seq_length, return_tensors="np")
+            feeds = {name: tokens[name].astype(np.int64) for name in self.input_names}
+            hidden = self.session.run(None, feeds)[0]
+
+            mask = feeds["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+            for row, i in enumerate(batch_ids):
+                embeddings[i] = pooled[row]
+
+        if not embeddings:
+            return np.zeros((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+        return np.stack(embeddings).astype(np.float32)
+
+
+def export_onnx(model_name: str, output_dir: str, quantize: bool = False) -> str:
+    """
+    Export a sentence-transformers model to ONNX
+
+    Args:
+        model_name: Sentence-transformers model name
+        output_dir: Directory to write model.onnx and the tokenizer into
+        quantize: Apply dynamic int8 quantization to the exported weights
+
+    Returns:
+        The output directory
+    """
+    import torch
+    from transformers import AutoTokenizer, AutoModel
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(_hub_id(model_name))
+    model = AutoModel.from_pretrained(_hub_id(model_name)).eval()
+    tokenizer.save_pretrained(output_dir)
+
+    dummy = tokenizer(["export the encoder"], return_tensors="pt")
+    # Positional order of the BERT-family forward() signature
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in dummy]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    fp32_path = os.path.join(output_dir, "model_fp32.onnx" if quantize else "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(model, tuple(dummy[name] for name in input_names), fp32_path,
+                          input_names=input_names, output_names=["last_hidden_state"],
+                          dynamic_axes=dynamic_axes, opset_version=17)
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(fp32_path, os.path.join(output_dir, "model.onnx"), weight_type=QuantType.QInt8)
+        os.remove(fp32_path)
+
+    return output_dir
+
+
+def check_parity(reference, candidate, sentences: List[str] = None) -> Dict[str, Any]:
+    """
+    Compare two encoders on the same sentences
+
+    Returns:
+        Dictionary with the minimum and mean cosine similarity between the
+        normalized embeddings of the two encoders
+    """
+    sentences = sentences or PARITY_PROBES
+    ref = np.asarray(reference.encode(sentences), dtype=np.float32)
+    cand = np.asarray(candidate.encode(sentences), dtype=np.float32)
+    ref /= np.linalg.norm(ref, axis=1, keepdims=True)
+    cand /= np.linalg.norm(cand, axis=1, keepdims=True)
+    cosine = (ref * cand).sum(axis=1)
+    return {"min_cosine": float(cosine.min()), "mean_cosine": float(cosine.mean())}
+
+
+def load_encoder(model_name: str = "all-MiniLM-L6-v2", backend: str = "torch",
+                 cache_dir: str = ONNX_CACHE_DIR, intra_op_threads: int = 0):
+    """
+    Load the sentence encoder for the selected backend
+
+    The ONNX backends export the model on first use and check parity
+    against the PyTorch encoder before caching the export. If export or
+    parity fails, the PyTorch encoder is returned instead.
+
+    Args:
+        model_name: Sentence-transformers model name
+        backend: One of "torch", "onnx" or "onnx-int8"
+        cache_dir: Directory for exported ONNX models
+        intra_op_threads: ONNX Runtime intra-op threads (0 lets the runtime decide)
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if backend not in ENCODER_BACKENDS:
+        raise ValueError(f"Unknown encoder backend '{backend}', expected one of {ENCODER_BACKENDS}")
+
+    if backend == "torch":
+        return SentenceTransformer(model_name)
+
+    model_dir = os.path.join(cache_dir, f"{model_name.replace('/', '__')}-{backend}")
+    if os.path.exists(os.path.join(model_dir, "model.onnx")):
+        return OnnxEncoder(model_dir, intra_op_threads)
+
+    reference = SentenceTransformer(model_name)
+    try:
+        print(f"🔄 Exporting {model_name} to ONNX ({backend})...")
+        export_onnx(model_name, model_dir, quantize=backend == "onnx-int8")
+        encoder = OnnxEncoder(model_dir, intra_op_threads)
+
+        parity = check_parity(reference, encoder)
+        if parity["min_cosine"] < 1.0 - PARITY_TOLERANCE[backend]:
+            raise ValueError(f"embedding parity check failed (min cosine {parity['min_cosine']:.4f})")
+
+        print(f"✅ ONNX encoder ready (min cosine vs PyTorch: {parity['min_cosine']:.4f})")
+        return encoder
+
+    except Exception as e:
+        print(f"❌ ONNX encoder unavailable, using PyTorch: {e}")
+        if os.path.exists(os.path.join(model_dir, "model.onnx")):
+            os.remove(os.path.join(model_dir, "model.onnx"))
+        return reference
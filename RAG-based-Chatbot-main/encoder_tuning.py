@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import platform
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+# Next to this module, so every entrypoint finds it whatever the working directory
+TUNING_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "encoder_tuning.json")
+BATCH_SIZES = (1, 8, 16, 32, 64, 128)
+
+# Fallback texts when no corpus sample is supplied
+CALIBRATION_TEXTS = [
+    "What is artificial intelligence?",
+    "Machine learning is a subset of artificial intelligence that focuses on algorithms "
+    "and statistical models that improve their performance on a task through experience.",
+    "Neural networks are computing systems inspired by biological neural networks.",
+    "Deep learning uses neural networks with multiple layers to model complex patterns in data.",
+]
+
+
+def _thread_counts() -> List[int]:
+    """Powers of two up to the CPU count, plus the CPU count itself"""
+    cpus = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cpus:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cpus:
+        counts.append(cpus)
+    return counts
+
+
+def machine_key(backend: str) -> str:
+    """Identify the hardware/backend combination a calibration applies to"""
+    return f"{platform.node()}|{platform.machine()}|{os.cpu_count()}cpu|{backend}"
+
+
+def set_encoder_threads(encoder, threads: int):
+    """Set the intra-op thread count of an encoder"""
+    if hasattr(encoder, 'set_num_threads'):
+        encoder.set_num_threads(threads)
+    else:
+        import torch
+        torch.set_num_threads(threads)
+
+
+def _median_seconds(fn, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2]
+
+
+def calibrate(encoder, sample_texts: List[str] = None,
+              batch_sizes: tuple = BATCH_SIZES,
+              thread_counts: List[int] = None,
+              repeats: int = 5) -> Dict[str, Any]:
+    """
+    Benchmark the encoder on this machine and pick settings per workload
+
+    The interactive query workload is tuned for the lowest median latency
+    of a single-text encode. The bulk ingest workload is tuned for the
+    highest throughput over the sample texts.
+
+    Args:
+        encoder: Encoder exposing encode(texts, batch_size=...)
+        sample_texts: Representative corpus texts
+        batch_sizes: Batch sizes to try for ingestion
+        thread_counts: Thread counts to try (powers of two up to the CPU count by default)
+        repeats: Timed repetitions per query configuration
+
+    Returns:
+        Dictionary with "query" and "ingest" settings
+    """
+    texts = list(sample_texts or CALIBRATION_TEXTS)
+    while len(texts) < max(batch_sizes) * 2:
+        texts.extend(texts)
+    texts = texts[:max(batch_sizes) * 2]
+    thread_counts = thread_counts or _thread_counts()
+
+    query = {'threads': thread_counts[0], 'batch_size': 1, 'latency_ms': float('inf')}
+    ingest = {'threads': thread_counts[0], 'batch_size': batch_sizes[0], 'texts_per_sec': 0.0}
+
+    for threads in thread_counts:
+        set_encoder_threads(encoder, threads)
+        encoder.encode(texts[:1])  # warm-up
+
+        latency = _median_seconds(lambda: encoder.encode(texts[:1], batch_size=1), repeats)
+        if latency * 1000 < query['latency_ms']:
+            query = {'threads': threads, 'batch_size': 1, 'latency_ms': latency * 1000}
+
+        for batch_size in batch_sizes:
+            seconds = _median_seconds(lambda: encoder.encode(texts, batch_size=batch_size), 1)
+            rate = len(texts) / seconds
+            if rate > ingest['texts_per_sec']:
+                ingest = {'threads': threads, 'batch_size': batch_size, 'texts_per_sec': rate}
+
+        print(f"   {threads:>3} threads: query {latency * 1000:.1f} ms, best ingest so far "
+              f"{ingest['texts_per_sec']:.1f} texts/s")
+
+    return {'query': query, 'ingest': ingest, 'calibrated_at': datetime.now().isoformat()}
+
+
+def load_tuning(backend: str, tuning_file: str = TUNING_FILE) -> Optional[Dict[str, Any]]:
+    """Load the stored calibration for this machine and backend, if any"""
+    if not os.path.exists(tuning_file):
+        return None
+    try:
+        with open(tuning_file, 'r', encoding='utf-8') as f:
+            return json.load(f).get(machine_key(backend))
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Ignoring unreadable tuning file {tuning_file}: {e}")
+        return None
+
+
+def save_tuning(backend: str, tuning: Dict[str, Any], tuning_file: str = TUNING_FILE):
+    """Store a calibration for this machine and backend"""
+    profiles = {}
+    if os.path.exists(tuning_file):
+        try:
+            with open(tuning_file, 'r', encoding='utf-8') as f:
+                profiles = json.load(f)
+        except (OSError, ValueError):
+            profiles = {}
+    profiles[machine_key(backend)] = tuning
+    with open(tuning_file, 'w', encoding='utf-8') as f:
+        json.dump(profiles, f, indent=2)
+
+
+def get_or_calibrate(encoder, backend: str, sample_texts: List[str] = None,
+                     tuning_file: str = TUNING_FILE) -> Dict[str, Any]:
+    """Return the stored calibration, running and storing one if missing"""
+    tuning = load_tuning(backend, tuning_file)
+    if tuning is None:
+        print("⏱️ Calibrating encoder batch size and threads for this machine...")
+        tuning = calibrate(encoder, sample_texts)
+        save_tuning(backend, tuning, tuning_file)
+        print(f"✅ Encoder tuning saved to {tuning_file}")
+    return tuning
+
+
+if __name__ == "__main__":
+    import argparse
+    from encoder_backends import ENCODER_BACKENDS, load_encoder
+
+    parser = argparse.ArgumentParser(description='Calibrate encoder batch size and thread count')
+    parser.add_argument('--backend', default='torch', choices=ENCODER_BACKENDS)
+    parser.add_argument('--knowledge-file', default='knowledge.txt')
+    args = parser.parse_args()
+
+    sample = None
+    if os.path.exists(args.knowledge_file):
+        with open(args.knowledge_file, 'r', encoding='utf-8') as f:
+            sample = [p.strip() for p in f.read().split('\n\n') if p.strip()]
+
+    result = calibrate(load_encoder(backend=args.backend), sample)
+    save_tuning(args.backend, result)
+    print(json.dumps(result, indent=2))
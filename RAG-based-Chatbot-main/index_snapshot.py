@@ -0,0 +1,33 @@
+import time
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Tuple, Dict, Any, Optional, Sequence
+
+
+@dataclass(frozen=True)
+class IndexSnapshot:
+    """
+    Immutable bundle of everything retrieval reads
+
+    A snapshot is never modified after it is published. Updates build a
+    new snapshot and publish it with a single reference assignment, so a
+    reader that grabbed a snapshot sees chunks, index and sentence data
+    that belong together for the whole request, without taking a lock.
+    """
+    version: int
+    chunks: Sequence[str]  # tuple, or SharedStrings when backed by shared memory
+    index: Any  # faiss index or an object with the same search(); only searched, never added to after publishing
+    sentences: Sequence[str]
+    sentence_offsets: np.ndarray
+    sentence_embeddings: np.ndarray
+    dedup_stats: Optional[Dict[str, Any]] = None
+    knowledge_signature: Optional[Tuple[int, int]] = None
+    created_at: float = field(default_factory=time.time)
+
+    def __post_init__(self):
+        # Guard the shared arrays against accidental in-place writes
+        self.sentence_offsets.setflags(write=False)
+        self.sentence_embeddings.setflags(write=False)
+
+    def __len__(self) -> int:
+        return len(self.chunks)
@@ -0,0 +1,77 @@
+import time
+import threading
+
+
+class KnowledgeWatcher:
+    def __init__(self, chatbot, interval: float = 2.0, settle_time: float = 1.0):
+        """
+        Background watcher that hot-reloads a chatbot's knowledge file
+
+        Polls the file's modification time and size, which needs no extra
+        dependency and works on network filesystems. A change is only acted
+        on once the file has stopped changing for settle_time seconds, so a
+        half-written file is never ingested. A chatbot attached to a shared
+        index is polled for newly published versions instead.
+
+        Args:
+            chatbot: Llama4RAGChatbot whose knowledge file is watched
+            interval: Seconds between polls
+            settle_time: Seconds the file must stay unchanged before reloading
+        """
+        self.chatbot = chatbot
+        self.interval = interval
+        self.settle_time = settle_time
+        self.reload_count = 0
+        self.last_error = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start polling in a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._watch_loop, name="knowledge-watcher", daemon=True)
+        self._thread.start()
+        if self.chatbot.attach_shared:
+            print(f"👀 Watching shared index '{self.chatbot.attach_shared}' for new versions")
+        else:
+            print(f"👀 Watching {self.chatbot.knowledge_file} for changes")
+
+    def stop(self):
+        """Stop polling and wait for an in-progress reload to finish"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+
+    def _watch_loop(self):
+        pending_since = None
+        pending_signature = None
+        failed_signature = None
+
+        while not self._stop_event.wait(self.interval):
+            try:
+                if not self.chatbot.knowledge_base_changed():
+                    pending_since = pending_signature = None
+                    continue
+
+                signature = self.chatbot._knowledge_file_signature()
+                if signature == failed_signature:
+                    # Already failed on these contents; wait for the next edit
+                    continue
+                if signature != pending_signature:
+                    # Still being written; wait for it to settle
+                    pending_signature, pending_since = signature, time.monotonic()
+                    continue
+
+                if time.monotonic() - pending_since >= self.settle_time:
+                    print("🔄 Knowledge file changed, rebuilding index in the background...")
+                    self.chatbot.reload_knowledge_base()
+                    self.reload_count += 1
+                    pending_since = pending_signature = None
+                    print("✅ Knowledge base hot-reloaded")
+
+            except Exception as e:
+                failed_signature, pending_since, pending_signature = pending_signature, None, None
+                self.last_error = e
+                print(f"❌ Knowledge base hot-reload failed: {e}")
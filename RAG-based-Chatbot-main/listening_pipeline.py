@@ -0,0 +1,153 @@
+import time
+import queue
+import threading
+from typing import Callable
+from metrics import METRICS
+
+_STOP = object()
+
+
+class ListeningPipeline:
+    def __init__(self, capture, stt, callback: Callable[[str], None], workers: int = 2,
+                 max_pending: int = 4, drop_oldest: bool = False,
+                 stop_event: threading.Event = None):
+        """
+        Continuous listening split into capture, recognition and dispatch stages
+
+        The capture thread collects utterances from the microphone stream and
+        puts them on a bounded queue; a pool of recognition workers transcribes
+        them in parallel; a dispatcher hands transcripts to the callback in the
+        order they were spoken. The microphone is never paused for recognition.
+
+        When the recognition queue is full the capture stage waits (audio keeps
+        being buffered by the microphone stream), or with drop_oldest the
+        stalest pending utterance is discarded so the assistant stays current.
+
+        Args:
+            capture: MicrophoneStream providing utterances
+            stt: STTBackend used by the recognition workers
+            callback: Called with each non-empty transcript, in speaking order
+            workers: Recognition worker threads
+            max_pending: Utterances waiting for a worker before backpressure applies
+            drop_oldest: Drop the oldest pending utterance instead of waiting
+            stop_event: Event that stops the pipeline (created if None)
+        """
+        self.capture = capture
+        self.stt = stt
+        self.callback = callback
+        self.workers = workers
+        self.drop_oldest = drop_oldest
+        self.stop_event = stop_event or threading.Event()
+        self.audio_queue = queue.Queue(maxsize=max_pending)
+        self.results_queue = queue.Queue(maxsize=max_pending)
+        self.dropped = 0
+        self._threads = []
+
+    def start(self):
+        """Start all stages; returns the stop event"""
+        self._threads = [threading.Thread(target=self._capture_loop, name="listen-capture", daemon=True),
+                         threading.Thread(target=self._dispatch_loop, name="listen-dispatch", daemon=True)]
+        self._threads += [threading.Thread(target=self._recognize_loop, name=f"listen-stt-{i}", daemon=True)
+                          for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+        return self.stop_event
+
+    def stop(self, timeout: float = None):
+        """Stop listening; utterances still queued are discarded"""
+        self.stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    @property
+    def is_running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def queue_depths(self) -> dict:
+        return {"recognition": self.audio_queue.qsize(), "dispatch": self.results_queue.qsize()}
+
+    def _report_depths(self):
+        for stage, depth in self.queue_depths().items():
+            METRICS.set_gauge("listen_queue_depth", depth, stage=stage)
+
+    def _put(self, target: queue.Queue, item):
+        """Blocking put that gives up if the pipeline is stopped"""
+        while not self.stop_event.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _capture_loop(self):
+        sequence = 0
+        try:
+            for pcm in self.capture.utterances(self.stop_event):
+                item = (sequence, pcm, time.perf_counter())
+                sequence += 1
+                if self.audio_queue.full():
+                    METRICS.inc("listen_backpressure_total")
+                    if self.drop_oldest:
+                        try:
+                            stale, _, captured = self.audio_queue.get_nowait()
+                            # The dispatcher still expects this sequence number
+                            if not self._put(self.results_queue, (stale, None, captured, None)):
+                                break
+                            self.dropped += 1
+                            METRICS.inc("listen_dropped_total")
+                        except queue.Empty:
+                            pass
+                if not self._put(self.audio_queue, item):
+                    break
+                self._report_depths()
+        except Exception as e:
+            print(f"❌ Continuous listening error: {e}")
+        finally:
+            for _ in range(self.workers):
+                self.audio_queue.put(_STOP)
+
+    def _recognize_loop(self):
+        while True:
+            item = self.audio_queue.get()
+            if item is _STOP:
+                self.results_queue.put(_STOP)
+                return
+            sequence, pcm, captured = item
+            METRICS.observe("listen_queue", time.perf_counter() - captured)
+            self._report_depths()
+            text = None
+            if not self.stop_event.is_set():
+                try:
+                    with METRICS.timer("stt"):
+                        text = self.stt.transcribe(pcm, self.capture.sample_rate)
+                except Exception as e:
+                    print(f"❌ Speech recognition error: {e}")
+            self.results_queue.put((sequence, text, captured, time.perf_counter()))
+
+    def _dispatch_loop(self):
+        # Workers finish out of order; hold results until all earlier utterances are in
+        waiting = {}
+        next_sequence = 0
+        finished_workers = 0
+        while finished_workers < self.workers:
+            item = self.results_queue.get()
+            if item is _STOP:
+                finished_workers += 1
+                continue
+            sequence, text, captured, recognized = item
+            waiting[sequence] = (text, captured, recognized)
+            self._report_depths()
+
+            while next_sequence in waiting:
+                text, captured, recognized = waiting.pop(next_sequence)
+                next_sequence += 1
+                if not text or self.stop_event.is_set():
+                    continue
+                METRICS.observe("listen_dispatch", time.perf_counter() - recognized)
+                try:
+                    self.callback(text)
+                except Exception as e:
+                    print(f"❌ Listening callback error: {e}")
+                METRICS.observe("listen_total", time.perf_counter() - captured)
+        self._report_depths()
@@ -14,6 +14,7 @@ import os
 import sys
 import subprocess
 import argparse
+import importlib.util
 
 def print_banner():
     """Print the application banner"""
@@ -50,10 +51,14 @@ def check_dependencies():
     
     missing_packages = []
     
+    # Locate each package without importing it; importing torch and
+    # sentence_transformers alone takes seconds and hundreds of MB
     for pkg_name, import_name in required_packages:
         try:
-            __import__(import_name)
-        except ImportError:
+            found = importlib.util.find_spec(import_name) is not None
+        except (ImportError, ValueError):
+            found = False
+        if not found:
             missing_packages.append(pkg_name)
     
     if missing_packages:
@@ -100,6 +105,27 @@ def run_cli():
     except Exception as e:
         print(f"❌ Failed to start CLI: {e}")
 
+def run_http_server():
+    """Run the HTTP query service"""
+    print("🌐 Starting HTTP query service...")
+    print("⏹️  Press Ctrl+C to stop the server")
+    
+    try:
+        from server import run_server
+        run_server()
+    except Exception as e:
+        print(f"❌ Failed to start HTTP service: {e}")
+
+def run_batch(directory: str):
+    """Transcribe and answer a directory of recorded questions"""
+    try:
+        from batch_audio import run_batch as run_audio_batch
+        run_audio_batch(directory)
+    except KeyboardInterrupt:
+        print("\n👋 Batch processing stopped by user")
+    except Exception as e:
+        print(f"❌ Batch processing failed: {e}")
+
 def run_quick_test():
     """Run a quick test of the chatbot"""
     print("🧪 Running quick test...")
@@ -186,7 +212,8 @@ def update_knowledge_base():
             with open(knowledge_file, 'a', encoding='utf-8') as f:
                 f.write(f"\n\n{new_content}")
             print("✅ Knowledge base updated successfully!")
-            print("🔄 Restart the chatbot to load the new content.")
+            print("🔄 The web GUI and chatbots started with knowledge watching reload it automatically.")
+            print("   Restart other running chatbots to load the new content.")
         except Exception as e:
             print(f"❌ Failed to update knowledge base: {e}")
     else:
@@ -218,6 +245,10 @@ def show_help():
 • Real-time updates
 • RAG-based responses
 
+🌐 HTTP Service:
+• python main.py --server (or python server.py --port 8000)
+• Endpoints: /query, /retrieve, /ingest, /health
+
 ⚙️ Technical Details:
 • Model: Llama-4-Maverick-17B-128E-Instruct
 • Embeddings: Sentence Transformers
@@ -243,6 +274,8 @@ def main():
     parser.add_argument('--gui', action='store_true', help='Launch GUI directly')
     parser.add_argument('--cli', action='store_true', help='Launch CLI directly')
     parser.add_argument('--test', action='store_true', help='Run quick test')
+    parser.add_argument('--server', action='store_true', help='Launch HTTP query service')
+    parser.add_argument('--batch', metavar='DIR', help='Transcribe and answer the WAV files in DIR')
     parser.add_argument('--check-deps', action='store_true', help='Check dependencies')
     
     args = parser.parse_args()
@@ -262,6 +295,10 @@ def main():
         run_cli()
     elif args.test:
         run_quick_test()
+    elif args.server:
+        run_http_server()
+    elif args.batch:
+        run_batch(args.batch)
     elif args.check_deps:
         check_dependencies()
     else:
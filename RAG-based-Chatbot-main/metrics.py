@@ -0,0 +1,176 @@
+import os
+import time
+import bisect
+import threading
+from typing import Dict, Any, Tuple
+
+# Upper bounds in seconds; the last bucket catches everything else
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                   0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float('inf'))
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        """Fixed-bucket latency histogram"""
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket that contains it"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+
+class _NullTimer:
+    """Shared no-op context manager returned while metrics are disabled"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _StageTimer:
+    __slots__ = ("registry", "stage", "start")
+
+    def __init__(self, registry, stage):
+        self.registry = registry
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool = True, prefix: str = "rag"):
+        """
+        Per-stage latency histograms, event counters and gauges for the RAG pipeline
+
+        When disabled, timer() returns a shared no-op context manager and
+        observe()/inc() return immediately, so instrumentation left in the
+        hot path costs one attribute check.
+
+        Args:
+            enabled: Whether to record anything
+            prefix: Metric name prefix in the Prometheus export
+        """
+        self.enabled = enabled
+        self.prefix = prefix
+        self._histograms: Dict[str, Histogram] = {}
+        self._counters: Dict[Tuple[str, Tuple], float] = {}
+        self._gauges: Dict[Tuple[str, Tuple], float] = {}
+        self._lock = threading.Lock()
+
+    def timer(self, stage: str):
+        """Context manager that records the wall time of a pipeline stage"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, stage)
+
+    def observe(self, stage: str, seconds: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set_gauge(self, name: str, value: float, **labels):
+        """Record the current value of something that goes up and down, e.g. a queue depth"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-stage count, mean and estimated p50/p95/p99, plus counters and gauges"""
+        with self._lock:
+            stages = {
+                stage: {
+                    "count": h.count,
+                    "mean": h.sum / h.count if h.count else 0.0,
+                    "p50": h.quantile(0.50),
+                    "p95": h.quantile(0.95),
+                    "p99": h.quantile(0.99),
+                }
+                for stage, h in self._histograms.items()
+            }
+            counters = {self._format_name(name, labels): value
+                        for (name, labels), value in self._counters.items()}
+            gauges = {self._format_name(name, labels): value
+                      for (name, labels), value in self._gauges.items()}
+        return {"stages": stages, "counters": counters, "gauges": gauges}
+
+    @staticmethod
+    def _format_name(name: str, labels: Tuple) -> str:
+        if not labels:
+            return name
+        return name + "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+    def render_prometheus(self) -> str:
+        """Export all metrics in the Prometheus text exposition format"""
+        name = f"{self.prefix}_stage_latency_seconds"
+        lines = [f"# HELP {name} Latency of each RAG pipeline stage",
+                 f"# TYPE {name} histogram"]
+
+        with self._lock:
+            for stage, h in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, count in zip(h.buckets, h.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float('inf') else repr(bound)
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {h.sum}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {h.count}')
+
+            declared = set()
+            for kind, values in (("counter", self._counters), ("gauge", self._gauges)):
+                for (metric, labels), value in sorted(values.items()):
+                    full_name = f"{self.prefix}_{metric}"
+                    if full_name not in declared:
+                        lines.append(f"# TYPE {full_name} {kind}")
+                        declared.add(full_name)
+                    lines.append(f"{self._format_name(full_name, labels)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry; set RAG_METRICS=0 to disable recording
+METRICS = MetricsRegistry(enabled=os.environ.get("RAG_METRICS", "1") != "0")
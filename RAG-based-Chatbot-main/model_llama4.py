@@ -1,9 +1,25 @@
 import os
+import re
+import time
+import threading
 import numpy as np
-import faiss
-from typing import List, Dict, Any
-from huggingface_hub import InferenceClient, login
-from sentence_transformers import SentenceTransformer
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterator, Tuple
+# faiss, huggingface_hub and the encoder libraries are imported where first used,
+# so importing this module (and the CLI, GUI and server) stays fast
+from dedup import deduplicate_chunks
+from encoder_backends import load_encoder
+from parallel_encoding import encode_parallel
+from encoder_tuning import get_or_calibrate, load_tuning, set_encoder_threads
+from conversation_memory import SessionStore, count_tokens
+from knowledge_watcher import KnowledgeWatcher
+from index_snapshot import IndexSnapshot
+from sharded_index import ShardPool
+from shared_index import SharedIndexPublisher, attach_snapshot, published_version
+from metrics import METRICS
+from tracing import TRACER, PROFILER, run_in_own_context
+
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
 
 class Llama4RAGChatbot:
     def __init__(self, model_name: str = "meta-llama/Llama-4-Maverick-17B-128E-Instruct", 
@@ -11,7 +27,22 @@ class Llama4RAGChatbot:
                  knowledge_file: str = "knowledge.txt",
                  chunk_size: int = 512,
                  chunk_overlap: int = 50,
-                 top_k: int = 3):
+                 top_k: int = 3,
+                 fallback_sentences: int = 2,
+                 fallback_min_score: float = 0.3,
+                 dedup_threshold: float = 0.9,
+                 encoder_backend: str = "torch",
+                 ingest_workers: int = 1,
+                 ingest_threads_per_worker: int = 1,
+                 ingest_batch_size: int = None,
+                 encoder_tuning: str = "saved",
+                 memory_turns: int = 20,
+                 memory_token_budget: int = 512,
+                 watch_knowledge: bool = False,
+                 index_shards: int = 0,
+                 shard_addresses: List[str] = None,
+                 publish_shared: str = None,
+                 attach_shared: str = None):
         """
         Initialize the RAG Chatbot with Llama-4-Maverick model
         
@@ -22,6 +53,24 @@ class Llama4RAGChatbot:
             chunk_size: Size of text chunks for embedding
             chunk_overlap: Overlap between chunks
             top_k: Number of top relevant chunks to retrieve
+            fallback_sentences: Number of sentences used by the extractive fallback
+            fallback_min_score: Minimum cosine similarity for a fallback sentence
+            dedup_threshold: Similarity above which chunks are dropped as near-duplicates (None disables)
+            encoder_backend: Sentence encoder runtime ("torch", "onnx" or "onnx-int8")
+            ingest_workers: Encoder processes used to embed the corpus (1 encodes in-process)
+            ingest_threads_per_worker: Intra-op threads for each ingest worker
+            ingest_batch_size: Encoder batch size during ingestion (tuned value or 32 if None)
+            encoder_tuning: "saved" applies the calibration made with `python encoder_tuning.py`
+                if there is one, "auto" calibrates on first start when there is none,
+                "off" keeps library defaults
+            memory_turns: Conversation turns kept verbatim per session
+            memory_token_budget: Tokens of conversation history included in the prompt
+            watch_knowledge: Reload the knowledge base in the background when the file changes
+            index_shards: Worker processes the chunk index is partitioned over (0 keeps it in-process)
+            shard_addresses: "host:port" of remote shard nodes (see sharded_index.py serve)
+            publish_shared: Publish the chunks and index in shared memory under this name
+            attach_shared: Attach read-only to the index published under this name instead of
+                loading the knowledge file; follows the publisher's reloads when watching
         """
         self.model_name = model_name
         self.hf_token = hf_token
@@ -29,16 +78,50 @@ class Llama4RAGChatbot:
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.top_k = top_k
+        self.fallback_sentences = fallback_sentences
+        self.fallback_min_score = fallback_min_score
+        self.dedup_threshold = dedup_threshold
+        self.encoder_backend = encoder_backend
+        self.ingest_workers = ingest_workers
+        self.ingest_threads_per_worker = ingest_threads_per_worker
+        self.ingest_batch_size = ingest_batch_size
+        self.encoder_tuning = encoder_tuning
+        self.query_threads = None
+        self.ingest_threads = None
+        self._serving = False
+        self.sessions = SessionStore(capacity=memory_turns, token_budget=memory_token_budget)
+        self.watcher = None
+        self._reload_lock = threading.Lock()
+        self.attach_shared = attach_shared
+        if (index_shards or shard_addresses) and (publish_shared or attach_shared):
+            raise ValueError("A sharded index cannot be published in or attached from shared memory")
+        self.shard_pool = ShardPool(index_shards, shard_addresses) if index_shards or shard_addresses else None
+        self.shared_publisher = None
+        if publish_shared:
+            self.shared_publisher = SharedIndexPublisher(publish_shared, metadata={"embedding_model": EMBEDDING_MODEL})
         
         # Initialize components
         self._login_hf()
         self._load_inference_client()
-        self._load_knowledge_base()
-        self._create_embeddings()
+        if attach_shared:
+            # Another process owns the knowledge base; no chunking or embedding here
+            self.snapshot = attach_snapshot(attach_shared, EMBEDDING_MODEL)
+            self._apply_encoder_tuning(self.snapshot.chunks[:256])
+        else:
+            chunks, dedup_stats, signature = self._chunk_knowledge_base()
+            self._apply_encoder_tuning(chunks[:256])
+            self.snapshot = self._publish(self._build_snapshot(chunks, dedup_stats, signature, version=1))
+        
+        # From here on queries may run concurrently with reloads
+        self._serving = True
+        
+        if watch_knowledge:
+            self.start_watching()
         
     def _login_hf(self):
         """Login to Hugging Face"""
         try:
+            from huggingface_hub import login
             login(token=self.hf_token)
             print("✅ Successfully logged in to HuggingFace")
         except Exception as e:
@@ -49,25 +132,76 @@ class Llama4RAGChatbot:
         """Load the InferenceClient for online API calls"""
         try:
             print(f"🔄 Setting up InferenceClient for {self.model_name}...")
+            from huggingface_hub import InferenceClient
             self.client = InferenceClient(token=self.hf_token)
             print("✅ InferenceClient ready")
             
             # Load sentence transformer for embeddings
-            self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+            self.embedding_model = load_encoder(EMBEDDING_MODEL, self.encoder_backend)
             print("✅ All models loaded successfully")
             
         except Exception as e:
             print(f"❌ Failed to set up InferenceClient: {e}")
             raise
     
-    def _load_knowledge_base(self):
-        """Load and chunk the knowledge base"""
+    def _apply_encoder_tuning(self, sample_texts: List[str]):
+        """Apply the calibrated encoder batch size and thread counts for this machine"""
+        tuning = None
+        try:
+            if self.encoder_tuning == "auto":
+                tuning = get_or_calibrate(self.embedding_model, self.encoder_backend, sample_texts)
+            elif self.encoder_tuning == "saved":
+                tuning = load_tuning(self.encoder_backend)
+        except Exception as e:
+            print(f"⚠️ Encoder tuning skipped: {e}")
+        
+        if tuning:
+            self.query_threads = tuning['query']['threads']
+            self.ingest_threads = tuning['ingest']['threads']
+            if self.ingest_batch_size is None:
+                self.ingest_batch_size = tuning['ingest']['batch_size']
+            set_encoder_threads(self.embedding_model, self.query_threads)
+            print(f"✅ Encoder tuned: query {self.query_threads} threads, "
+                  f"ingest {self.ingest_threads} threads x batch {self.ingest_batch_size}")
+        
+        if self.ingest_batch_size is None:
+            self.ingest_batch_size = 32
+    
+    # Read-only views of the current snapshot, for callers outside a request
+    @property
+    def chunks(self) -> Tuple[str, ...]:
+        return self.snapshot.chunks
+    
+    @property
+    def index(self):
+        return self.snapshot.index
+    
+    @property
+    def dedup_stats(self) -> Dict[str, Any]:
+        return self.snapshot.dedup_stats
+    
+    @property
+    def snapshot_version(self) -> int:
+        return self.snapshot.version
+    
+    def _knowledge_file_signature(self):
+        """Modification time and size identifying the current knowledge file contents"""
+        if self.attach_shared:
+            # Attached instances follow the publisher's version instead of a file
+            return published_version(self.attach_shared)
+        stat = os.stat(self.knowledge_file)
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _chunk_knowledge_base(self):
+        """Read and chunk the knowledge file, returning (chunks, dedup_stats, signature)"""
         try:
             print("📚 Loading knowledge base...")
             
             if not os.path.exists(self.knowledge_file):
                 raise FileNotFoundError(f"Knowledge file {self.knowledge_file} not found")
             
+            # Taken before reading so that later writes always register as a change
+            signature = self._knowledge_file_signature()
             with open(self.knowledge_file, 'r', encoding='utf-8') as f:
                 content = f.read()
             
@@ -75,154 +209,522 @@ class Llama4RAGChatbot:
             paragraphs = [p.strip() for p in content.split('\n\n') if p.strip()]
             
             # Create chunks with overlap
-            self.chunks = []
+            chunks = []
             for paragraph in paragraphs:
                 if len(paragraph) <= self.chunk_size:
-                    self.chunks.append(paragraph)
+                    chunks.append(paragraph)
                 else:
                     # Split long paragraphs into chunks
                     words = paragraph.split()
                     for i in range(0, len(words), self.chunk_size - self.chunk_overlap):
                         chunk = ' '.join(words[i:i + self.chunk_size])
                         if chunk.strip():
-                            self.chunks.append(chunk)
+                            chunks.append(chunk)
             
-            print(f"✅ Knowledge base loaded: {len(self.chunks)} chunks created")
+            # Drop near-duplicate chunks before they reach the embedder
+            dedup_stats = None
+            if self.dedup_threshold is not None:
+                chunks, dedup_stats = deduplicate_chunks(chunks, self.dedup_threshold)
+                if dedup_stats['removed_chunks']:
+                    print(f"🧹 Removed {dedup_stats['removed_chunks']} near-duplicate chunks")
+            
+            print(f"✅ Knowledge base loaded: {len(chunks)} chunks created")
+            return chunks, dedup_stats, signature
             
         except Exception as e:
             print(f"❌ Failed to load knowledge base: {e}")
             raise
     
-    def _create_embeddings(self):
-        """Create embeddings for knowledge chunks"""
+    def _publish(self, snapshot: IndexSnapshot) -> IndexSnapshot:
+        """Move a freshly built snapshot into shared memory when publishing"""
+        if self.shared_publisher is None:
+            return snapshot
+        return self.shared_publisher.publish(snapshot)
+    
+    def _build_snapshot(self, chunks: List[str], dedup_stats: Dict[str, Any],
+                        signature, version: int) -> IndexSnapshot:
+        """Embed chunks and their sentences into a new, unpublished snapshot"""
         try:
+            import faiss
             print("🔍 Creating embeddings...")
             
-            # Generate embeddings for all chunks
-            embeddings = self.embedding_model.encode(self.chunks, show_progress_bar=True)
+            sentences, offsets = self._split_corpus_sentences(chunks)
             
-            # Create FAISS index for efficient similarity search
-            dimension = embeddings.shape[1]
-            self.index = faiss.IndexFlatIP(dimension)  # Inner Product for cosine similarity
+            # Chunks and sentences share one encoder call, so parallel ingest starts its workers once
+            start = time.perf_counter()
+            all_embeddings = self._encode_corpus(chunks + sentences, show_progress_bar=True)
+            # Chunks' share of the encode time, for the dedup savings estimate
+            embed_seconds = (time.perf_counter() - start) * len(chunks) / max(len(all_embeddings), 1)
             
             # Normalize embeddings for cosine similarity
-            faiss.normalize_L2(embeddings)
-            self.index.add(embeddings.astype('float32'))
+            dimension = all_embeddings.shape[1]
+            faiss.normalize_L2(all_embeddings)
+            embeddings = all_embeddings[:len(chunks)]
+            
+            if self.shard_pool:
+                # Shard workers hold the vectors; the snapshot gets a view searched by scatter-gather
+                index = self.shard_pool.publish(version, chunks, embeddings)
+            else:
+                # Create FAISS index for efficient similarity search
+                index = faiss.IndexFlatIP(dimension)  # Inner Product for cosine similarity
+                index.add(embeddings.astype('float32'))
             
-            print(f"✅ Embeddings created: {len(self.chunks)} chunks indexed")
+            print(f"✅ Embeddings created: {len(chunks)} chunks indexed")
+            self._report_dedup_savings(dedup_stats, len(chunks), dimension, embed_seconds)
+            
+            return IndexSnapshot(
+                version=version,
+                chunks=tuple(chunks),
+                index=index,
+                dedup_stats=dedup_stats,
+                knowledge_signature=signature,
+                sentences=tuple(sentences),
+                sentence_offsets=offsets,
+                sentence_embeddings=all_embeddings[len(chunks):],
+            )
             
         except Exception as e:
             print(f"❌ Failed to create embeddings: {e}")
             raise
     
+    def _encode_corpus(self, texts: List[str], show_progress_bar: bool = False) -> np.ndarray:
+        """Encode corpus texts, sharding them across worker processes when configured"""
+        if self.ingest_workers > 1 and len(texts) > self.ingest_workers * self.ingest_batch_size:
+            print(f"⚙️ Encoding {len(texts)} texts with {self.ingest_workers} workers "
+                  f"x {self.ingest_threads_per_worker} threads")
+            return encode_parallel(texts, EMBEDDING_MODEL, self.encoder_backend,
+                                   num_workers=self.ingest_workers,
+                                   threads_per_worker=self.ingest_threads_per_worker,
+                                   batch_size=self.ingest_batch_size)
+        
+        # The encoder's thread count is shared with queries (process-wide for torch), so the
+        # ingest setting is only used for the initial build, before any query can run
+        retune = self.ingest_threads and not self._serving and self.ingest_threads != self.query_threads
+        if retune:
+            set_encoder_threads(self.embedding_model, self.ingest_threads)
+        try:
+            embeddings = self.embedding_model.encode(texts, batch_size=self.ingest_batch_size,
+                                                     show_progress_bar=show_progress_bar)
+        finally:
+            if retune and self.query_threads:
+                set_encoder_threads(self.embedding_model, self.query_threads)
+        return np.asarray(embeddings, dtype='float32')
+    
+    @staticmethod
+    def _report_dedup_savings(dedup_stats: Dict[str, Any], num_chunks: int,
+                              dimension: int, embed_seconds: float):
+        """Estimate the index size and embedding time saved by deduplication"""
+        if not dedup_stats or not dedup_stats['removed_chunks']:
+            return
+        
+        removed = dedup_stats['removed_chunks']
+        per_chunk = embed_seconds / max(num_chunks, 1)
+        dedup_stats['index_bytes_saved'] = removed * dimension * 4
+        dedup_stats['embedding_seconds_saved'] = removed * per_chunk
+        
+        print(f"💾 Deduplication saved {dedup_stats['index_bytes_saved'] / 1024:.1f} KiB of index "
+              f"({dedup_stats['removed_ratio']:.1%}) and ~{dedup_stats['embedding_seconds_saved']:.2f}s of embedding")
+    
+    def _split_corpus_sentences(self, chunks: List[str]) -> Tuple[List[str], np.ndarray]:
+        """Split chunks into the sentences embedded for the extractive fallback"""
+        sentences = []
+        offsets = [0]
+        for chunk in chunks:
+            sentences.extend(self._split_sentences(chunk))
+            offsets.append(len(sentences))
+        
+        # Sentences of chunk i live in sentences[offsets[i]:offsets[i + 1]]
+        return sentences, np.array(offsets, dtype=np.int64)
+    
+    @staticmethod
+    def _split_sentences(text: str) -> List[str]:
+        """Split text into sentences on terminal punctuation"""
+        return [s.strip() for s in re.split(r'(?<=[.!?])\s+', text) if len(s.strip()) > 1]
+    
+    def _encode_query(self, query: str) -> np.ndarray:
+        """Encode and L2-normalize a query"""
+        return self._encode_queries([query])
+    
+    def _encode_queries(self, queries: List[str]) -> np.ndarray:
+        """Encode and L2-normalize several queries in one encoder call"""
+        import faiss
+        query_embeddings = self.embedding_model.encode(queries).astype('float32')
+        faiss.normalize_L2(query_embeddings)
+        return query_embeddings
+    
+    def _search(self, snapshot: IndexSnapshot, query_embedding: np.ndarray, top_k: int = None):
+        """Return the scores and indices of the top_k chunks of a snapshot for a normalized query embedding"""
+        scores, indices = snapshot.index.search(query_embedding, top_k or self.top_k)
+        found = indices[0] >= 0
+        return scores[0][found], indices[0][found]
+    
+    def retrieve(self, query: str, top_k: int = None, return_metadata: bool = False):
+        """
+        Retrieve the most relevant chunks with their similarity scores
+        
+        Args:
+            query: User query
+            top_k: Number of chunks to return (defaults to self.top_k)
+            return_metadata: Return {"results": [...], "snapshot_version": n} instead of the list
+        """
+        snapshot = self.snapshot
+        scores, indices = self._search(snapshot, self._encode_query(query), top_k)
+        results = [{"chunk_id": int(i), "score": float(score), "text": snapshot.chunks[i]}
+                   for score, i in zip(scores, indices)]
+        if return_metadata:
+            return {"results": results, "snapshot_version": snapshot.version}
+        return results
+    
     def _retrieve_relevant_chunks(self, query: str) -> List[str]:
         """Retrieve most relevant chunks for a given query"""
         try:
-            # Generate query embedding
-            query_embedding = self.embedding_model.encode([query])
-            faiss.normalize_L2(query_embedding)
-            
-            # Search for similar chunks
-            scores, indices = self.index.search(query_embedding.astype('float32'), self.top_k)
+            # Generate query embedding and search for similar chunks
+            snapshot = self.snapshot
+            _, indices = self._search(snapshot, self._encode_query(query))
             
             # Return relevant chunks
-            relevant_chunks = [self.chunks[i] for i in indices[0]]
+            relevant_chunks = [snapshot.chunks[i] for i in indices]
             return relevant_chunks
             
         except Exception as e:
             print(f"❌ Failed to retrieve chunks: {e}")
             return []
     
-    def _generate_with_inference_api(self, prompt: str) -> str:
+    def _generate_with_inference_api(self, prompt: str,
+                                     query_embedding: np.ndarray = None,
+                                     chunk_ids: np.ndarray = None,
+                                     snapshot: IndexSnapshot = None) -> str:
         """Generate response using Inference API"""
         try:
             print("🌐 Using Hugging Face Inference API...")
-            response = self.client.text_generation(
-                model=self.model_name,
-                prompt=prompt,
-                max_new_tokens=200,
-                temperature=0.7,
-            )
+            with METRICS.timer("generate"), TRACER.span("generate", model=self.model_name, max_new_tokens=200):
+                response = self.client.text_generation(
+                    model=self.model_name,
+                    prompt=prompt,
+                    max_new_tokens=200,
+                    temperature=0.7,
+                )
             return response
         except Exception as e:
             print(f"❌ Inference API generation failed: {e}")
-            return self._generate_simple_response(prompt)
+            METRICS.inc("fallbacks_total")
+            with METRICS.timer("fallback"), TRACER.span("fallback", reason=str(e)):
+                if query_embedding is None:
+                    question = prompt.split("Question:")[-1].split("Answer:")[0].strip()
+                    query_embedding = self._encode_query(question)
+                return self._generate_simple_response(query_embedding, chunk_ids, snapshot)
     
-    def _generate_simple_response(self, prompt: str) -> str:
-        """Generate a simple response based on context without model"""
+    def _generate_simple_response(self, query_embedding: np.ndarray,
+                                  chunk_ids: np.ndarray = None,
+                                  snapshot: IndexSnapshot = None) -> str:
+        """
+        Generate an extractive response without the model
+        
+        Scores the precomputed sentence embeddings of the retrieved chunks
+        against the query embedding with a single matrix multiply and
+        returns the best matching sentences in their original order.
+        
+        Args:
+            query_embedding: Normalized query embedding of shape (1, dim)
+            chunk_ids: Indices of the retrieved chunks (all chunks if None)
+            snapshot: Snapshot the chunk ids refer to (the current one if None)
+        """
         try:
-            # Extract the question from the prompt
-            if "Question:" in prompt:
-                question = prompt.split("Question:")[-1].split("Answer:")[0].strip()
-            else:
-                question = prompt
+            snapshot = snapshot or self.snapshot
+            offsets = snapshot.sentence_offsets
+            if chunk_ids is None:
+                chunk_ids = np.arange(len(offsets) - 1)
             
-            # Extract context from the prompt
-            if "Context:" in prompt:
-                context = prompt.split("Context:")[-1].split("Question:")[0].strip()
-            else:
-                context = ""
+            # Gather the sentence rows belonging to the retrieved chunks
+            candidates = np.array([j for i in chunk_ids for j in range(offsets[i], offsets[i + 1])],
+                                  dtype=np.int64)
             
-            # Simple response generation based on context
-            if context:
-                # Find the most relevant sentence from context
-                sentences = context.split('.')
-                relevant_sentences = []
-                
-                # Look for sentences that contain keywords from the question
-                question_words = question.lower().split()
-                for sentence in sentences:
-                    sentence_lower = sentence.lower()
-                    if any(word in sentence_lower for word in question_words if len(word) > 3):
-                        relevant_sentences.append(sentence.strip())
-                
-                if relevant_sentences:
-                    return f"Based on the information available: {relevant_sentences[0]}."
-                else:
-                    return "I don't have specific information about that in my knowledge base, but I can help you with other topics."
-            else:
+            if candidates.size == 0:
                 return "I don't have information about that in my knowledge base. Please ask me about topics covered in my knowledge base."
+            
+            scores = snapshot.sentence_embeddings[candidates] @ query_embedding[0]
+            order = np.argsort(-scores)[:self.fallback_sentences]
+            best = [candidates[i] for i in order if scores[i] >= self.fallback_min_score]
+            
+            if best:
+                answer = " ".join(snapshot.sentences[i] for i in sorted(best))
+                return f"Based on the information available: {answer}"
+            else:
+                return "I don't have specific information about that in my knowledge base, but I can help you with other topics."
                 
         except Exception as e:
             return f"I apologize, but I encountered an error while processing your request: {str(e)}"
     
-    def generate_response(self, query: str) -> str:
-        """Generate a response using RAG with Llama-4-Maverick"""
-        try:
-            # Retrieve relevant chunks
-            relevant_chunks = self._retrieve_relevant_chunks(query)
-            context = "\n\n".join(relevant_chunks)
-            
-            # Create prompt for the model
-            prompt = f"Answer the following question using ONLY the provided context. If the answer is not in the context, say 'I don't have information about that in my knowledge base.'\n\nContext:\n{context}\n\nQuestion: {query}\nAnswer:"
-            
-            # Generate response using appropriate method
-            response = self._generate_with_inference_api(prompt)
-            
-            return response
+    def _build_prompt(self, query: str, relevant_chunks: List[str], conversation: str = "") -> str:
+        """Create the RAG prompt for the model"""
+        context = "\n\n".join(relevant_chunks)
+        history = f"Conversation so far:\n{conversation}\n\n" if conversation else ""
+        return f"Answer the following question using ONLY the provided context. If the answer is not in the context, say 'I don't have information about that in my knowledge base.'\n\nContext:\n{context}\n\n{history}Question: {query}\nAnswer:"
+    
+    def _prepare_generation(self, query: str, session_id: str = None):
+        """Retrieve context for a query, using the session's conversation memory if any"""
+        memory = self.sessions.get(session_id) if session_id else None
+        
+        # Every read for this request goes through the one snapshot grabbed here
+        snapshot = self.snapshot
+        
+        # Follow-up questions retrieve with the preceding user turns
+        retrieval_query = memory.retrieval_query(query) if memory else query
+        with TRACER.span("retrieve", top_k=self.top_k, snapshot_version=snapshot.version) as retrieve_span:
+            with METRICS.timer("encode"), TRACER.span("encode", query_chars=len(retrieval_query)):
+                query_embedding = self._encode_query(retrieval_query)
+            with METRICS.timer("search"), TRACER.span("search", index_size=len(snapshot)):
+                scores, chunk_ids = self._search(snapshot, query_embedding)
+            retrieve_span.set(chunk_ids=chunk_ids.tolist(), scores=[round(float(x), 4) for x in scores])
+        
+        with METRICS.timer("prompt"), TRACER.span("prompt") as prompt_span:
+            relevant_chunks = [snapshot.chunks[i] for i in chunk_ids]
+            prompt = self._build_prompt(query, relevant_chunks, memory.prompt_context() if memory else "")
+            if TRACER.enabled:
+                prompt_span.set(prompt_tokens=count_tokens(prompt))
+        return snapshot, query_embedding, chunk_ids, prompt, memory
+    
+    def generate_response(self, query: str, session_id: str = None, return_metadata: bool = False):
+        """
+        Generate a response using RAG with Llama-4-Maverick
+        
+        Args:
+            query: User question
+            session_id: Conversation to continue (None answers statelessly)
+            return_metadata: Return {"response": ..., "snapshot_version": n, "trace_id": ...,
+                "retrieved_at": wall-clock time retrieval finished} instead of the text
+        """
+        snapshot_version = None
+        retrieved_at = None
+        METRICS.inc("requests_total")
+        with TRACER.span("request", session=bool(session_id), query_chars=len(query)) as span, \
+                PROFILER.profile(span.trace_id):
+            try:
+                with METRICS.timer("request"):
+                    # Retrieve relevant chunks and create prompt for the model
+                    snapshot, query_embedding, chunk_ids, prompt, memory = self._prepare_generation(query, session_id)
+                    snapshot_version = snapshot.version
+                    retrieved_at = time.time()
+                    
+                    # Generate response using appropriate method
+                    response = self._generate_with_inference_api(prompt, query_embedding, chunk_ids, snapshot)
+                    
+                    if memory:
+                        memory.add("user", query)
+                        memory.add("assistant", response)
+                
+            except Exception as e:
+                print(f"❌ Failed to generate response: {e}")
+                METRICS.inc("errors_total")
+                span.set(error=str(e))
+                response = f"I apologize, but I encountered an error while processing your request: {str(e)}"
+            span.set(snapshot_version=snapshot_version, response_chars=len(response))
+        
+        if return_metadata:
+            return {"response": response, "snapshot_version": snapshot_version, "trace_id": span.trace_id,
+                    "retrieved_at": retrieved_at}
+        return response
+    
+    def generate_responses(self, queries: List[str], max_concurrency: int = 4) -> List[Dict[str, Any]]:
+        """
+        Answer a batch of independent questions
+        
+        All queries are encoded in one encoder call and searched in one
+        index call; generation requests then run concurrently, since they
+        spend their time waiting on the Inference API.
+        
+        Args:
+            queries: Questions to answer statelessly
+            max_concurrency: Generation requests in flight at once
             
+        Returns:
+            One {"response", "snapshot_version", "retrieve_seconds", "generate_seconds"}
+            per query, in order; retrieve_seconds is the batch time divided evenly
+        """
+        if not queries:
+            return []
+        snapshot = self.snapshot
+        METRICS.inc("requests_total", len(queries))
+        
+        start = time.perf_counter()
+        with TRACER.span("retrieve_batch", queries=len(queries), top_k=self.top_k, snapshot_version=snapshot.version):
+            with METRICS.timer("encode"):
+                query_embeddings = self._encode_queries(queries)
+            with METRICS.timer("search"):
+                scores, indices = snapshot.index.search(query_embeddings, self.top_k)
+        retrieve_seconds = (time.perf_counter() - start) / len(queries)
+        
+        def answer(i):
+            chunk_ids = indices[i][indices[i] >= 0]
+            prompt = self._build_prompt(queries[i], [snapshot.chunks[j] for j in chunk_ids])
+            generate_start = time.perf_counter()
+            try:
+                response = self._generate_with_inference_api(prompt, query_embeddings[i:i + 1], chunk_ids, snapshot)
+            except Exception as e:
+                METRICS.inc("errors_total")
+                response = f"I apologize, but I encountered an error while processing your request: {str(e)}"
+            return {
+                "response": response,
+                "snapshot_version": snapshot.version,
+                "retrieve_seconds": retrieve_seconds,
+                "generate_seconds": time.perf_counter() - generate_start,
+            }
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(queries)))) as pool:
+            return list(pool.map(answer, range(len(queries))))
+    
+    def generate_response_stream(self, query: str, session_id: str = None,
+                                 metadata: Dict[str, Any] = None) -> Iterator[str]:
+        """
+        Generate a response using RAG, yielding text as the model produces it
+        
+        Falls back to the extractive response if the Inference API fails
+        before producing any output.
+        
+        Args:
+            query: User question
+            session_id: Conversation to continue (None answers statelessly)
+            metadata: Optional dict filled with "trace_id", then "snapshot_version" and
+                "retrieved_at" (wall-clock time) once retrieval is done
+        """
+        # Keeps the request spans out of the caller's context between tokens
+        return run_in_own_context(self._traced_stream(query, session_id, metadata))
+    
+    def _traced_stream(self, query: str, session_id: str, metadata: Dict[str, Any]) -> Iterator[str]:
+        """generate_response_stream inside its request span"""
+        with TRACER.span("request", session=bool(session_id), query_chars=len(query), stream=True) as span, \
+                PROFILER.profile(span.trace_id):
+            if metadata is not None:
+                metadata["trace_id"] = span.trace_id
+            yield from self._stream_response(query, session_id, metadata, span)
+    
+    def _stream_response(self, query: str, session_id: str, metadata: Dict[str, Any], span) -> Iterator[str]:
+        """Body of generate_response_stream, run inside the request span"""
+        METRICS.inc("requests_total")
+        start = time.perf_counter()
+        try:
+            snapshot, query_embedding, chunk_ids, prompt, memory = self._prepare_generation(query, session_id)
+            if metadata is not None:
+                metadata["snapshot_version"] = snapshot.version
+                metadata["retrieved_at"] = time.time()
         except Exception as e:
             print(f"❌ Failed to generate response: {e}")
-            return f"I apologize, but I encountered an error while processing your request: {str(e)}"
+            METRICS.inc("errors_total")
+            span.set(error=str(e))
+            yield f"I apologize, but I encountered an error while processing your request: {str(e)}"
+            return
+        
+        produced = []
+        try:
+            print("🌐 Streaming from Hugging Face Inference API...")
+            generate_start = time.perf_counter()
+            with TRACER.span("generate", model=self.model_name, max_new_tokens=200) as generate_span:
+                stream = self.client.text_generation(
+                    model=self.model_name,
+                    prompt=prompt,
+                    max_new_tokens=200,
+                    temperature=0.7,
+                    stream=True,
+                )
+                try:
+                    for token in stream:
+                        if not produced:
+                            first_token = time.perf_counter() - start
+                            METRICS.observe("first_token", first_token)
+                            generate_span.set(first_token_ms=round(first_token * 1000, 3))
+                        produced.append(token)
+                        yield token
+                except GeneratorExit:
+                    # The caller closed this generator (e.g. the user interrupted playback).
+                    # Closing the upstream stream drops the connection so the server stops generating.
+                    if hasattr(stream, "close"):
+                        stream.close()
+                    METRICS.inc("cancelled_total")
+                    generate_span.set(tokens=len(produced))
+                    span.set(snapshot_version=snapshot.version, response_chars=sum(len(t) for t in produced))
+                    if memory:
+                        memory.add("user", query)
+                        memory.add("assistant", "".join(produced))
+                    raise
+                generate_span.set(tokens=len(produced))
+            METRICS.observe("generate", time.perf_counter() - generate_start)
+        except Exception as e:
+            print(f"❌ Inference API streaming failed: {e}")
+            if produced:
+                METRICS.inc("errors_total")
+                span.set(error=str(e))
+            else:
+                METRICS.inc("fallbacks_total")
+                with METRICS.timer("fallback"), TRACER.span("fallback", reason=str(e)):
+                    produced.append(self._generate_simple_response(query_embedding, chunk_ids, snapshot))
+                yield produced[0]
+        METRICS.observe("request", time.perf_counter() - start)
+        span.set(snapshot_version=snapshot.version, response_chars=sum(len(t) for t in produced))
+        
+        if memory:
+            memory.add("user", query)
+            memory.add("assistant", "".join(produced))
+    
+    def get_chat_history(self, session_id: str = "default") -> List[Dict[str, str]]:
+        """Get the turns held in a session's conversation memory"""
+        memory = self.sessions.get(session_id, create=False)
+        return memory.history() if memory else []
+    
+    def clear_chat_history(self, session_id: str = "default"):
+        """Forget a session's conversation memory"""
+        self.sessions.clear(session_id)
+    
+    def knowledge_base_changed(self) -> bool:
+        """Check whether the knowledge file was modified since it was loaded"""
+        try:
+            if self.attach_shared:
+                return published_version(self.attach_shared) not in (0, self.snapshot.version)
+            return self._knowledge_file_signature() != self.snapshot.knowledge_signature
+        except OSError:
+            return False
+    
+    def reload_knowledge_base(self):
+        """
+        Re-chunk and re-embed the knowledge file without reloading the models
+        
+        A new snapshot is built off to the side and published with a single
+        reference assignment. Requests in flight finish on the snapshot they
+        started with; readers never take a lock, only writers serialize.
+        Attached instances switch to the publisher's latest snapshot instead.
+        """
+        with self._reload_lock:
+            if self.attach_shared:
+                self.snapshot = attach_snapshot(self.attach_shared, EMBEDDING_MODEL)
+                return
+            chunks, dedup_stats, signature = self._chunk_knowledge_base()
+            snapshot = self._build_snapshot(chunks, dedup_stats, signature, self.snapshot.version + 1)
+            snapshot = self._publish(snapshot)
+            self.snapshot = snapshot
+            print(f"✅ Published index snapshot v{snapshot.version}")
     
-    def get_chat_history(self) -> List[Dict[str, str]]:
-        """Get chat history (placeholder for future implementation)"""
-        return []
+    def start_watching(self, interval: float = 2.0):
+        """Reload the knowledge base in the background whenever the file changes"""
+        if self.watcher is None:
+            self.watcher = KnowledgeWatcher(self, interval)
+            self.watcher.start()
     
-    def clear_chat_history(self):
-        """Clear chat history (placeholder for future implementation)"""
-        pass
+    def stop_watching(self):
+        """Stop the knowledge file watcher"""
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
     
     def update_knowledge_base(self, new_content: str):
         """Update the knowledge base with new content"""
+        if self.attach_shared:
+            raise RuntimeError(f"Attached to shared index '{self.attach_shared}'; update the knowledge base in the publishing process")
         try:
             # Append new content to knowledge file
             with open(self.knowledge_file, 'a', encoding='utf-8') as f:
                 f.write(f"\n\n{new_content}")
             
             # Reload knowledge base and recreate embeddings
-            self._load_knowledge_base()
-            self._create_embeddings()
+            self.reload_knowledge_base()
             
             print("✅ Knowledge base updated successfully")
             
@@ -0,0 +1,114 @@
+import os
+import math
+import multiprocessing as mp
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+# Encoder owned by each worker process, loaded once by the pool initializer
+_worker_encoder = None
+_worker_batch_size = 32
+_worker_ready = None
+
+
+def _init_worker(model_name: str, backend: str, threads: int, batch_size: int, ready=None):
+    """Pin the worker's thread count and load its private encoder"""
+    global _worker_encoder, _worker_batch_size, _worker_ready
+
+    # Must be set before the math libraries spin up their thread pools
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+
+    import torch
+    torch.set_num_threads(threads)
+
+    from encoder_backends import load_encoder
+    _worker_encoder = load_encoder(model_name, backend, intra_op_threads=threads)
+    _worker_batch_size = batch_size
+    _worker_ready = ready
+
+
+def _wait_ready(_=None):
+    """Block until every worker has loaded its encoder"""
+    _worker_ready.wait()
+
+
+def _encode_shard(texts: List[str]) -> np.ndarray:
+    """Encode one shard inside a worker process"""
+    return np.asarray(_worker_encoder.encode(texts, batch_size=_worker_batch_size), dtype=np.float32)
+
+
+class EncoderPool:
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", backend: str = "torch",
+                 num_workers: int = None, threads_per_worker: int = 1,
+                 batch_size: int = 32, shards_per_worker: int = 4):
+        """
+        Pool of encoder worker processes that can encode several corpora
+
+        Workers are spawned and load their encoder once, so every encode()
+        after the first only pays for the encoding itself. See
+        encode_parallel for the arguments.
+        """
+        if num_workers is None:
+            num_workers = max(1, (os.cpu_count() or 1) // threads_per_worker)
+        self.num_workers = num_workers
+        self.shards_per_worker = shards_per_worker
+
+        # Spawned workers avoid inheriting thread pools from a forked parent
+        context = mp.get_context("spawn")
+        self._ready = context.Barrier(num_workers)
+        self._pool = ProcessPoolExecutor(max_workers=num_workers, mp_context=context,
+                                         initializer=_init_worker,
+                                         initargs=(model_name, backend, threads_per_worker,
+                                                   batch_size, self._ready))
+
+    def warm_up(self):
+        """Start every worker and wait until all of them have loaded the encoder"""
+        # Each task holds its worker at the barrier, so the tasks land on distinct workers
+        list(self._pool.map(_wait_ready, range(self.num_workers)))
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts, returning a float32 matrix with one row per text"""
+        num_shards = min(len(texts), self.num_workers * self.shards_per_worker)
+        shard_size = math.ceil(len(texts) / max(num_shards, 1))
+        shards = [texts[i:i + shard_size] for i in range(0, len(texts), shard_size)]
+        results = list(self._pool.map(_encode_shard, shards))
+        return np.concatenate(results) if results else np.zeros((0, 0), dtype=np.float32)
+
+    def close(self):
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def encode_parallel(texts: List[str], model_name: str = "all-MiniLM-L6-v2",
+                    backend: str = "torch", num_workers: int = None,
+                    threads_per_worker: int = 1, batch_size: int = 32,
+                    shards_per_worker: int = 4) -> np.ndarray:
+    """
+    Encode texts with a pool of encoder worker processes
+
+    The text list is split into contiguous shards, several per worker so
+    that slow shards do not leave other workers idle. Shards are merged
+    back in their original order. The pool only lives for this call; use
+    EncoderPool to encode several corpora with the same workers.
+
+    Args:
+        texts: Texts to encode
+        model_name: Sentence-transformers model name
+        backend: Encoder backend passed to load_encoder
+        num_workers: Worker processes (defaults to CPU count // threads_per_worker)
+        threads_per_worker: Intra-op threads per worker
+        batch_size: Encoder batch size inside each worker
+        shards_per_worker: Number of shards queued per worker
+
+    Returns:
+        float32 embedding matrix with one row per text
+    """
+    with EncoderPool(model_name, backend, num_workers, threads_per_worker,
+                     batch_size, shards_per_worker) as pool:
+        return pool.encode(texts)
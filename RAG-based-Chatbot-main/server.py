@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+RAG Chatbot - HTTP query service
+
+Serves one shared Llama4RAGChatbot to programmatic clients:
+
+  GET  /health     - Liveness and index size
+  GET  /metrics    - Per-stage latency histograms and counters (Prometheus text format)
+  POST /query      - {"query": "...", "session_id": null, "stream": false}
+                     -> {"response": "...", "snapshot_version": n}
+                     With "stream": true the answer is sent as chunked NDJSON
+                     lines {"token": "..."} followed by {"done": true, "snapshot_version": n}
+                     (or {"error": "..."} if generation fails part way)
+  POST /retrieve   - {"query": "...", "top_k": 3} -> {"results": [...], "snapshot_version": n}
+  POST /ingest     - {"content": "..."} appends to the knowledge base
+"""
+
+import json
+import argparse
+import threading
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from metrics import METRICS
+
+
+class PooledHTTPServer(HTTPServer):
+    def __init__(self, server_address, handler_class, chatbot,
+                 workers: int = 8, queue_size: int = 32):
+        """
+        HTTP server that handles requests on a bounded thread pool
+
+        Connections beyond the pool size wait in a bounded backlog;
+        once that is full, new connections are rejected with 503.
+
+        Args:
+            server_address: (host, port) to bind
+            handler_class: Request handler class
+            chatbot: Shared Llama4RAGChatbot instance
+            workers: Number of request handling threads
+            queue_size: Connections allowed to wait for a free worker
+        """
+        super().__init__(server_address, handler_class)
+        self.chatbot = chatbot
+        self.ingest_lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rag-http")
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def process_request(self, request, client_address):
+        if not self.slots.acquire(blocking=False):
+            try:
+                request.sendall(b"HTTP/1.1 503 Service Unavailable\r\n"
+                                b"Retry-After: 1\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            finally:
+                self.shutdown_request(request)
+            return
+        self.pool.submit(self._process_request_in_worker, request, client_address)
+
+    def _process_request_in_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+
+class RAGRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Seconds a client may take to send its request before the worker gives up on it
+    timeout = 5
+
+    def log_message(self, format, *args):
+        print(f"🌐 {self.address_string()} - {format % args}")
+
+    def end_headers(self):
+        # One request per connection, so an idle keep-alive client never holds a pool worker
+        self.send_header("Connection", "close")
+        super().end_headers()
+
+    def _send_json(self, payload, status: int = 200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length).decode("utf-8"))
+
+    def _write_chunk(self, payload):
+        data = (json.dumps(payload) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == "/health":
+            snapshot = self.server.chatbot.snapshot
+            self._send_json({"status": "ok", "chunks": len(snapshot), "snapshot_version": snapshot.version})
+        elif path == "/metrics":
+            body = METRICS.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json({"error": f"Unknown endpoint {self.path}"}, 404)
+
+    def do_POST(self):
+        routes = {
+            "/query": self._handle_query,
+            "/retrieve": self._handle_retrieve,
+            "/ingest": self._handle_ingest,
+        }
+        handler = routes.get(urlsplit(self.path).path)
+        if handler is None:
+            self._send_json({"error": f"Unknown endpoint {self.path}"}, 404)
+            return
+
+        try:
+            request = self._read_json()
+        except ValueError as e:
+            self._send_json({"error": f"Invalid JSON: {e}"}, 400)
+            return
+        if not isinstance(request, dict):
+            self._send_json({"error": "Request body must be a JSON object"}, 400)
+            return
+
+        try:
+            handler(request)
+        except (KeyError, TypeError) as e:
+            self._send_json({"error": f"Invalid request: {e}"}, 400)
+        except Exception as e:
+            self._send_json({"error": str(e)}, 500)
+
+    def _handle_query(self, request):
+        query = str(request["query"])
+        session_id = request.get("session_id")
+        if not request.get("stream"):
+            self._send_json(self.server.chatbot.generate_response(query, session_id, return_metadata=True))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        metadata = {}
+        try:
+            for token in self.server.chatbot.generate_response_stream(query, session_id, metadata):
+                self._write_chunk({"token": token})
+            self._write_chunk({"done": True, **metadata})
+        except Exception as e:
+            # Headers are already sent; report the failure inside the stream
+            self._write_chunk({"error": str(e), **metadata})
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _handle_retrieve(self, request):
+        top_k = request.get("top_k")
+        if top_k is not None:
+            try:
+                top_k = int(top_k)
+            except (TypeError, ValueError):
+                top_k = 0
+            if top_k < 1:
+                self._send_json({"error": "top_k must be a positive integer"}, 400)
+                return
+        self._send_json(self.server.chatbot.retrieve(str(request["query"]), top_k, return_metadata=True))
+
+    def _handle_ingest(self, request):
+        content = str(request["content"]).strip()
+        if not content:
+            self._send_json({"error": "No content provided"}, 400)
+            return
+        with self.server.ingest_lock:
+            self.server.chatbot.update_knowledge_base(content)
+        snapshot = self.server.chatbot.snapshot
+        self._send_json({"status": "ok", "chunks": len(snapshot), "snapshot_version": snapshot.version})
+
+
+def run_server(host: str = "127.0.0.1", port: int = 8000,
+               workers: int = 8, queue_size: int = 32, chatbot=None,
+               watch_knowledge: bool = False, model_name: str = None,
+               index_shards: int = 0, shard_addresses: list = None,
+               publish_shared: str = None, attach_shared: str = None):
+    """Load the chatbot once and serve it until interrupted"""
+    if chatbot is None:
+        from model_llama4 import Llama4RAGChatbot
+        options = {"model_name": model_name} if model_name else {}
+        if index_shards or shard_addresses:
+            options.update(index_shards=index_shards, shard_addresses=shard_addresses)
+        if publish_shared or attach_shared:
+            options.update(publish_shared=publish_shared, attach_shared=attach_shared)
+        chatbot = Llama4RAGChatbot(watch_knowledge=watch_knowledge, **options)
+
+    server = PooledHTTPServer((host, port), RAGRequestHandler, chatbot, workers, queue_size)
+    print(f"🚀 RAG query service listening on http://{host}:{port} ({workers} workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Server stopped by user")
+    finally:
+        server.server_close()
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='RAG Chatbot HTTP service')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to bind')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on')
+    parser.add_argument('--workers', type=int, default=8, help='Request handling threads')
+    parser.add_argument('--queue-size', type=int, default=32, help='Connections allowed to wait for a worker')
+    parser.add_argument('--watch', action='store_true', help='Hot-reload the knowledge file when it changes')
+    parser.add_argument('--model', help='Model id or text-generation endpoint URL (default: Llama-4-Maverick)')
+    parser.add_argument('--shards', type=int, default=0, help='Worker processes to partition the index over')
+    parser.add_argument('--shard-nodes', nargs='+', metavar='HOST:PORT',
+                        help='Remote shard nodes started with "python sharded_index.py serve"')
+    parser.add_argument('--publish-shared', metavar='NAME', help='Publish the index in shared memory for other processes')
+    parser.add_argument('--attach-shared', metavar='NAME', help='Use the index another process publishes in shared memory')
+
+    args = parser.parse_args()
+    run_server(args.host, args.port, args.workers, args.queue_size,
+               watch_knowledge=args.watch, model_name=args.model,
+               index_shards=args.shards, shard_addresses=args.shard_nodes,
+               publish_shared=args.publish_shared, attach_shared=args.attach_shared)
+
+
+if __name__ == "__main__":
+    main()
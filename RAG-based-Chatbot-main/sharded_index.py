@@ -0,0 +1,386 @@
+import os
+import sys
+import heapq
+import hashlib
+import argparse
+import threading
+import itertools
+import multiprocessing as mp
+from collections import OrderedDict
+from concurrent.futures import Future
+from multiprocessing.connection import Client, Listener
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+from metrics import METRICS
+
+# Requests are (request_id, op, args) tuples, replies (request_id, ok, value)
+_CLOSE = "close"
+
+
+def chunk_key(text: str) -> str:
+    """Stable identity of a chunk across reloads, used for shard assignment"""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+def assign_shards(keys: Sequence[str], num_shards: int, previous: Dict[str, int] = None,
+                  tolerance: float = 0.1) -> Tuple[List[int], int]:
+    """
+    Assign chunks to shards, keeping earlier placements where possible
+
+    Chunks seen in the previous assignment stay on their shard, new chunks
+    go to the least loaded shard, and shards that end up more than
+    tolerance above the mean size hand their excess to the lightest ones.
+    A reload therefore only moves new chunks and the few needed to
+    rebalance.
+
+    Args:
+        keys: chunk_key of every chunk, in chunk id order
+        num_shards: Shards to spread the chunks over
+        previous: key -> shard of the last published assignment
+        tolerance: Allowed fraction above the mean shard size
+
+    Returns:
+        (shard of every chunk, number of previously placed chunks that moved)
+    """
+    previous = previous or {}
+    assignment = [-1] * len(keys)
+    members = [[] for _ in range(num_shards)]
+    for i, key in enumerate(keys):
+        shard = previous.get(key, -1)
+        if 0 <= shard < num_shards:
+            assignment[i] = shard
+            members[shard].append(i)
+
+    loads = [(len(m), s) for s, m in enumerate(members)]
+    heapq.heapify(loads)
+    for i, shard in enumerate(assignment):
+        if shard < 0:
+            size, lightest = heapq.heappop(loads)
+            assignment[i] = lightest
+            members[lightest].append(i)
+            heapq.heappush(loads, (size + 1, lightest))
+
+    # Rebalance: move the most recently added members of overfull shards
+    cap = max(1, int(np.ceil(len(keys) / num_shards * (1 + tolerance))))
+    moved = 0
+    for shard in range(num_shards):
+        while len(members[shard]) > cap:
+            lightest = min(range(num_shards), key=lambda s: len(members[s]))
+            if len(members[lightest]) + 1 >= len(members[shard]):
+                break
+            i = members[shard].pop()
+            members[lightest].append(i)
+            assignment[i] = lightest
+            moved += keys[i] in previous
+    return assignment, moved
+
+
+def merge_top_k(results: List[Tuple[np.ndarray, np.ndarray]], k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Merge per-shard (scores, ids) of shape (queries, k) into the global top k"""
+    scores = np.concatenate([r[0] for r in results], axis=1)
+    ids = np.concatenate([r[1] for r in results], axis=1)
+    # Empty slots carry id -1; push them behind every real hit
+    scores = np.where(ids >= 0, scores, -np.inf)
+    order = np.argsort(-scores, axis=1, kind='stable')[:, :k]
+    scores = np.take_along_axis(scores, order, axis=1)
+    ids = np.take_along_axis(ids, order, axis=1)
+    if ids.shape[1] < k:
+        pad = k - ids.shape[1]
+        scores = np.pad(scores, ((0, 0), (0, pad)), constant_values=-np.inf)
+        ids = np.pad(ids, ((0, 0), (0, pad)), constant_values=-1)
+    return scores.astype('float32'), ids.astype(np.int64)
+
+
+class _ShardStore:
+    def __init__(self, threads: int = 1, keep_versions: int = 2):
+        """
+        Index versions held by one shard worker
+
+        Vectors of the latest version are kept by chunk key, so a reload
+        only has to send the vectors this shard did not already hold.
+        """
+        import faiss
+        faiss.omp_set_num_threads(threads)
+        self.keep_versions = keep_versions
+        self.versions = OrderedDict()
+        self.vectors: Dict[str, np.ndarray] = {}
+
+    def load(self, version: int, keys: List[str], ids: np.ndarray,
+             new_keys: List[str], new_vectors: np.ndarray, dimension: int) -> int:
+        import faiss
+        available = dict(self.vectors)
+        available.update(zip(new_keys, new_vectors))
+        missing = [key for key in keys if key not in available]
+        if missing:
+            raise KeyError(f"{len(missing)} vectors not held by this shard")
+
+        vectors = np.stack([available[key] for key in keys]) if keys else np.zeros((0, dimension), dtype='float32')
+        index = faiss.IndexFlatIP(dimension)
+        index.add(np.ascontiguousarray(vectors, dtype='float32'))
+        self.versions[version] = (index, np.asarray(ids, dtype=np.int64))
+        self.vectors = dict(zip(keys, vectors))
+        while len(self.versions) > self.keep_versions:
+            self.versions.popitem(last=False)
+        return index.ntotal
+
+    def search(self, version: int, queries: np.ndarray, k: int):
+        if version not in self.versions:
+            raise KeyError(f"Index version {version} is no longer held by this shard")
+        index, ids = self.versions[version]
+        scores, local = index.search(queries, k)
+        return scores, np.where(local >= 0, ids[np.maximum(local, 0)], -1)
+
+    def stats(self) -> Dict[int, int]:
+        return {version: index.ntotal for version, (index, _) in self.versions.items()}
+
+
+def _serve(conn, threads: int = 1):
+    """Answer shard requests on one connection until it closes"""
+    store = None
+    while True:
+        try:
+            request_id, op, args = conn.recv()
+        except (EOFError, OSError):
+            return
+        if op == _CLOSE:
+            return
+        try:
+            if store is None:
+                store = _ShardStore(threads)
+            reply = (request_id, True, getattr(store, op)(*args))
+        except Exception as e:
+            reply = (request_id, False, f"{type(e).__name__}: {e}")
+        conn.send(reply)
+
+
+class ShardClient:
+    def __init__(self, conn, name: str, process=None):
+        """
+        Connection to one shard worker, local process or remote node
+
+        Requests from any thread are pipelined on the connection; a reader
+        thread matches replies to the futures returned by call().
+        """
+        self.name = name
+        self.process = process
+        self._conn = conn
+        self._send_lock = threading.Lock()
+        self._pending: Dict[int, Future] = {}
+        self._ids = itertools.count()
+        self._closed = False
+        self._reader = threading.Thread(target=self._read_loop, name=f"shard-{name}", daemon=True)
+        self._reader.start()
+
+    def call(self, op: str, *args) -> Future:
+        future = Future()
+        if self._closed:
+            future.set_exception(ConnectionError(f"Shard {self.name} is disconnected"))
+            return future
+        with self._send_lock:
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+            try:
+                self._conn.send((request_id, op, args))
+            except (OSError, ValueError) as e:
+                self._pending.pop(request_id, None)
+                future.set_exception(ConnectionError(f"Shard {self.name}: {e}"))
+        return future
+
+    def _read_loop(self):
+        while True:
+            try:
+                request_id, ok, value = self._conn.recv()
+            except (EOFError, OSError):
+                break
+            future = self._pending.pop(request_id, None)
+            if future is None:
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(RuntimeError(f"Shard {self.name}: {value}"))
+        self._closed = True
+        for future in list(self._pending.values()):
+            future.set_exception(ConnectionError(f"Shard {self.name} disconnected"))
+        self._pending.clear()
+
+    def close(self):
+        if not self._closed:
+            with self._send_lock:
+                try:
+                    self._conn.send((None, _CLOSE, ()))
+                except (OSError, ValueError):
+                    pass
+        self._conn.close()
+        if self.process is not None:
+            self.process.join(timeout=2.0)
+
+
+class ShardedIndex:
+    def __init__(self, shards: List[ShardClient], version: int, dimension: int,
+                 assignment: np.ndarray, timeout: float = 30.0):
+        """
+        Read-only view of one index version spread over shard workers
+
+        Exposes the part of the faiss index interface retrieval uses
+        (search, ntotal, d), so it can sit in an IndexSnapshot in place of
+        a local index. A search sends the encoded queries to every shard at
+        once and merges the per-shard top k.
+        """
+        self.shards = shards
+        self.version = version
+        self.d = dimension
+        self.assignment = assignment
+        self.timeout = timeout
+        self.ntotal = len(assignment)
+
+    @property
+    def shard_sizes(self) -> List[int]:
+        return np.bincount(self.assignment, minlength=len(self.shards)).tolist()
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.ascontiguousarray(queries, dtype='float32')
+        futures = [shard.call("search", self.version, queries, k) for shard in self.shards]
+        with METRICS.timer("shard_gather"):
+            results = [future.result(self.timeout) for future in futures]
+        return merge_top_k(results, k)
+
+
+class ShardPool:
+    def __init__(self, num_shards: int = 0, addresses: Sequence[str] = None,
+                 authkey: bytes = None, threads_per_shard: int = 1,
+                 rebalance_tolerance: float = 0.1, timeout: float = 30.0):
+        """
+        Shard workers that hold the corpus index between them
+
+        Local shards are spawned worker processes; remote shards are nodes
+        running `python sharded_index.py serve`, reached over an
+        authenticated multiprocessing connection. publish() assigns chunks
+        to shards at ingest and ships each shard only the vectors it does
+        not already hold.
+
+        Args:
+            num_shards: Local worker processes to spawn
+            addresses: "host:port" of remote shard nodes, used in addition to local shards
+            authkey: Shared secret for remote nodes (defaults to RAG_SHARD_AUTHKEY)
+            threads_per_shard: faiss search threads in each local worker
+            rebalance_tolerance: Allowed fraction above the mean shard size
+            timeout: Seconds to wait for a shard to answer a search
+        """
+        self.rebalance_tolerance = rebalance_tolerance
+        self.timeout = timeout
+        self.shards: List[ShardClient] = []
+        self._assignment: Dict[str, int] = {}
+
+        # Spawned workers avoid inheriting the parent's models and thread pools
+        context = mp.get_context("spawn")
+        for i in range(num_shards):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=_serve, args=(child_conn, threads_per_shard),
+                                      name=f"index-shard-{i}", daemon=True)
+            process.start()
+            child_conn.close()
+            self.shards.append(ShardClient(parent_conn, f"local-{i}", process))
+
+        if addresses:
+            authkey = authkey or os.environ.get("RAG_SHARD_AUTHKEY", "").encode()
+            if not authkey:
+                raise ValueError("Remote shards need an authkey (set RAG_SHARD_AUTHKEY)")
+            for address in addresses:
+                host, port = address.rsplit(":", 1)
+                self.shards.append(ShardClient(Client((host, int(port)), authkey=authkey), address))
+
+        if not self.shards:
+            raise ValueError("ShardPool needs at least one local or remote shard")
+        print(f"🧩 Index sharded over {len(self.shards)} workers")
+
+    def publish(self, version: int, chunks: Sequence[str], embeddings: np.ndarray) -> ShardedIndex:
+        """
+        Assign chunks to shards, load them as index version and return its view
+
+        Earlier versions stay searchable on the workers until two newer
+        ones have been published, so requests in flight can finish.
+        """
+        keys = [chunk_key(chunk) for chunk in chunks]
+        assignment, moved = assign_shards(keys, len(self.shards), self._assignment, self.rebalance_tolerance)
+        assignment = np.asarray(assignment, dtype=np.int64)
+        dimension = embeddings.shape[1]
+
+        futures = []
+        sent = 0
+        for shard_id, shard in enumerate(self.shards):
+            rows = np.flatnonzero(assignment == shard_id)
+            shard_keys = [keys[i] for i in rows]
+            held = {key for key, s in self._assignment.items() if s == shard_id}
+            new_rows = [i for i in rows if keys[i] not in held]
+            sent += len(new_rows)
+            futures.append((shard, rows, shard_keys, new_rows,
+                            shard.call("load", version, shard_keys, rows, [keys[i] for i in new_rows],
+                                       embeddings[new_rows], dimension)))
+
+        for shard, rows, shard_keys, new_rows, future in futures:
+            try:
+                future.result(self.timeout)
+            except RuntimeError:
+                # The shard did not hold every vector it was expected to keep (e.g. its last load
+                # failed part way); send them all. A lost connection raises ConnectionError instead,
+                # which is not retried: ShardClient does not reconnect to a restarted node
+                sent += len(rows) - len(new_rows)
+                shard.call("load", version, shard_keys, rows, shard_keys, embeddings[rows], dimension).result(self.timeout)
+
+        self._assignment = dict(zip(keys, assignment.tolist()))
+        index = ShardedIndex(self.shards, version, dimension, assignment, self.timeout)
+        sizes = "/".join(str(size) for size in index.shard_sizes)
+        print(f"🧩 Published v{version} to {len(self.shards)} shards "
+              f"(sizes {sizes}, {sent} vectors sent, {moved} rebalanced)")
+        return index
+
+    def stats(self) -> List[Dict[str, object]]:
+        """Index versions and sizes held by each shard"""
+        return [{"shard": shard.name, "versions": shard.call("stats").result(self.timeout)}
+                for shard in self.shards]
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+        self.shards = []
+
+
+def serve_shard(host: str = "127.0.0.1", port: int = 6001, authkey: bytes = None, threads: int = None):
+    """Serve shards to remote chatbots; every connection gets its own shard"""
+    authkey = authkey or os.environ.get("RAG_SHARD_AUTHKEY", "").encode()
+    if not authkey:
+        print("❌ Set RAG_SHARD_AUTHKEY (shared with the chatbot) before serving shards")
+        sys.exit(1)
+    threads = threads or os.cpu_count() or 1
+
+    listener = Listener((host, port), authkey=authkey)
+    print(f"🚀 Index shard listening on {host}:{port} ({threads} search threads)")
+    try:
+        while True:
+            try:
+                conn = listener.accept()
+            except mp.AuthenticationError as e:
+                print(f"⚠️ Rejected shard connection: {e}")
+                continue
+            print(f"🔗 Shard connection from {listener.last_accepted}")
+            threading.Thread(target=_serve, args=(conn, threads), daemon=True).start()
+    except KeyboardInterrupt:
+        print("\n👋 Shard server stopped by user")
+    finally:
+        listener.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Index shard node for a sharded RAG chatbot')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    serve = subparsers.add_parser('serve', help='Hold index shards for remote chatbots')
+    serve.add_argument('--host', default='127.0.0.1', help='Address to bind')
+    serve.add_argument('--port', type=int, default=6001, help='Port to listen on')
+    serve.add_argument('--threads', type=int, help='faiss search threads (default: number of cores)')
+    args = parser.parse_args()
+    serve_shard(args.host, args.port, threads=args.threads)
+
+
+if __name__ == "__main__":
+    main()
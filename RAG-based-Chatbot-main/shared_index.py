@@ -0,0 +1,365 @@
+import os
+import sys
+import json
+import mmap
+import time
+import atexit
+import struct
+import argparse
+import collections.abc
+from multiprocessing import shared_memory, resource_tracker
+from typing import Any, Dict, Sequence, Tuple
+import numpy as np
+from index_snapshot import IndexSnapshot
+
+# Segment layout: uint64 header length, JSON header, then 64-byte aligned arrays
+_LENGTH = struct.Struct("<Q")
+_ALIGN = 64
+# The pointer segment holds the current version number
+_VERSION = struct.Struct("<Q")
+
+
+def _segment_name(name: str, version: int) -> str:
+    return f"{name}_v{version}"
+
+
+class _Segment(shared_memory.SharedMemory):
+    def close(self):
+        """Close the handle; a mapping snapshot views still use is unmapped once they are gone"""
+        try:
+            super().close()
+        except BufferError:
+            pass
+
+
+def _open_segment(name: str) -> shared_memory.SharedMemory:
+    """Attach to an existing segment without taking ownership of it"""
+    if sys.version_info >= (3, 13):
+        return _Segment(name=name, track=False)
+    shm = _Segment(name=name)
+    if os.name != "nt":
+        # Attaching registers the segment with the resource tracker, which unlinks it when this process exits
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def _map_readonly(shm: shared_memory.SharedMemory):
+    """Read-only mapping of a segment that outlives the SharedMemory handle"""
+    if os.name == "nt":
+        return mmap.mmap(-1, shm.size, tagname=shm.name, access=mmap.ACCESS_READ)
+    # The descriptor is not a documented attribute; without it, view the handle's own
+    # mapping, which _Segment.close leaves in place while the views are alive
+    fd = getattr(shm, "_fd", -1)
+    if fd < 0:
+        return shm.buf.toreadonly()
+    return mmap.mmap(fd, shm.size, access=mmap.ACCESS_READ)
+
+
+class SharedStrings(collections.abc.Sequence):
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        """
+        Read-only sequence of strings stored as one UTF-8 blob
+
+        Strings are decoded on access, so the text itself is never copied
+        into the process; string i is blob[offsets[i]:offsets[i + 1]].
+        """
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string index out of range")
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode('utf-8')
+
+
+class SharedFlatIndex:
+    def __init__(self, embeddings: np.ndarray):
+        """
+        Exact inner-product search over a shared, read-only embedding matrix
+
+        Stands in for faiss.IndexFlatIP (search, ntotal, d) without copying
+        the vectors into a private faiss buffer; the scores are a single
+        matrix multiply, as in a flat faiss index.
+        """
+        self.embeddings = embeddings
+        self.ntotal, self.d = embeddings.shape
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.asarray(queries, dtype='float32')
+        found = min(k, self.ntotal)
+        scores = np.full((len(queries), k), -np.inf, dtype='float32')
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        if found:
+            all_scores = queries @ self.embeddings.T
+            top = np.argpartition(-all_scores, found - 1, axis=1)[:, :found]
+            top_scores = np.take_along_axis(all_scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind='stable')
+            scores[:, :found] = np.take_along_axis(top_scores, order, axis=1)
+            ids[:, :found] = np.take_along_axis(top, order, axis=1)
+        return scores, ids
+
+
+def _pack_strings(texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [text.encode('utf-8') for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _index_vectors(index) -> np.ndarray:
+    if isinstance(index, SharedFlatIndex):
+        return index.embeddings
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def write_snapshot(name: str, snapshot: IndexSnapshot, metadata: Dict[str, Any] = None) -> shared_memory.SharedMemory:
+    """Copy a snapshot into a new shared memory segment called name"""
+    chunk_blob, chunk_offsets = _pack_strings(snapshot.chunks)
+    sentence_blob, sentence_offsets = _pack_strings(snapshot.sentences)
+    arrays = {
+        "embeddings": np.ascontiguousarray(_index_vectors(snapshot.index), dtype='float32'),
+        "chunk_blob": chunk_blob,
+        "chunk_offsets": chunk_offsets,
+        "sentence_blob": sentence_blob,
+        "sentence_offsets": np.asarray(snapshot.sentence_offsets, dtype=np.int64),
+        "sentence_text_offsets": sentence_offsets,
+        "sentence_embeddings": np.ascontiguousarray(snapshot.sentence_embeddings, dtype='float32'),
+    }
+
+    header = {
+        "version": snapshot.version,
+        "dedup_stats": snapshot.dedup_stats,
+        "knowledge_signature": snapshot.knowledge_signature,
+        "created_at": snapshot.created_at,
+        "metadata": metadata or {},
+        "arrays": {},
+    }
+    # Offsets are relative to the end of the header, so they do not depend on its length
+    offset = 0
+    for key, array in arrays.items():
+        header["arrays"][key] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+
+    encoded = json.dumps(header).encode('utf-8')
+    data_start = -(-(_LENGTH.size + len(encoded)) // _ALIGN) * _ALIGN
+    shm = _Segment(name=name, create=True, size=max(1, data_start + offset))
+    _LENGTH.pack_into(shm.buf, 0, len(encoded))
+    shm.buf[_LENGTH.size:_LENGTH.size + len(encoded)] = encoded
+    for key, array in arrays.items():
+        target = np.ndarray(array.shape, array.dtype, buffer=shm.buf,
+                            offset=data_start + header["arrays"][key]["offset"])
+        target[...] = array
+        # Release the export so the publisher can close the segment later
+        del target
+    return shm
+
+
+def read_snapshot(shm: shared_memory.SharedMemory) -> Tuple[IndexSnapshot, Dict[str, Any]]:
+    """
+    Build a snapshot whose arrays and text view a segment without copying
+
+    The views keep their own read-only mapping alive, so shm can be closed
+    (and the segment unlinked) while the snapshot is still in use.
+    """
+    view = _map_readonly(shm)
+    (length,) = _LENGTH.unpack_from(view, 0)
+    header = json.loads(bytes(view[_LENGTH.size:_LENGTH.size + length]).decode('utf-8'))
+    data_start = -(-(_LENGTH.size + length) // _ALIGN) * _ALIGN
+
+    arrays = {}
+    for key, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"]))
+        arrays[key] = np.frombuffer(view, dtype=dtype, count=count,
+                                    offset=data_start + spec["offset"]).reshape(spec["shape"])
+
+    signature = header["knowledge_signature"]
+    snapshot = IndexSnapshot(
+        version=header["version"],
+        chunks=SharedStrings(arrays["chunk_blob"], arrays["chunk_offsets"]),
+        index=SharedFlatIndex(arrays["embeddings"]),
+        sentences=SharedStrings(arrays["sentence_blob"], arrays["sentence_text_offsets"]),
+        sentence_offsets=arrays["sentence_offsets"],
+        sentence_embeddings=arrays["sentence_embeddings"],
+        dedup_stats=header["dedup_stats"],
+        knowledge_signature=tuple(signature) if signature else None,
+        created_at=header["created_at"],
+    )
+    return snapshot, header["metadata"]
+
+
+class SharedIndexPublisher:
+    def __init__(self, name: str, keep_versions: int = 2, metadata: Dict[str, Any] = None):
+        """
+        Publish index snapshots in shared memory for other processes to attach to
+
+        Every version gets its own segment ("<name>_v<version>"); a small
+        pointer segment called name holds the current version number.
+        Older segments are unlinked once keep_versions newer ones exist;
+        processes that still map them keep working until they let go.
+        All segments are unlinked when the publisher exits.
+
+        Args:
+            name: Name attaching processes use
+            keep_versions: Versions left attachable
+            metadata: Stored with every version, e.g. the embedding model
+        """
+        self.name = name
+        self.keep_versions = keep_versions
+        self.metadata = metadata or {}
+        self._segments: Dict[int, shared_memory.SharedMemory] = {}
+        self._pointer = self._create(name, _VERSION.size)
+        _VERSION.pack_into(self._pointer.buf, 0, 0)
+        atexit.register(self.close)
+
+    @staticmethod
+    def _create(name: str, size: int) -> shared_memory.SharedMemory:
+        try:
+            return _Segment(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a publisher that did not exit cleanly
+            print(f"⚠️ Replacing stale shared memory segment {name}")
+            stale = _open_segment(name)
+            stale.close()
+            stale.unlink()
+            return _Segment(name=name, create=True, size=size)
+
+    def publish(self, snapshot: IndexSnapshot) -> IndexSnapshot:
+        """Copy snapshot into shared memory, point attachers at it and return the shared view"""
+        segment_name = _segment_name(self.name, snapshot.version)
+        try:
+            shm = write_snapshot(segment_name, snapshot, self.metadata)
+        except FileExistsError:
+            stale = _open_segment(segment_name)
+            stale.close()
+            stale.unlink()
+            shm = write_snapshot(segment_name, snapshot, self.metadata)
+        self._segments[snapshot.version] = shm
+        shared, _ = read_snapshot(shm)
+        _VERSION.pack_into(self._pointer.buf, 0, snapshot.version)
+
+        for version in sorted(self._segments)[:-self.keep_versions]:
+            self._release(self._segments.pop(version))
+        print(f"🔗 Published index v{snapshot.version} to shared memory '{self.name}' "
+              f"({shm.size / 1024 / 1024:.1f} MiB)")
+        return shared
+
+    @staticmethod
+    def _release(shm: shared_memory.SharedMemory):
+        shm.close()
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        """Unlink every segment; processes already attached keep their mappings"""
+        for shm in self._segments.values():
+            self._release(shm)
+        self._segments.clear()
+        if self._pointer is not None:
+            self._release(self._pointer)
+            self._pointer = None
+
+
+def published_version(name: str) -> int:
+    """
+    Version currently published under name (0 before the first publish)
+
+    Raises:
+        FileNotFoundError: If no publisher is running under name
+    """
+    pointer = _open_segment(name)
+    try:
+        return _VERSION.unpack_from(pointer.buf, 0)[0]
+    finally:
+        pointer.close()
+
+
+def attach_snapshot(name: str, embedding_model: str = None, timeout: float = 30.0) -> IndexSnapshot:
+    """
+    Attach read-only to the snapshot currently published under name
+
+    Args:
+        name: Name the publisher was started with
+        embedding_model: Reject the index if it was built with a different encoder
+        timeout: Seconds to wait for a publisher that has not published yet
+
+    Raises:
+        FileNotFoundError: If no publisher is running under name
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        version = published_version(name)
+        try:
+            if version:
+                shm = _open_segment(_segment_name(name, version))
+                break
+        except FileNotFoundError:
+            # Retired between reading the pointer and opening it; read the pointer again
+            pass
+        if time.monotonic() > deadline:
+            raise FileNotFoundError(f"Nothing published under shared index '{name}'")
+        time.sleep(0.1)
+
+    try:
+        snapshot, metadata = read_snapshot(shm)
+    finally:
+        shm.close()
+    built_with = metadata.get("embedding_model")
+    if embedding_model and built_with and built_with != embedding_model:
+        raise ValueError(f"Shared index '{name}' was built with {built_with}, not {embedding_model}")
+    print(f"🔗 Attached to shared index '{name}' v{snapshot.version} ({len(snapshot)} chunks)")
+    return snapshot
+
+
+def describe(name: str) -> Dict[str, Any]:
+    """Version, sizes and metadata of what is published under name"""
+    shm = _open_segment(_segment_name(name, published_version(name)))
+    try:
+        snapshot, metadata = read_snapshot(shm)
+        return {"version": snapshot.version, "chunks": len(snapshot), "sentences": len(snapshot.sentences),
+                "dimension": snapshot.index.d, "bytes": shm.size, "metadata": metadata}
+    finally:
+        shm.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Shared-memory index for several chatbot processes')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    publish = subparsers.add_parser('publish', help='Load the knowledge base and publish it until stopped')
+    publish.add_argument('--name', default='rag-index', help='Name attaching processes use')
+    publish.add_argument('--knowledge-file', default='knowledge.txt')
+    info = subparsers.add_parser('info', help='Show what is published under a name')
+    info.add_argument('--name', default='rag-index')
+    args = parser.parse_args()
+
+    if args.command == 'info':
+        try:
+            print(json.dumps(describe(args.name), indent=2))
+        except FileNotFoundError:
+            print(f"❌ Nothing published under '{args.name}'")
+            sys.exit(1)
+        return
+
+    from model_llama4 import Llama4RAGChatbot
+    chatbot = Llama4RAGChatbot(knowledge_file=args.knowledge_file, publish_shared=args.name, watch_knowledge=True)
+    print(f"🚀 Serving shared index '{args.name}'; attach with RAG_SHARED_INDEX={args.name}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n👋 Publisher stopped by user")
+    finally:
+        chatbot.stop_watching()
+
+
+if __name__ == "__main__":
+    main()
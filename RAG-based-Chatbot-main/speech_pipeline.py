@@ -0,0 +1,257 @@
+import re
+import time
+import queue
+import threading
+from typing import Iterable, Iterator, Callable, List, Optional
+from metrics import METRICS
+
+# Sentence end: terminal punctuation, optionally closed by a quote or bracket,
+# followed by whitespace. Decimals like "3.5" have no whitespace and never match.
+_SENTENCE_END = re.compile(r'[.!?]+["\')\]]*\s+')
+_ABBREVIATIONS = {"e.g.", "i.e.", "etc.", "vs.", "mr.", "mrs.", "ms.", "dr.", "prof.", "st.", "no.", "approx."}
+
+_STOP = object()
+
+
+class SentenceSplitter:
+    def __init__(self, min_chars: int = 20):
+        """
+        Incrementally split streamed text into sentences
+
+        Args:
+            min_chars: Sentences shorter than this are joined with the next one,
+                so fragments like "Yes." are not spoken on their own
+        """
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        """Add streamed text and return the sentences it completed"""
+        self._buffer += text
+        sentences = []
+        start = 0
+        for match in _SENTENCE_END.finditer(self._buffer):
+            candidate = self._buffer[start:match.end()].strip()
+            if candidate.split()[-1].lower() in _ABBREVIATIONS:
+                continue
+            if len(candidate) >= self.min_chars:
+                sentences.append(candidate)
+                start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        """Return whatever text is left once the stream has ended"""
+        rest, self._buffer = self._buffer.strip(), ""
+        return rest or None
+
+
+class BargeInMonitor:
+    def __init__(self, capture, on_barge_in: Callable[[], None], min_speech_ms: int = 200):
+        """
+        Watch the microphone while the assistant speaks and fire when the user talks over it
+
+        The utterance that triggered the interruption keeps being captured,
+        so it can be transcribed without waiting for the user to repeat it.
+
+        Args:
+            capture: Open MicrophoneStream
+            on_barge_in: Called once, from the monitor thread, when speech is detected
+            min_speech_ms: Speech needed before firing, so clicks and coughs don't interrupt
+        """
+        self.capture = capture
+        self.on_barge_in = on_barge_in
+        self.min_speech_bytes = capture.sample_rate * min_speech_ms // 1000 * 2
+        self.triggered = False
+        self.detected_at = None
+        self.interrupt_latency = None
+        self._chunks = []
+        self._subscriber = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._subscriber = self.capture.subscribe()
+        self._thread = threading.Thread(target=self._watch, name="barge-in", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching; the triggering utterance stays available through utterance()"""
+        self._stop.set()
+        self._thread.join()
+        if not self.triggered:
+            self.capture.unsubscribe(self._subscriber)
+
+    def _watch(self):
+        heard = 0
+        while not self._stop.is_set():
+            try:
+                event = self._subscriber.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            if event.kind == "start":
+                self._chunks, heard = [event.pcm], 0
+                self.detected_at = event.timestamp
+            elif event.kind == "audio" and self._chunks:
+                self._chunks.append(event.pcm)
+                heard += len(event.pcm)
+                if heard >= self.min_speech_bytes:
+                    self.triggered = True
+                    try:
+                        self.on_barge_in()
+                    except Exception as e:
+                        print(f"⚠️ Barge-in could not stop playback cleanly: {e}")
+                    finally:
+                        # Measured from the VAD detecting speech onset to playback having stopped
+                        self.interrupt_latency = time.time() - self.detected_at
+                        METRICS.inc("barge_in_total")
+                        METRICS.observe("barge_in", self.interrupt_latency)
+                    return
+            elif event.kind == "end":
+                self._chunks = []
+
+    def utterance(self, max_seconds: float = None) -> Iterator[bytes]:
+        """PCM of the interrupting utterance: audio so far, then the rest as it is captured"""
+        yield from self._chunks
+        yield from self.capture.follow(self._subscriber, max_seconds)
+
+
+class SpeechPipeline:
+    def __init__(self, audio_processor, min_sentence_chars: int = 20):
+        """
+        Speak streamed model output sentence by sentence
+
+        A worker thread owns the TTS engine and speaks queued sentences in
+        order while generation continues, so playback starts after the first
+        sentence instead of after the whole response.
+
+        Args:
+            audio_processor: AudioProcessor or SimpleAudioProcessor used for synthesis
+            min_sentence_chars: Minimum length of a spoken sentence
+        """
+        self.audio_processor = audio_processor
+        self.min_sentence_chars = min_sentence_chars
+        self._queue = queue.Queue()
+        self._first_speech = None
+        self._cancelled = threading.Event()
+        self.last_barge_in = None
+        self._worker = threading.Thread(target=self._speak_loop, name="tts-pipeline", daemon=True)
+        self._worker.start()
+
+    def _speak_loop(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                sentence, started, turn = item
+                if self._cancelled.is_set():
+                    continue
+                if self._first_speech is None:
+                    self._first_speech = time.perf_counter() - started
+                    METRICS.observe("first_speech", self._first_speech)
+                self.audio_processor.text_to_speech(sentence, announce=False, turn=turn)
+            except Exception as e:
+                print(f"❌ Speech pipeline error: {e}")
+            finally:
+                self._queue.task_done()
+
+    def speak_stream(self, tokens: Iterable[str], on_text: Callable[[str], None] = None,
+                     barge_in: bool = False, turn=None) -> str:
+        """
+        Speak a token stream as it arrives and return the text produced
+
+        Blocks until the last sentence has been spoken or the stream is cancelled.
+
+        Args:
+            tokens: Streamed text, e.g. from Llama4RAGChatbot.generate_response_stream
+            on_text: Called with each token as it arrives, e.g. to print it
+            barge_in: Listen on the microphone and cancel() when the user starts
+                talking; the monitor is left in last_barge_in if it fired
+            turn: VoiceTurn that gets the first-token, first-audio and playback-done times
+        """
+        splitter = SentenceSplitter(self.min_sentence_chars)
+        started = time.perf_counter()
+        self._first_speech = None
+        # A fresh event per stream, so a reader left over from a cancelled stream stays cancelled
+        self._cancelled = threading.Event()
+        self.last_barge_in = None
+        monitor = None
+        if barge_in and hasattr(self.audio_processor, "get_capture"):
+            try:
+                monitor = BargeInMonitor(self.audio_processor.get_capture(), self.cancel)
+                monitor.start()
+            except Exception as e:
+                print(f"⚠️ Barge-in unavailable, microphone could not be opened: {e}")
+        pending = queue.Queue()
+        stop_reading = threading.Event()
+        reader = threading.Thread(target=self._read_tokens, args=(tokens, pending, stop_reading),
+                                  name="tts-tokens", daemon=True)
+        reader.start()
+        produced = []
+        try:
+            while not self._cancelled.is_set():
+                # Poll so cancel() takes effect even while the token stream is stalled
+                try:
+                    token = pending.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if token is _STOP:
+                    break
+                if isinstance(token, Exception):
+                    raise token
+                if turn and not produced:
+                    turn.mark("first_token")
+                produced.append(token)
+                if on_text:
+                    on_text(token)
+                for sentence in splitter.feed(token):
+                    self._queue.put((sentence, started, turn))
+        finally:
+            stop_reading.set()
+            if self._cancelled.is_set():
+                if turn:
+                    turn.interrupted = True
+            else:
+                rest = splitter.flush()
+                if rest:
+                    self._queue.put((rest, started, turn))
+            self._queue.join()
+            if monitor:
+                monitor.stop()
+                self.last_barge_in = monitor if monitor.triggered else None
+        return "".join(produced)
+
+    @staticmethod
+    def _read_tokens(tokens: Iterable[str], pending: queue.Queue, stop_reading: threading.Event):
+        """Move tokens onto pending until the stream ends or speak_stream stops reading"""
+        try:
+            for token in tokens:
+                if stop_reading.is_set():
+                    break
+                pending.put(token)
+        except Exception as e:
+            pending.put(e)
+        finally:
+            # Closing the generator on the thread consuming it stops generation upstream; a
+            # stalled stream is closed as soon as its pending token arrives
+            if hasattr(tokens, "close"):
+                tokens.close()
+            pending.put(_STOP)
+
+    def cancel(self):
+        """Stop speaking now: cut playback, drop queued sentences and end the current stream"""
+        self._cancelled.set()
+        stop_speaking = getattr(self.audio_processor, "stop_speaking", None)
+        if stop_speaking:
+            stop_speaking()
+
+    @property
+    def first_speech_latency(self) -> Optional[float]:
+        """Seconds from the start of the last stream until its first sentence was handed to TTS"""
+        return self._first_speech
+
+    def close(self):
+        """Stop the worker once queued sentences are spoken"""
+        self._queue.put(_STOP)
+        self._worker.join()
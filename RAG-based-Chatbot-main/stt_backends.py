@@ -0,0 +1,193 @@
+import os
+import json
+import wave
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Optional, Tuple
+import numpy as np
+
+STT_BACKENDS = ("google", "vosk")
+
+# Audio handed to recognizers: 16 kHz, mono, 16-bit little-endian PCM
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+
+DEFAULT_VOSK_MODEL = os.environ.get("VOSK_MODEL_PATH", os.path.join("models", "vosk-model-small-en-us-0.15"))
+
+
+def load_wav(path: str) -> Tuple[bytes, float]:
+    """Load a PCM WAV file as 16 kHz mono 16-bit bytes; returns (pcm, duration in seconds)"""
+    with wave.open(path, 'rb') as f:
+        channels, width, rate = f.getnchannels(), f.getsampwidth(), f.getframerate()
+        frames = f.readframes(f.getnframes())
+
+    if width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        samples = np.frombuffer(frames, dtype='<i2').astype(np.float32) / 32768
+    elif width == 4:
+        samples = np.frombuffer(frames, dtype='<i4').astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"Unsupported sample width {width} in {path}")
+
+    samples = samples.reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE:
+        positions = np.arange(0, len(samples), rate / SAMPLE_RATE)
+        samples = np.interp(positions, np.arange(len(samples)), samples)
+
+    pcm = (np.clip(samples, -1, 1) * 32767).astype('<i2').tobytes()
+    return pcm, len(pcm) / SAMPLE_WIDTH / SAMPLE_RATE
+
+
+@dataclass
+class Transcript:
+    text: str
+    is_final: bool
+
+
+class RecognitionSession(ABC):
+    """One utterance being recognized; audio is fed in as it is captured"""
+
+    @abstractmethod
+    def accept(self, pcm: bytes) -> Optional[Transcript]:
+        """Feed audio and return the transcript so far, if it changed"""
+
+    @abstractmethod
+    def finish(self) -> str:
+        """Flush the recognizer and return the final transcript"""
+
+
+class _BufferedSession(RecognitionSession):
+    """Collects audio for backends that can only transcribe whole utterances"""
+
+    def __init__(self, backend, sample_rate: int):
+        self.backend = backend
+        self.sample_rate = sample_rate
+        self._chunks = []
+
+    def accept(self, pcm: bytes) -> Optional[Transcript]:
+        self._chunks.append(pcm)
+        return None
+
+    def finish(self) -> str:
+        return self.backend.transcribe(b"".join(self._chunks), self.sample_rate)
+
+
+class STTBackend(ABC):
+    name = "base"
+    streaming = False  # True if sessions emit partial transcripts
+
+    @abstractmethod
+    def transcribe(self, pcm: bytes, sample_rate: int = SAMPLE_RATE) -> str:
+        """Transcribe a complete utterance of 16-bit mono PCM; returns "" if nothing was recognized"""
+
+    def start_session(self, sample_rate: int = SAMPLE_RATE) -> RecognitionSession:
+        """Start recognizing a new utterance"""
+        return _BufferedSession(self, sample_rate)
+
+
+class GoogleSTTBackend(STTBackend):
+    name = "google"
+
+    def __init__(self, language: str = "en-US"):
+        """
+        Google Web Speech API through speech_recognition (needs network access)
+
+        Args:
+            language: Recognition language tag
+        """
+        import speech_recognition as sr
+        self._sr = sr
+        self.recognizer = sr.Recognizer()
+        self.language = language
+
+    def transcribe(self, pcm: bytes, sample_rate: int = SAMPLE_RATE) -> str:
+        audio = self._sr.AudioData(pcm, sample_rate, SAMPLE_WIDTH)
+        try:
+            return self.recognizer.recognize_google(audio, language=self.language)
+        except self._sr.UnknownValueError:
+            return ""
+
+
+class _VoskSession(RecognitionSession):
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+        self._finals = []
+        self._last_partial = ""
+
+    def _joined(self, tail: str = "") -> str:
+        return " ".join(part for part in self._finals + [tail] if part)
+
+    def accept(self, pcm: bytes) -> Optional[Transcript]:
+        if self.recognizer.AcceptWaveform(pcm):
+            # Vosk detected the end of a phrase
+            text = json.loads(self.recognizer.Result()).get("text", "")
+            self._last_partial = ""
+            if not text:
+                return None
+            self._finals.append(text)
+            return Transcript(self._joined(), True)
+
+        partial = json.loads(self.recognizer.PartialResult()).get("partial", "")
+        if not partial or partial == self._last_partial:
+            return None
+        self._last_partial = partial
+        return Transcript(self._joined(partial), False)
+
+    def finish(self) -> str:
+        text = json.loads(self.recognizer.FinalResult()).get("text", "")
+        if text:
+            self._finals.append(text)
+        return self._joined()
+
+
+class VoskSTTBackend(STTBackend):
+    name = "vosk"
+    streaming = True
+
+    def __init__(self, model_path: str = DEFAULT_VOSK_MODEL):
+        """
+        Offline CPU recognizer built on Vosk (Kaldi)
+
+        Emits partial transcripts while audio is still arriving and detects
+        the end of a phrase itself. Small English models are ~50 MB and run
+        faster than real time on one core.
+
+        Args:
+            model_path: Unpacked Vosk model directory (https://alphacephei.com/vosk/models)
+        """
+        try:
+            from vosk import Model, SetLogLevel
+        except ImportError:
+            raise ImportError("The vosk backend needs the vosk package: pip install vosk")
+        if not os.path.isdir(model_path):
+            raise FileNotFoundError(f"Vosk model not found at {model_path}; download one from "
+                                    f"https://alphacephei.com/vosk/models or set VOSK_MODEL_PATH")
+        SetLogLevel(-1)
+        self.model_path = model_path
+        self.model = Model(model_path)
+
+    def start_session(self, sample_rate: int = SAMPLE_RATE) -> RecognitionSession:
+        from vosk import KaldiRecognizer
+        return _VoskSession(KaldiRecognizer(self.model, sample_rate))
+
+    def transcribe(self, pcm: bytes, sample_rate: int = SAMPLE_RATE) -> str:
+        session = self.start_session(sample_rate)
+        block = sample_rate // 5 * SAMPLE_WIDTH  # 200 ms
+        for i in range(0, len(pcm), block):
+            session.accept(pcm[i:i + block])
+        return session.finish()
+
+
+def load_stt_backend(name: str = "google", **options) -> STTBackend:
+    """
+    Create a speech-to-text backend by name
+
+    Args:
+        name: One of STT_BACKENDS
+        options: Backend constructor arguments (e.g. model_path for vosk)
+    """
+    backends = {"google": GoogleSTTBackend, "vosk": VoskSTTBackend}
+    if name not in backends:
+        raise ValueError(f"Unknown STT backend {name!r}; choose from {', '.join(STT_BACKENDS)}")
+    return backends[name](**options)
@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import uuid
+import cProfile
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from typing import Iterator
+
+_current_span = contextvars.ContextVar("rag_current_span", default=None)
+
+
+class Span:
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent",
+                 "attributes", "start", "_perf", "_token")
+
+    def __init__(self, tracer, name: str, parent, attributes: dict):
+        self.tracer = tracer
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.attributes = attributes
+        self._token = None
+
+    def set(self, **attributes):
+        """Attach attributes to the span"""
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self.start = time.time()
+        self._perf = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration_ms = (time.perf_counter() - self._perf) * 1000
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Exited from a different context, e.g. a generator resumed elsewhere
+            _current_span.set(self.parent)
+        self.tracer._export({
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent else None,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round(duration_ms, 3),
+            "status": self._status(exc_type),
+            "error": repr(exc) if exc_type and exc_type is not GeneratorExit else None,
+            "attributes": self.attributes,
+        })
+        return False
+
+    @staticmethod
+    def _status(exc_type) -> str:
+        if exc_type is None:
+            return "ok"
+        # A streaming generator closed by its consumer before it finished
+        return "cancelled" if exc_type is GeneratorExit else "error"
+
+
+def run_in_own_context(generator: Iterator) -> Iterator:
+    """
+    Run each step of a generator in a context of its own
+
+    A span opened inside a generator would otherwise stay current in the
+    consumer's context across every yield, so spans the consumer opens
+    between items would be recorded as its children. Here the generator's
+    spans are only current while the generator itself is running.
+    """
+    context = contextvars.copy_context()
+    try:
+        while True:
+            try:
+                item = context.run(next, generator)
+            except StopIteration:
+                return
+            yield item
+    finally:
+        # Also when the consumer stops early, so the generator's spans close in their own context
+        context.run(generator.close)
+
+
+class _NullSpan:
+    """Shared span returned while tracing is disabled"""
+    trace_id = None
+    span_id = None
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    def __init__(self, path: str = "traces/traces.jsonl", enabled: bool = False,
+                 max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5):
+        """
+        Request tracer writing one JSON line per finished span
+
+        Spans nest through a context variable: a span opened while another
+        is active becomes its child and shares its trace id. The file is
+        rotated once it reaches max_bytes.
+
+        Args:
+            path: JSONL output file
+            enabled: Whether to record spans
+            max_bytes: Size at which the file is rotated
+            backup_count: Rotated files to keep
+        """
+        self.path = path
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._logger = None
+        self._logger_lock = threading.Lock()
+
+    def _get_logger(self) -> logging.Logger:
+        with self._logger_lock:
+            if self._logger is not None:
+                return self._logger
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            handler = RotatingFileHandler(self.path, maxBytes=self.max_bytes,
+                                          backupCount=self.backup_count, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger = logging.getLogger(f"rag.tracing.{id(self)}")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(handler)
+            self._logger = logger
+            return logger
+
+    def span(self, name: str, **attributes):
+        """Open a span, starting a new trace if no span is active"""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, _current_span.get(), attributes)
+
+    def _export(self, record: dict):
+        (self._logger or self._get_logger()).info(json.dumps(record, default=str))
+
+
+class RequestProfiler:
+    def __init__(self, output_dir: str = "profiles", enabled: bool = False):
+        """
+        Deterministic per-request profiler built on cProfile
+
+        Each profiled request is dumped to its own .prof file, readable with
+        pstats or snakeviz.
+
+        Args:
+            output_dir: Directory for profile dumps
+            enabled: Whether requests are profiled
+        """
+        self.output_dir = output_dir
+        self.enabled = enabled
+
+    @contextmanager
+    def profile(self, request_id: str = None):
+        if not self.enabled:
+            yield None
+            return
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another request on a different thread is already being profiled
+            yield None
+            return
+        try:
+            yield profiler
+        finally:
+            profiler.disable()
+            os.makedirs(self.output_dir, exist_ok=True)
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{request_id or uuid.uuid4().hex[:16]}.prof"
+            path = os.path.join(self.output_dir, name)
+            profiler.dump_stats(path)
+            print(f"🔬 Request profile written to {path}")
+
+
+# Process-wide instances; RAG_TRACE=1 and RAG_PROFILE=1 switch them on at startup
+TRACER = Tracer(path=os.environ.get("RAG_TRACE_FILE", "traces/traces.jsonl"),
+                enabled=os.environ.get("RAG_TRACE", "0") == "1")
+PROFILER = RequestProfiler(output_dir=os.environ.get("RAG_PROFILE_DIR", "profiles"),
+                           enabled=os.environ.get("RAG_PROFILE", "0") == "1")
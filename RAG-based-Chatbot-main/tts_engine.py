@@ -0,0 +1,240 @@
+import os
+import time
+import wave
+import queue
+import tempfile
+import threading
+import importlib.util
+from collections import OrderedDict, namedtuple
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Callable, Hashable, Optional
+import numpy as np
+from metrics import METRICS
+
+# samples is an int16 array shaped (frames, channels)
+SynthesizedAudio = namedtuple("SynthesizedAudio", ["samples", "sample_rate"])
+
+_STOP = object()
+
+
+def read_wav(path: str) -> SynthesizedAudio:
+    """Load a PCM WAV file as int16 samples"""
+    with wave.open(path, 'rb') as f:
+        channels, width, rate = f.getnchannels(), f.getsampwidth(), f.getframerate()
+        frames = f.readframes(f.getnframes())
+
+    if width == 1:
+        samples = ((np.frombuffer(frames, dtype=np.uint8).astype(np.int16) - 128) << 8)
+    elif width == 2:
+        samples = np.frombuffer(frames, dtype='<i2').astype(np.int16)
+    elif width == 4:
+        samples = (np.frombuffer(frames, dtype='<i4') >> 16).astype(np.int16)
+    else:
+        raise wave.Error(f"Unsupported sample width {width}")
+    return SynthesizedAudio(samples.reshape(-1, channels), rate)
+
+
+class AudioCache:
+    def __init__(self, max_entries: int = 64, max_bytes: int = 32 * 1024 * 1024):
+        """
+        LRU cache of synthesized audio
+
+        Args:
+            max_entries: Phrases kept
+            max_bytes: Total audio kept; least recently played phrases are evicted first
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[SynthesizedAudio]:
+        with self._lock:
+            audio = self._entries.get(key)
+            if audio is not None:
+                self._entries.move_to_end(key)
+            return audio
+
+    def put(self, key: Hashable, audio: SynthesizedAudio):
+        size = audio.samples.nbytes
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key).samples.nbytes
+            self._entries[key] = audio
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.samples.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+
+class TTSEngine:
+    def __init__(self, cache_entries: int = 64, cache_bytes: int = 32 * 1024 * 1024):
+        """
+        pyttsx3 engine owned by a single worker thread
+
+        pyttsx3 is not thread-safe, so every call (speaking, reading and
+        changing properties) is queued and run in order by the worker.
+        Speech is rendered to a WAV file, kept in an LRU cache keyed by
+        text, voice, rate and volume, and played with sounddevice, so a
+        repeated phrase skips synthesis. Without sounddevice, or when the
+        platform driver does not write WAV, the engine speaks directly and
+        nothing is cached. interrupt() cuts rendered playback short within
+        ~10 ms; direct speech can only be stopped between requests.
+
+        Args:
+            cache_entries: Phrases kept in the audio cache
+            cache_bytes: Audio kept in the cache
+        """
+        self.cache = AudioCache(cache_entries, cache_bytes)
+        self.engine = None
+        self.is_speaking = False
+        self.can_render = importlib.util.find_spec("sounddevice") is not None
+        self._settings = {}
+        self._epoch = 0
+        self._requests = queue.Queue()
+        self._ready = threading.Event()
+        self._init_error = None
+        self._worker = threading.Thread(target=self._run, name="tts-engine", daemon=True)
+        self._worker.start()
+        self._ready.wait()
+        if self._init_error is not None:
+            raise self._init_error
+
+    def _run(self):
+        try:
+            import pyttsx3
+            # The engine must be created on the thread that drives it
+            self.engine = pyttsx3.init()
+            self._settings = {name: self.engine.getProperty(name) for name in ("voice", "rate", "volume")}
+        except Exception as e:
+            self._init_error = e
+            return
+        finally:
+            self._ready.set()
+
+        while True:
+            item = self._requests.get()
+            if item is _STOP:
+                return
+            fn, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn())
+            except Exception as e:
+                future.set_exception(e)
+
+    def submit(self, fn: Callable) -> Future:
+        """Run fn on the engine thread after everything queued before it"""
+        future = Future()
+        self._requests.put((fn, future))
+        return future
+
+    def speak(self, text: str, turn=None) -> Future:
+        """
+        Queue text to be spoken; the future completes when playback ends or is interrupted
+
+        Args:
+            text: Text to speak
+            turn: VoiceTurn that gets the first-audio and playback-done times
+        """
+        epoch = self._epoch
+        return self.submit(lambda: self._speak(text, epoch, turn))
+
+    def interrupt(self, timeout: float = 2.0) -> bool:
+        """
+        Stop the current playback, drop queued speech and wait until the engine is quiet
+
+        Returns:
+            False if the engine was still busy after timeout seconds, e.g. finishing
+            a sentence spoken directly by the driver (queued speech is still dropped)
+        """
+        # Requests queued before this point see a stale epoch and are skipped
+        self._epoch += 1
+        try:
+            self.submit(lambda: None).result(timeout)
+            return True
+        except FutureTimeoutError:
+            return False
+
+    def get_property(self, name: str):
+        return self.submit(lambda: self.engine.getProperty(name)).result()
+
+    def set_property(self, name: str, value):
+        def apply():
+            self.engine.setProperty(name, value)
+            if name in self._settings:
+                self._settings[name] = value
+        self.submit(apply).result()
+
+    def close(self):
+        """Stop the worker once queued requests are done"""
+        self._requests.put(_STOP)
+        self._worker.join()
+
+    def _speak(self, text: str, epoch: int, turn=None):
+        if epoch != self._epoch:
+            return
+        key = (text, self._settings.get("voice"), self._settings.get("rate"), self._settings.get("volume"))
+        audio = self.cache.get(key)
+        if audio is not None:
+            METRICS.inc("cache_hits_total", cache="tts")
+        elif self.can_render:
+            METRICS.inc("cache_misses_total", cache="tts")
+            with METRICS.timer("tts_synthesis"):
+                audio = self._synthesize(text)
+            if audio is not None:
+                self.cache.put(key, audio)
+            if epoch != self._epoch:
+                return
+
+        self.is_speaking = True
+        if turn:
+            turn.mark("first_audio")
+        try:
+            with METRICS.timer("tts"):
+                if audio is None:
+                    self.engine.say(text)
+                    self.engine.runAndWait()
+                else:
+                    self._play(audio, epoch)
+        finally:
+            self.is_speaking = False
+            if turn:
+                turn.mark("playback_done", overwrite=True)
+
+    def _synthesize(self, text: str) -> Optional[SynthesizedAudio]:
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            self.engine.save_to_file(text, path)
+            self.engine.runAndWait()
+            return read_wav(path)
+        except (wave.Error, EOFError) as e:
+            # e.g. the macOS driver writes AIFF; speak directly from now on
+            print(f"⚠️ TTS driver did not produce WAV audio ({e}), caching disabled")
+            self.can_render = False
+            return None
+        finally:
+            os.remove(path)
+
+    def _play(self, audio: SynthesizedAudio, epoch: int):
+        import sounddevice as sd
+        sd.play(audio.samples, audio.sample_rate)
+        # Poll instead of sd.wait() so interrupt() can stop playback part way through
+        while sd.get_stream().active:
+            if epoch != self._epoch:
+                sd.stop()
+                return
+            time.sleep(0.01)
@@ -0,0 +1,117 @@
+import time
+import threading
+from collections import deque
+from typing import Dict, Optional
+import numpy as np
+from metrics import METRICS
+
+# Points in a spoken exchange, in the order they normally happen
+VOICE_MARKS = ("speech_end", "transcript", "retrieval", "first_token", "first_audio", "playback_done")
+
+# Reported segment: (from mark, to mark)
+VOICE_SEGMENTS = {
+    "stt": ("speech_end", "transcript"),
+    "retrieval": ("transcript", "retrieval"),
+    "generation": ("retrieval", "first_token"),
+    "tts": ("first_token", "first_audio"),
+    "response": ("speech_end", "first_audio"),
+    "playback": ("first_audio", "playback_done"),
+    "total": ("speech_end", "playback_done"),
+}
+
+
+class VoiceTurn:
+    def __init__(self, tracker: "VoiceLatencyTracker"):
+        """
+        Wall-clock timestamps of one spoken question and its spoken answer
+
+        Marks can be recorded from any thread and in any order, e.g. the
+        retrieval time is only known once the response metadata comes back.
+        """
+        self.tracker = tracker
+        self.marks: Dict[str, float] = {}
+        self.interrupted = False
+        self._finished = False
+
+    def mark(self, name: str, at: float = None, overwrite: bool = False):
+        """Record when name happened (now if at is None); the first record wins unless overwrite"""
+        if at is None:
+            at = time.time()
+        if overwrite or name not in self.marks:
+            self.marks[name] = at
+
+    def segments(self) -> Dict[str, float]:
+        """Seconds spent in each segment whose two marks were recorded"""
+        segments = {}
+        for name, (start, end) in VOICE_SEGMENTS.items():
+            if start in self.marks and end in self.marks:
+                if self.interrupted and end == "playback_done":
+                    continue
+                segments[name] = max(0.0, self.marks[end] - self.marks[start])
+        return segments
+
+    def finish(self):
+        """Hand the turn to the tracker; later calls do nothing"""
+        if not self._finished:
+            self._finished = True
+            self.tracker.record(self)
+
+
+class VoiceLatencyTracker:
+    def __init__(self, window: int = 200):
+        """
+        Aggregate end-to-end voice latency over recent turns
+
+        Percentiles are exact over the last window turns (the METRICS
+        histograms get the same values but only report bucket bounds).
+
+        Args:
+            window: Turns kept for the percentile summary
+        """
+        self.window = window
+        self._turns = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def start_turn(self) -> VoiceTurn:
+        return VoiceTurn(self)
+
+    def record(self, turn: VoiceTurn):
+        segments = turn.segments()
+        if not segments:
+            return
+        with self._lock:
+            self._turns.append(segments)
+        for name, seconds in segments.items():
+            METRICS.observe(f"voice_{name}", seconds)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per-segment count, mean and p50/p95/p99 in seconds, in VOICE_SEGMENTS order"""
+        with self._lock:
+            turns = list(self._turns)
+        summary = {}
+        for name in VOICE_SEGMENTS:
+            values = [t[name] for t in turns if name in t]
+            if values:
+                p50, p95, p99 = np.percentile(values, [50, 95, 99])
+                summary[name] = {"count": len(values), "mean": float(np.mean(values)),
+                                 "p50": float(p50), "p95": float(p95), "p99": float(p99)}
+        return summary
+
+    def reset(self):
+        with self._lock:
+            self._turns.clear()
+
+
+# Process-wide tracker shared by the CLI and GUI
+VOICE_LATENCY = VoiceLatencyTracker()
+
+
+def format_voice_latency(summary: Optional[Dict[str, Dict[str, float]]] = None) -> str:
+    """Voice latency percentiles as a fixed-width table in milliseconds"""
+    summary = VOICE_LATENCY.summary() if summary is None else summary
+    if not summary:
+        return "  No voice turns recorded yet"
+    lines = [f"  {'segment':<12}{'count':>7}{'p50':>9}{'p95':>9}{'p99':>9}"]
+    for name, s in summary.items():
+        lines.append(f"  {name:<12}{s['count']:>7}{s['p50'] * 1000:>9.0f}{s['p95'] * 1000:>9.0f}{s['p99'] * 1000:>9.0f}")
+    return "\n".join(lines)